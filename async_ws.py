@@ -0,0 +1,183 @@
+"""
+Минимальный WebSocket клиент (RFC 6455) на asyncio streams.
+Текстовые/бинарные сообщения, фрагментация, ответ на ping, закрытие.
+Нужен, чтобы все соединения фида жили в одном asyncio цикле без
+отдельного потока на соединение.
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+import ssl
+import struct
+from urllib.parse import urlsplit
+
+GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+
+
+class ConnectionClosed(Exception):
+    """Соединение закрыто сервером или сетью"""
+
+
+def _mask(payload, key):
+    """XOR с 4-байтовым ключом целыми числами (без цикла по байтам)"""
+    if not payload:
+        return payload
+    repeated = (key * (len(payload) // 4 + 1))[:len(payload)]
+    value = int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')
+    return value.to_bytes(len(payload), 'big')
+
+
+class AsyncWebSocket:
+    """Клиентское соединение; методы вызываются только из потока цикла"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+
+    @classmethod
+    async def connect(cls, url, timeout=10, extra_headers=None):
+        parts = urlsplit(url)
+        secure = parts.scheme == 'wss'
+        host = parts.hostname
+        port = parts.port or (443 if secure else 80)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        context = ssl.create_default_context() if secure else None
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=context, server_hostname=host if secure else None),
+            timeout)
+
+        key = base64.b64encode(os.urandom(16)).decode()
+        host_header = host if parts.port is None else f"{host}:{parts.port}"
+        lines = [
+            f"GET {path} HTTP/1.1",
+            f"Host: {host_header}",
+            "Upgrade: websocket",
+            "Connection: Upgrade",
+            f"Sec-WebSocket-Key: {key}",
+            "Sec-WebSocket-Version: 13",
+        ]
+        for name, value in (extra_headers or {}).items():
+            lines.append(f"{name}: {value}")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+
+        try:
+            response = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+            writer.close()
+            raise ConnectionClosed(f"handshake failed: {e}")
+        head = response.decode('latin-1').split('\r\n')
+        status = head[0].split(' ', 2)
+        headers = {}
+        for line in head[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        accept = base64.b64encode(hashlib.sha1((key + GUID).encode()).digest()).decode()
+        if len(status) < 2 or status[1] != '101' or headers.get('sec-websocket-accept') != accept:
+            writer.close()
+            raise ConnectionClosed(f"handshake rejected: {head[0]}")
+        return cls(reader, writer)
+
+    def _write_frame(self, opcode, payload):
+        if self.closed:
+            raise ConnectionClosed("send on closed connection")
+        length = len(payload)
+        if length < 126:
+            header = struct.pack('!BB', 0x80 | opcode, 0x80 | length)
+        elif length < 65536:
+            header = struct.pack('!BBH', 0x80 | opcode, 0x80 | 126, length)
+        else:
+            header = struct.pack('!BBQ', 0x80 | opcode, 0x80 | 127, length)
+        key = os.urandom(4)
+        self.writer.write(header + key + _mask(payload, key))
+
+    def send_nowait(self, text):
+        """Поставить текстовое сообщение в буфер сокета (без ожидания отправки)"""
+        self._write_frame(OP_TEXT, text.encode() if isinstance(text, str) else text)
+
+    async def send(self, text):
+        self.send_nowait(text)
+        await self.writer.drain()
+
+    async def _read_frame(self):
+        try:
+            first, second = await self.reader.readexactly(2)
+            length = second & 0x7F
+            if length == 126:
+                length, = struct.unpack('!H', await self.reader.readexactly(2))
+            elif length == 127:
+                length, = struct.unpack('!Q', await self.reader.readexactly(8))
+            if length > MAX_MESSAGE_SIZE:
+                raise ConnectionClosed(f"frame too large: {length}")
+            key = await self.reader.readexactly(4) if second & 0x80 else None
+            payload = await self.reader.readexactly(length)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            self.closed = True
+            raise ConnectionClosed(str(e) or "connection lost")
+        if key:
+            payload = _mask(payload, key)
+        return bool(first & 0x80), first & 0x0F, payload
+
+    async def recv(self, raw=False):
+        """Следующее сообщение: str для текстовых, bytes для бинарных.
+        raw=True - текст тоже как bytes (без декодирования UTF-8, для JSON парсера)"""
+        fragments = []
+        message_opcode = None
+        while True:
+            fin, opcode, payload = await self._read_frame()
+            if opcode == OP_PING:
+                if not self.closed:
+                    self._write_frame(OP_PONG, payload)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                if not self.closed:
+                    try:
+                        self._write_frame(OP_CLOSE, payload[:2])
+                    except Exception:
+                        pass
+                    self.closed = True
+                code = struct.unpack('!H', payload[:2])[0] if len(payload) >= 2 else None
+                raise ConnectionClosed(f"closed by server ({code})")
+            if opcode != OP_CONTINUATION:
+                message_opcode = opcode
+            if fin and not fragments:
+                # Обычный случай: сообщение в одном кадре, без склейки
+                data = payload
+            else:
+                fragments.append(payload)
+                if not fin:
+                    continue
+                data = b''.join(fragments)
+            return data.decode('utf-8') if message_opcode == OP_TEXT and not raw else data
+
+    def abort(self):
+        """Оборвать соединение без закрытия по протоколу; recv получит ConnectionClosed"""
+        self.closed = True
+        self.writer.transport.abort()
+
+    async def close(self):
+        if not self.closed:
+            try:
+                self._write_frame(OP_CLOSE, struct.pack('!H', 1000))
+                await self.writer.drain()
+            except Exception:
+                pass
+            self.closed = True
+        self.writer.close()
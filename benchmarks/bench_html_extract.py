@@ -0,0 +1,80 @@
+"""
+Бенчмарк извлечения цены из HTML страницы OKX.
+Сравнивает прежний парсер (BeautifulSoup + селекторы + regex) с FastPriceExtractor
+на сохранённых страницах из benchmarks/fixtures (ожидаемые цены в expected.json).
+
+Нужен beautifulsoup4 (в приложении не используется): pip install beautifulsoup4
+
+Запуск из корня проекта:
+    python benchmarks/bench_html_extract.py [количество повторов]
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from dex_providers import FastPriceExtractor
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def dom_extract(content):
+    """Прежний путь get_dex_price: DOM, 7 селекторов, title, regex по тексту"""
+    soup = BeautifulSoup(content, 'html.parser')
+    for selector in ['.token-price', '.price-value', '[data-testid="token-price"]',
+                     '.token-price-value', '.price', '.token-info-price', '.price-display']:
+        price_elem = soup.select_one(selector)
+        if price_elem:
+            price_match = re.search(r'[\d,]+\.?\d*', price_elem.get_text().strip().replace(',', ''))
+            if price_match:
+                price = float(price_match.group().replace(',', ''))
+                if price > 0:
+                    return price
+    if soup.title:
+        match = re.search(r'\$([0-9,.]+)', soup.title.string)
+        if match:
+            return float(match.group(1).replace(',', '.'))
+    page_text = content.decode('utf-8', errors='replace')
+    for pattern in [r'\$?(\d{1,3}(?:,\d{3})*(?:\.\d+)?)', r'(\d+\.\d+)', r'(\d+,\d+)']:
+        for match in re.findall(pattern, page_text):
+            try:
+                price = float(match.replace(',', ''))
+                if 0.000001 < price < 1000000:
+                    return price
+            except ValueError:
+                continue
+    return None
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    with open(os.path.join(FIXTURES_DIR, 'expected.json'), 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+
+    extractor = FastPriceExtractor()
+    print(f"{'page':<28} {'expected':>10} {'dom':>10} {'dom ms':>8} {'fast':>10} {'fast ms':>8}  strategy")
+    for name, info in expected.items():
+        with open(os.path.join(FIXTURES_DIR, name), 'rb') as f:
+            content = f.read()
+        dom_price, dom_ms = timed(lambda: dom_extract(content), max(1, repeat // 10))
+        (fast_price, strategy), fast_ms = timed(lambda: extractor.extract(content, info['chain']), repeat)
+        mark = '' if fast_price == info['price'] else '  MISMATCH'
+        print(f"{name:<28} {info['price']:>10g} {str(dom_price):>10} {dom_ms:>8.2f} "
+              f"{fast_price:>10g} {fast_ms:>8.3f}  {strategy}{mark}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+Бенчмарк разбора кадров MEXC фида.
+Сравнивает прежний путь (UTF-8 -> str, json.loads на каждый кадр) с
+MexcFeedManager для каждого установленного декодера (orjson, ujson, json)
+в два этапа:
+- decode: разбор кадра и отсев pong/ответов на подписку (MexcFeedManager.decode);
+- dispatch: то же плюс отсев повторов и вызов обработчика (MexcFeedManager.dispatch).
+В прежнем пути отсева повторов не было, поэтому сравнение декодеров - по decode.
+Время - лучший из --runs замеров при выключенном gc.
+Кадры - из benchmarks/fixtures/mexc_frames.jsonl (по одному в строке).
+
+Запуск из корня проекта:
+    python benchmarks/bench_mexc_decode.py [количество повторов] [--runs N]
+    python benchmarks/bench_mexc_decode.py --record 2000 BTC ETH RAIL   # записать кадры с биржи
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from async_ws import AsyncWebSocket
+from json_codec import available_decoders, get_decoder
+from mexc_feed import MEXC_CONFIG, MexcFeedManager, mexc_symbol
+
+FRAMES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'mexc_frames.jsonl')
+
+
+def legacy_decode(message):
+    """Прежний разбор: json.loads на каждый кадр, затем разбор канала"""
+    data = json.loads(message.decode('utf-8'))
+    channel = data.get("channel")
+    if channel == "push.ticker":
+        payload = data.get("data") or {}
+        symbol_name = data.get("symbol") or payload.get("symbol")
+        p = payload.get("lastPrice")
+    elif channel == "push.deal":
+        deals = data.get("data")
+        if isinstance(deals, list) and deals:
+            last = deals[-1]
+        elif isinstance(deals, dict):
+            last = deals
+        else:
+            return None
+        symbol_name = data.get("symbol") or last.get("symbol") or last.get("s")
+        p = last.get("price") or last.get("p")
+    else:
+        return None
+    if p is None or symbol_name is None:
+        return None
+    return symbol_name, channel, float(p)
+
+
+def legacy_dispatch(message, handlers):
+    """Прежний on_message: разбор и вызов обработчика символа"""
+    tick = legacy_decode(message)
+    if tick is not None:
+        handler = handlers.get(tick[0])
+        if handler is not None:
+            handler(tick[1], tick[2])
+
+
+def load_frames():
+    with open(FRAMES_FILE, 'rb') as f:
+        return [line.rstrip(b'\r\n') for line in f if line.strip()]
+
+
+def symbols_of(frames):
+    symbols = set()
+    for frame in frames:
+        symbol_name = json.loads(frame).get("symbol")
+        if symbol_name:
+            symbols.add(symbol_name)
+    return symbols
+
+
+def timed(run, repeat, runs):
+    """Лучшее время repeat проходов run() из runs замеров"""
+    best = None
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                run()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+
+def bench_legacy(frames, symbols, repeat, runs):
+    """(цены, время decode, время dispatch) прежнего пути"""
+    ticks = []
+    handlers = {symbol_name: lambda channel, price: ticks.append(price) for symbol_name in symbols}
+
+    def decode_pass():
+        for frame in frames:
+            legacy_decode(frame)
+
+    def dispatch_pass():
+        del ticks[:]
+        for frame in frames:
+            legacy_dispatch(frame, handlers)
+
+    decode_time = timed(decode_pass, repeat, runs)
+    dispatch_time = timed(dispatch_pass, repeat, runs)
+    return list(ticks), decode_time, dispatch_time
+
+
+def bench_feed(frames, symbols, repeat, runs, decoder):
+    """(цены, время decode, время dispatch) MexcFeedManager с декодером decoder"""
+    ticks = []
+    manager = MexcFeedManager()
+    manager.decoder, manager.loads = get_decoder(decoder)
+    for symbol_name in symbols:
+        # Обработчик напрямую, без соединений: меряем только разбор и маршрутизацию
+        manager.handlers[symbol_name] = lambda channel, price: ticks.append(price)
+
+    def decode_pass():
+        for frame in frames:
+            manager.decode(frame)
+
+    def dispatch_pass():
+        del ticks[:]
+        # Повтор тех же кадров иначе отсекается как дубликаты
+        manager.tick_state.clear()
+        for frame in frames:
+            manager.dispatch(frame)
+
+    decode_time = timed(decode_pass, repeat, runs)
+    dispatch_time = timed(dispatch_pass, repeat, runs)
+    return list(ticks), decode_time, dispatch_time
+
+
+def decoder_version(name):
+    if name == 'json':
+        return platform.python_version()
+    return getattr(__import__(name), '__version__', '?')
+
+
+async def record(count, tokens):
+    """Записать count кадров живого фида (подписка на тикер и сделки токенов)"""
+    ws = await AsyncWebSocket.connect(MEXC_CONFIG['url'])
+    for token_name in tokens:
+        for channel in ('ticker', 'deal'):
+            await ws.send(json.dumps({"method": f"sub.{channel}", "param": {"symbol": mexc_symbol(token_name)}}))
+    frames = []
+    last_ping = time.monotonic()
+    while len(frames) < count:
+        frames.append(await ws.recv(raw=True))
+        if time.monotonic() - last_ping > MEXC_CONFIG['ping_interval']:
+            await ws.send(json.dumps({"method": "ping"}))
+            last_ping = time.monotonic()
+    await ws.close()
+    with open(FRAMES_FILE, 'wb') as f:
+        f.write(b''.join(frame + b'\n' for frame in frames))
+    print(f"Recorded {len(frames)} frames to {FRAMES_FILE}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MEXC frame decoding benchmark")
+    parser.add_argument('repeat', nargs='?', type=int, default=50)
+    parser.add_argument('--runs', type=int, default=5, help="timing runs, the best one is reported")
+    parser.add_argument('--record', type=int, metavar='FRAMES', help="record frames from the live feed")
+    parser.add_argument('tokens', nargs='*', default=['BTC', 'ETH', 'SOL'])
+    args = parser.parse_args()
+    if args.record:
+        asyncio.run(record(args.record, args.tokens))
+        return
+
+    frames = load_frames()
+    symbols = symbols_of(frames)
+    total = len(frames) * args.repeat
+    expected, legacy_decode_time, legacy_dispatch_time = bench_legacy(frames, symbols, args.repeat, args.runs)
+    results = [(decoder, bench_feed(frames, symbols, args.repeat, args.runs, decoder))
+               for decoder in available_decoders()]
+    print(f"Python {platform.python_version()} ({platform.python_implementation()}), "
+          f"decoders: {', '.join(f'{name} {decoder_version(name)}' for name, _ in results)}")
+    print(f"{len(frames)} frames, {len(symbols)} symbols, {len(expected)} price ticks, "
+          f"{args.repeat} passes, best of {args.runs}")
+    for stage, legacy_time, index in (('decode', legacy_decode_time, 1), ('dispatch', legacy_dispatch_time, 2)):
+        print(f"\n{stage:<24} {'frames/s':>12} {'us/frame':>10} {'speedup':>8}")
+        print(f"{'legacy json.loads':<24} {total / legacy_time:>12,.0f} {legacy_time / total * 1e6:>10.2f} {1:>8.2f}")
+        for decoder, result in results:
+            elapsed = result[index]
+            mark = '  MISMATCH' if index == 2 and result[0] != expected else ''
+            print(f"{decoder:<24} {total / elapsed:>12,.0f} {elapsed / total * 1e6:>10.2f} "
+                  f"{legacy_time / elapsed:>8.2f}{mark}")
+
+
+if __name__ == '__main__':
+    main()
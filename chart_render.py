@@ -0,0 +1,219 @@
+"""
+Отрисовка графика с блиттингом.
+Статичная часть фигуры (оси, сетка, подписи) рендерится один раз и кэшируется;
+на каждом кадре поверх кэша рисуются только изменяемые artist'ы (линии,
+метки цен, бейджи, текст спреда). Полная перерисовка - только при смене
+границ осей или явном canvas.draw() (стили, размер окна).
+ChartRenderScheduler - один таймер Tk на все окна графиков.
+"""
+
+import logging
+import sys
+import time
+
+from config import CHART_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+_user32 = None
+
+
+def _win_user32():
+    """user32 с прототипами для проверки перекрытия окна (только Windows)"""
+    global _user32
+    if _user32 is None:
+        import ctypes
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        user32.WindowFromPoint.argtypes = [wintypes.POINT]
+        user32.WindowFromPoint.restype = wintypes.HWND
+        user32.GetAncestor.argtypes = [wintypes.HWND, wintypes.UINT]
+        user32.GetAncestor.restype = wintypes.HWND
+        _user32 = (user32, wintypes.POINT)
+    return _user32
+
+
+def window_covered(widget):
+    """Окно виджета целиком перекрыто другими окнами.
+    Проверяются центр и четыре внутренние точки области виджета: какое окно
+    верхнего уровня под ними. Только Windows; на других системах - False"""
+    if sys.platform != 'win32':
+        return False
+    user32, point = _win_user32()
+    own = int(widget.winfo_toplevel().wm_frame(), 16)
+    x, y = widget.winfo_rootx(), widget.winfo_rooty()
+    w, h = widget.winfo_width(), widget.winfo_height()
+    for fx, fy in ((2, 2), (1, 1), (3, 1), (1, 3), (3, 3)):
+        hwnd = user32.WindowFromPoint(point(x + w * fx // 4, y + h * fy // 4))
+        if hwnd and user32.GetAncestor(hwnd, 2) == own:  # GA_ROOT
+            return False
+    return True
+
+
+class FrameSource:
+    """Интервал кадров графика под общим планировщиком (интерфейс как у таймера matplotlib)"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.running = True
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+
+class BlitAnimation:
+    """Замена FuncAnimation(blit=False): func(frame) обновляет данные artist'ов
+    и возвращает False, если видимых изменений нет; кадр выводится блиттингом.
+    event_source - как у FuncAnimation (интервал можно менять на лету): свой
+    таймер canvas или FrameSource, если кадры раздаёт ChartRenderScheduler."""
+
+    # Перерисовка без изменений не реже раза в секунду (линия растёт по времени)
+    IDLE_RENDER_INTERVAL = 1.0
+
+    def __init__(self, fig, func, artists, interval=100, scheduler=None):
+        self.fig = fig
+        self.canvas = fig.canvas
+        self.func = func
+        self.artists = list(artists)
+        self.frame = 0
+        self.background = None
+        self.views = None  # Границы осей, с которыми снят фон
+        self.last_step = 0.0
+        self.last_render = 0.0
+
+        for artist in self.artists:
+            artist.set_animated(True)
+        self.draw_cid = self.canvas.mpl_connect('draw_event', self.on_draw)
+
+        self.scheduler = scheduler
+        if scheduler is not None:
+            self.event_source = FrameSource(interval)
+            scheduler.add(self)
+        else:
+            self.event_source = self.canvas.new_timer(interval=interval)
+            self.event_source.add_callback(self.step)
+            self.event_source.start()
+
+    def _current_views(self):
+        return tuple(ax.viewLim.bounds for ax in self.fig.axes)
+
+    def on_draw(self, event):
+        """Полная перерисовка: снимаем новый фон и дорисовываем artist'ы"""
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.views = self._current_views()
+        self.last_render = time.monotonic()
+        self.draw_artists()
+
+    def visible(self):
+        """Окно графика показано: не свёрнуто, не скрыто и (на Windows) не
+        перекрыто целиком другими окнами. На других системах перекрытое окно
+        считается видимым - winfo_viewable перекрытие не определяет"""
+        widget = getattr(self.canvas, 'get_tk_widget', None)
+        if widget is None:
+            return True
+        try:
+            widget = widget()
+            if not widget.winfo_viewable():
+                return False
+        except Exception:
+            return False
+        try:
+            return not window_covered(widget)
+        except Exception as e:
+            logger.debug(f"Window occlusion check failed: {e}")
+            return True
+
+    def draw_artists(self):
+        for artist in self.artists:
+            if artist.get_visible():
+                self.fig.draw_artist(artist)
+
+    def step(self, render=True):
+        """Кадр: обновить данные; вывести, если что-то изменилось"""
+        self.last_step = time.monotonic()
+        try:
+            changed = self.func(self.frame)
+        except Exception as e:
+            logger.error(f"Chart frame error: {e}")
+            changed = True
+        self.frame += 1
+        if not render:
+            return
+        if changed is not False or self.last_step - self.last_render >= self.IDLE_RENDER_INTERVAL:
+            self.render()
+
+    def render(self):
+        """Вывести кадр: блиттинг, либо полная перерисовка, если сменились границы осей"""
+        if self.background is None or self.views != self._current_views():
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_artists()
+        self.canvas.blit(self.fig.bbox)
+        self.last_render = time.monotonic()
+
+    def stop(self):
+        self.event_source.stop()
+        if self.scheduler is not None:
+            self.scheduler.remove(self)
+        self.canvas.mpl_disconnect(self.draw_cid)
+        self.background = None
+
+
+class ChartRenderScheduler:
+    """Один таймер Tk на все окна графиков.
+
+    На каждом тике кадр получают графики, у которых подошёл их интервал;
+    свёрнутые, скрытые и перекрытые окна только обновляют данные, без отрисовки.
+    Если бюджет тика исчерпан, оставшиеся графики пропускают кадр и
+    получают его первыми на следующем тике.
+    """
+
+    def __init__(self, root, tick_ms=None, budget_ms=None):
+        self.root = root
+        self.tick_ms = tick_ms or CHART_CONFIG['render_tick_ms']
+        self.budget = (budget_ms or CHART_CONFIG['frame_budget_ms']) / 1000.0
+        self.animations = []
+        self.after_id = None
+        self.dropped = 0
+
+    def add(self, animation):
+        if animation not in self.animations:
+            self.animations.append(animation)
+        if self.after_id is None:
+            self.after_id = self.root.after(self.tick_ms, self.tick)
+
+    def remove(self, animation):
+        if animation in self.animations:
+            self.animations.remove(animation)
+
+    def tick(self):
+        self.after_id = None
+        started = time.monotonic()
+        due = [a for a in self.animations
+               if a.event_source.running and started - a.last_step >= a.event_source.interval / 1000.0]
+        # Дольше всех ждавшие - первыми
+        due.sort(key=lambda a: a.last_step)
+        for index, animation in enumerate(due):
+            if time.monotonic() - started > self.budget:
+                self.dropped += len(due) - index
+                break
+            try:
+                animation.step(render=animation.visible())
+            except Exception as e:
+                logger.error(f"Chart render error: {e}")
+        if self.animations:
+            self.after_id = self.root.after(self.tick_ms, self.tick)
+
+    def stop(self):
+        if self.after_id is not None:
+            try:
+                self.root.after_cancel(self.after_id)
+            except Exception:
+                pass
+            self.after_id = None
+        self.animations.clear()
@@ -0,0 +1,248 @@
+"""
+Данные окна графика.
+Заранее выделенные NumPy буферы с движущимся началом окна: добавление точки
+O(1) (амортизированно), линии получают срезы буферов без копирования.
+Время хранится числами дат matplotlib (float64, дни), чтобы set_data не
+конвертировал datetime. Минимум/максимум цен в окне поддерживаются
+монотонными очередями, границы по времени - первая и последняя точка.
+"""
+
+import collections
+import time
+
+import numpy as np
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def local_offset():
+    """Смещение местного времени от UTC в секундах (ось графика в местном времени)"""
+    return -(time.altzone if time.localtime().tm_isdst > 0 else time.timezone)
+
+
+def epoch_to_datenum(epoch):
+    """Unix время (число или массив) -> число дат matplotlib в местном времени"""
+    return (np.asarray(epoch, dtype=np.float64) + local_offset()) / SECONDS_PER_DAY
+
+
+def now_datenum():
+    return (time.time() + local_offset()) / SECONDS_PER_DAY
+
+
+class ChartSeries:
+    """Скользящее окно из window точек (time, cex, dex); NaN - нет цены"""
+
+    def __init__(self, window):
+        self.window = window
+        size = window * 2
+        self.times = np.empty(size, dtype=np.float64)
+        self.cex = np.full(size, np.nan)
+        self.dex = np.full(size, np.nan)
+        self.head = 0  # Индекс первой точки окна в буфере
+        self.end = 0  # Индекс за последней точкой
+        self.count = 0  # Всего добавлено точек (сквозной номер следующей)
+        # Монотонные очереди (номер точки, цена) для min/max по обеим линиям
+        self.min_queue = collections.deque()
+        self.max_queue = collections.deque()
+
+    def __len__(self):
+        return self.end - self.head
+
+    def _compact(self):
+        """Перенести окно в начало буфера (раз в window добавлений)"""
+        live = self.end - self.head
+        self.times[:live] = self.times[self.head:self.end]
+        self.cex[:live] = self.cex[self.head:self.end]
+        self.dex[:live] = self.dex[self.head:self.end]
+        self.head, self.end = 0, live
+
+    def _track(self, index, price):
+        if price != price:  # NaN
+            return
+        while self.min_queue and self.min_queue[-1][1] >= price:
+            self.min_queue.pop()
+        self.min_queue.append((index, price))
+        while self.max_queue and self.max_queue[-1][1] <= price:
+            self.max_queue.pop()
+        self.max_queue.append((index, price))
+
+    def append(self, timestamp, cex_price, dex_price):
+        if self.end == len(self.times):
+            self._compact()
+        i = self.end
+        self.times[i] = timestamp
+        self.cex[i] = cex_price
+        self.dex[i] = dex_price
+        self.end = i + 1
+        index = self.count
+        self.count += 1
+        if self.end - self.head > self.window:
+            self.head += 1
+
+        self._track(index, cex_price)
+        self._track(index, dex_price)
+        first = self.count - (self.end - self.head)
+        while self.min_queue and self.min_queue[0][0] < first:
+            self.min_queue.popleft()
+        while self.max_queue and self.max_queue[0][0] < first:
+            self.max_queue.popleft()
+
+    def extend(self, times, cex, dex):
+        """Загрузить пачку точек (история из мониторинга) векторно"""
+        added = len(times)
+        if added == 0:
+            return
+        head, end = self.head, self.end
+        times = np.concatenate((self.times[head:end], times))[-self.window:]
+        cex = np.concatenate((self.cex[head:end], cex))[-self.window:]
+        dex = np.concatenate((self.dex[head:end], dex))[-self.window:]
+        live = len(times)
+        self.times[:live] = times
+        self.cex[:live] = cex
+        self.dex[:live] = dex
+        self.head, self.end = 0, live
+        self.count += added
+        self._rebuild_queues()
+
+    def _rebuild_queues(self):
+        """Монотонные очереди для всего окна: точки, строго меньшие (большие)
+        всех последующих - то же, что дали бы последовательные append"""
+        self.min_queue.clear()
+        self.max_queue.clear()
+        live = self.end - self.head
+        if live == 0:
+            return
+        # Порядок как в append: CEX, затем DEX для каждой точки
+        prices = np.column_stack((self.cex[self.head:self.end], self.dex[self.head:self.end])).ravel()
+        indices = np.repeat(np.arange(self.count - live, self.count), 2)
+        known = ~np.isnan(prices)
+        prices, indices = prices[known], indices[known]
+        if len(prices) == 0:
+            return
+        suffix_min = np.append(np.minimum.accumulate(prices[::-1])[::-1][1:], np.inf)
+        suffix_max = np.append(np.maximum.accumulate(prices[::-1])[::-1][1:], -np.inf)
+        keep_min = prices < suffix_min
+        keep_max = prices > suffix_max
+        self.min_queue.extend(zip(indices[keep_min].tolist(), prices[keep_min].tolist()))
+        self.max_queue.extend(zip(indices[keep_max].tolist(), prices[keep_max].tolist()))
+
+    def first_index(self):
+        """Сквозной номер первой точки окна"""
+        return self.count - (self.end - self.head)
+
+    def views(self):
+        """(times, cex, dex) - срезы буферов без копирования"""
+        head, end = self.head, self.end
+        return self.times[head:end], self.cex[head:end], self.dex[head:end]
+
+    def last(self):
+        """Последние (cex, dex) или (NaN, NaN)"""
+        if self.end == self.head:
+            return np.nan, np.nan
+        return self.cex[self.end - 1], self.dex[self.end - 1]
+
+    def time_bounds(self):
+        """(первое, последнее) время окна за O(1) или None"""
+        if self.end == self.head:
+            return None
+        return self.times[self.head], self.times[self.end - 1]
+
+    def price_bounds(self):
+        """(min, max) цен обеих линий в окне за O(1) или None"""
+        if not self.min_queue:
+            return None
+        return self.min_queue[0][1], self.max_queue[0][1]
+
+    def clear(self):
+        self.head = self.end = 0
+        self.count = 0
+        self.min_queue.clear()
+        self.max_queue.clear()
+
+
+def _minmax_buckets(times, values, k):
+    """Точки минимума и максимума в каждом блоке из k значений (в порядке времени).
+    len(times) кратно k; блок без цен даёт NaN (разрыв линии)"""
+    rows = len(times) // k
+    block = values.reshape(rows, k)
+    low = np.where(np.isnan(block), np.inf, block).argmin(axis=1)
+    high = np.where(np.isnan(block), -np.inf, block).argmax(axis=1)
+    first = np.minimum(low, high)
+    second = np.maximum(low, high)
+    base = np.arange(rows) * k
+    picks = np.column_stack((base + first, base + second)).ravel()
+    return times[picks], values[picks]
+
+
+class MinMaxDecimator:
+    """Прореживание окна графика до ~2 точек на пиксель (min/max по блокам).
+
+    Размер блока - степень двойки, блоки выровнены по сквозному номеру точки,
+    поэтому при новых точках пересчитывается только незавершённый блок,
+    а при зуме/панорамировании - только если сменился размер блока или
+    видимый диапазон ушёл за кэш.
+    """
+
+    def __init__(self, max_points):
+        self.max_points = max_points
+        self.reset()
+
+    def reset(self):
+        self.k = 0
+        self.first_block = 0  # Номер первого блока в кэше
+        self.blocks = 0  # Сколько завершённых блоков в кэше
+        self.cache = None  # (times_cex, cex, times_dex, dex) - по 2 точки на блок
+
+    def _decimate(self, series, first_block, last_block):
+        """Прореженные точки блоков [first_block, last_block)"""
+        k = self.k
+        start = first_block * k - series.first_index() + series.head
+        stop = last_block * k - series.first_index() + series.head
+        times = series.times[start:stop]
+        cex_t, cex = _minmax_buckets(times, series.cex[start:stop], k)
+        dex_t, dex = _minmax_buckets(times, series.dex[start:stop], k)
+        return cex_t, cex, dex_t, dex
+
+    def update(self, series, x0, x1, pixels):
+        """Данные линий для видимого диапазона [x0, x1]: (times_cex, cex, times_dex, dex)"""
+        times, cex, dex = series.views()
+        lo = max(int(np.searchsorted(times, x0, side='left')) - 1, 0)
+        hi = min(int(np.searchsorted(times, x1, side='right')) + 1, len(times))
+        buckets = max(min(int(pixels), self.max_points // 2), 1)
+        if hi - lo <= 2 * buckets:
+            # Точек меньше, чем пикселей - рисуем как есть
+            self.reset()
+            return times[lo:hi], cex[lo:hi], times[lo:hi], dex[lo:hi]
+
+        k = 1 << int(np.ceil(np.log2((hi - lo) / buckets)))
+        first = series.first_index()
+        # Блоки, целиком лежащие в окне и задевающие видимый диапазон
+        first_block = -(-(first + lo) // k)
+        last_block = (first + hi) // k
+        if last_block <= first_block:
+            return times[lo:hi], cex[lo:hi], times[lo:hi], dex[lo:hi]
+
+        cached_end = self.first_block + self.blocks
+        if (k != self.k or self.cache is None or first_block < self.first_block
+                or first_block > cached_end):
+            self.k = k
+            self.cache = self._decimate(series, first_block, last_block)
+            self.first_block, self.blocks = first_block, last_block - first_block
+        else:
+            parts = self.cache
+            if last_block > cached_end:
+                new = self._decimate(series, cached_end, last_block)
+                parts = tuple(np.concatenate((old, add)) for old, add in zip(parts, new))
+            drop = 2 * (first_block - self.first_block)
+            keep = 2 * (last_block - first_block)
+            self.cache = tuple(part[drop:drop + keep] for part in parts)
+            self.first_block, self.blocks = first_block, last_block - first_block
+
+        # Края диапазона вне полных блоков добавляем как есть
+        head_stop = first_block * k - first
+        tail_start = last_block * k - first
+        cex_t, cex_v, dex_t, dex_v = self.cache
+        return (np.concatenate((times[lo:head_stop], cex_t, times[tail_start:hi])),
+                np.concatenate((cex[lo:head_stop], cex_v, cex[tail_start:hi])),
+                np.concatenate((times[lo:head_stop], dex_t, times[tail_start:hi])),
+                np.concatenate((dex[lo:head_stop], dex_v, dex[tail_start:hi])))
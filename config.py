@@ -31,10 +31,18 @@ LOGGING_CONFIG = {
 
 # Настройки графиков
 CHART_CONFIG = {
-    'max_data_points': 1000,  # Максимум точек на графике
+    'max_data_points': 4000,  # Максимум точек на линии графика (после прореживания)
+    'history_points': 100000,  # Точек истории в окне графика
+    'history_seconds': 4 * 60 * 60,  # Сколько истории загружать из архива при открытии
     'memory_cleanup_interval': 60,  # Интервал очистки памяти (секунды)
     'cleanup_threshold': 50,  # Количество точек для периодической очистки
     'animation_interval': 1000,  # Интервал анимации (миллисекунды)
+    'render_tick_ms': 16,  # Тик общего таймера отрисовки графиков (миллисекунды)
+    'frame_budget_ms': 12,  # Бюджет отрисовки графиков за один тик, меньше render_tick_ms (миллисекунды)
+    'dex_poll_interval': 1.0,  # Опрос DEX окном графика без мониторинга (секунды)
+    'window_pool_size': 2,  # Заранее построенных скрытых окон графиков
+    'window_pool_refill_delay': 1000,  # Пауза перед достройкой пула (миллисекунды)
+    'startup_profile_timeout': 15000,  # Отчёт --profile-startup, если первой строки таблицы нет (миллисекунды)
     'default_figure_size': (6, 4),
     'theme': 'dark_background'
 }
@@ -46,8 +54,15 @@ WEBSOCKET_CONFIG = {
     'ping_interval': 30,  # Интервал ping (секунды)
     'connection_timeout': 10,  # Таймаут подключения (секунды)
     'mexc': {
-        'url': 'wss://contract.mexc.com/ws',
-        'ping_message': 'ping'
+        'url': 'wss://contract.mexc.com/edge',
+        'ping_message': 'ping',
+        'ping_interval': 10,  # Интервал ping для MEXC (секунды)
+        'max_connections': 4,  # Максимум общих соединений на все токены
+        'symbols_per_connection': 50,  # Токенов на соединение до открытия следующего
+        'stale_timeout': 30,  # Соединение без единого кадра (даже pong) считается зависшим (секунды)
+        'gap_timeout': 15,  # Соединение без тиков цен дольше - его символы догружаются через REST (секунды)
+        'rest_ticker_url': 'https://contract.mexc.com/api/v1/contract/ticker',
+        'json_decoder': 'auto'  # auto | orjson | ujson | json
     }
 }
 
@@ -56,9 +71,17 @@ API_CONFIG = {
     'timeout': 10,  # Таймаут запросов (секунды)
     'max_retries': 3,
     'retry_delay': 1,  # Задержка между попытками (секунды)
+    'dex_workers': 16,  # Потоков для параллельной загрузки DEX цен
+    'per_host_connections': 8,  # Одновременных keep-alive соединений на хост
     'okx': {
-        'base_url': 'https://www.okx.com',
-        'price_endpoint': '/api/v5/market/ticker'
+        'base_url': 'https://web3.okx.com',
+        'price_endpoint': '/api/v5/dex/market/price',
+        'batch_size': 20,  # Токенов в одном запросе цен
+        # Ключи OKX Web3 API; без них используется парсинг HTML страницы токена
+        'api_key': os.environ.get('OKX_API_KEY', ''),
+        'secret_key': os.environ.get('OKX_SECRET_KEY', ''),
+        'passphrase': os.environ.get('OKX_API_PASSPHRASE', ''),
+        'project_id': os.environ.get('OKX_PROJECT_ID', '')
     }
 }
 
@@ -68,7 +91,13 @@ MONITORING_CONFIG = {
     'default_monitor_interval': 2.0,  # Интервал мониторинга (секунды)
     'auto_open_charts': True,
     'disable_alerts': False,
-    'max_concurrent_charts': 10  # Максимум одновременных графиков
+    'max_concurrent_charts': 10,  # Максимум одновременных графиков
+    'dex_requests_per_second': 5.0,  # Общий лимит запросов к DEX
+    'dex_min_interval_factor': 0.25,  # Множитель интервала для спреда у порога
+    'dex_max_interval_factor': 4.0,  # Множитель интервала для спреда около нуля
+    'dex_poll_jitter': 0.2,  # Случайный разброс интервала (доля)
+    'history_duration': 15 * 60,  # Глубина истории цен токена (секунды)
+    'history_capacity': 20000  # Максимум точек истории на токен
 }
 
 # Настройки GUI
@@ -94,7 +123,10 @@ FILES_CONFIG = {
     'settings_file': 'chart_settings.json',
     'backup_dir': 'backups',
     'auto_backup': True,
-    'backup_interval': 3600  # Интервал резервного копирования (секунды)
+    'backup_interval': 3600,  # Интервал резервного копирования (секунды)
+    'tick_archive_dir': 'ticks',  # Архив тиков: ticks/{TOKEN}/{YYYYMMDD}.bin
+    'tick_archive_flush_interval': 2.0,  # Период записи и fsync архива (секунды)
+    'tick_archive_retention_days': 30  # Сколько дней хранить архив
 }
 
 # Настройки безопасности
@@ -112,43 +144,50 @@ SUPPORTED_CHAINS = {
         'name': 'Ethereum',
         'symbol': 'ETH',
         'address_pattern': r'^0x[a-fA-F0-9]{40}$',
-        'explorer': 'https://etherscan.io/token/'
+        'explorer': 'https://etherscan.io/token/',
+        'okx_chain_index': '1'
     },
     'bsc': {
         'name': 'Binance Smart Chain',
         'symbol': 'BNB',
         'address_pattern': r'^0x[a-fA-F0-9]{40}$',
-        'explorer': 'https://bscscan.com/token/'
+        'explorer': 'https://bscscan.com/token/',
+        'okx_chain_index': '56'
     },
     'solana': {
         'name': 'Solana',
         'symbol': 'SOL',
         'address_pattern': r'^[1-9A-HJ-NP-Za-km-z]{32,44}$',
-        'explorer': 'https://solscan.io/token/'
+        'explorer': 'https://solscan.io/token/',
+        'okx_chain_index': '501'
     },
     'polygon': {
         'name': 'Polygon',
         'symbol': 'MATIC',
         'address_pattern': r'^0x[a-fA-F0-9]{40}$',
-        'explorer': 'https://polygonscan.com/token/'
+        'explorer': 'https://polygonscan.com/token/',
+        'okx_chain_index': '137'
     },
     'arbitrum': {
         'name': 'Arbitrum',
         'symbol': 'ARB',
         'address_pattern': r'^0x[a-fA-F0-9]{40}$',
-        'explorer': 'https://arbiscan.io/token/'
+        'explorer': 'https://arbiscan.io/token/',
+        'okx_chain_index': '42161'
     },
     'base': {
         'name': 'Base',
         'symbol': 'BASE',
         'address_pattern': r'^0x[a-fA-F0-9]{40}$',
-        'explorer': 'https://basescan.org/token/'
+        'explorer': 'https://basescan.org/token/',
+        'okx_chain_index': '8453'
     },
     'optimism': {
         'name': 'Optimism',
         'symbol': 'OP',
         'address_pattern': r'^0x[a-fA-F0-9]{40}$',
-        'explorer': 'https://optimistic.etherscan.io/token/'
+        'explorer': 'https://optimistic.etherscan.io/token/',
+        'okx_chain_index': '10'
     }
 }
 
@@ -0,0 +1,85 @@
+"""
+Движок параллельной загрузки DEX цен.
+Пул потоков + keep-alive сессии requests на каждый хост с ограничением
+одновременных запросов к хосту и таймаутом на каждый запрос.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from config import API_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class DexFetchEngine:
+    """Пул воркеров и пул соединений для HTTP запросов к DEX"""
+
+    def __init__(self, max_workers=None, per_host_limit=None, timeout=None):
+        self.max_workers = max_workers or API_CONFIG['dex_workers']
+        self.per_host_limit = per_host_limit or API_CONFIG['per_host_connections']
+        self.timeout = timeout or API_CONFIG['timeout']
+
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='dex-fetch')
+        self.lock = threading.Lock()
+        self.sessions = {}  # {host: requests.Session}
+        self.host_slots = {}  # {host: BoundedSemaphore}
+
+    def _host_state(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            session = self.sessions.get(host)
+            if session is None:
+                # requests импортируется при первом запросе (в потоке воркера),
+                # а не при запуске приложения
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host_limit)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self.sessions[host] = session
+                self.host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return session, self.host_slots[host]
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        """GET через keep-alive сессию хоста (блокирующий, вызывается из воркеров)"""
+        session, slots = self._host_state(url)
+        with slots:
+            return session.get(url, headers=headers, timeout=timeout or self.timeout, **kwargs)
+
+    def post(self, url, json=None, headers=None, timeout=None, **kwargs):
+        session, slots = self._host_state(url)
+        with slots:
+            return session.post(url, json=json, headers=headers, timeout=timeout or self.timeout, **kwargs)
+
+    def submit(self, fn, *args, callback=None, **kwargs):
+        """Выполнить fn в пуле; callback(future) вызывается по завершении"""
+        future = self.executor.submit(fn, *args, **kwargs)
+        if callback is not None:
+            future.add_done_callback(callback)
+        return future
+
+    def close(self):
+        """Закрыть пул и сессии; запросы из очереди отменяются, в полёте - не ждём"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        with self.lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions.clear()
+            self.host_slots.clear()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_fetch_engine():
+    """Общий движок для фонового мониторинга и окон графиков"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = DexFetchEngine()
+        return _engine
@@ -0,0 +1,296 @@
+"""
+Источники DEX цен.
+DexPriceProvider - общий интерфейс; OkxDexApiProvider запрашивает цены
+пачками через JSON API OKX DEX, OkxHtmlProvider ищет цену в HTML странице токена
+web3.okx.com (FastPriceExtractor) и используется как запасной вариант.
+"""
+
+import abc
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import re
+import threading
+from datetime import datetime, timezone
+
+from config import API_CONFIG, SUPPORTED_CHAINS
+from dex_fetcher import get_fetch_engine
+
+logger = logging.getLogger(__name__)
+
+# Синонимы сетей из tokens.json
+CHAIN_ALIASES = {
+    'ethereum': 'ethereum', 'eth': 'ethereum', 'erc20': 'ethereum',
+    'bsc': 'bsc', 'bep20': 'bsc', 'binance-smart-chain': 'bsc',
+    'sol': 'solana', 'solana': 'solana',
+    'base': 'base',
+    'arbitrum': 'arbitrum', 'arbitrum_one': 'arbitrum', 'arbitrum one': 'arbitrum',
+    'polygon': 'polygon', 'matic': 'polygon',
+    'optimism': 'optimism', 'op': 'optimism'
+}
+
+
+def normalize_chain(token_address, chain_hint=None):
+    """Определить сеть по подсказке из tokens.json или по виду адреса"""
+    chain = None
+    if chain_hint:
+        chain = CHAIN_ALIASES.get(chain_hint.strip().lower())
+    if chain is None:
+        # эвристика по адресу; по умолчанию для EVM ставим bsc
+        chain = 'solana' if len(token_address) == 44 else 'bsc'
+    return chain
+
+
+class DexPriceProvider(abc.ABC):
+    """Интерфейс источника цен: items - список пар (chain, address)"""
+
+    name = 'base'
+    batch_size = 1
+
+    def available(self):
+        return True
+
+    @abc.abstractmethod
+    def get_price(self, chain, token_address):
+        """Цена одного токена или None"""
+
+    def get_prices(self, items):
+        """Вернуть {(chain, address): price} для найденных цен"""
+        prices = {}
+        for chain, token_address in items:
+            price = self.get_price(chain, token_address)
+            if price is not None:
+                prices[(chain, token_address)] = price
+        return prices
+
+
+class OkxDexApiProvider(DexPriceProvider):
+    """JSON API OKX DEX (API_CONFIG['okx']) с пакетными запросами"""
+
+    name = 'okx_api'
+
+    def __init__(self):
+        self.config = API_CONFIG['okx']
+        self.batch_size = self.config['batch_size']
+        self.url = self.config['base_url'] + self.config['price_endpoint']
+
+    def available(self):
+        # Эндпоинт требует ключ API OKX
+        return bool(self.config.get('api_key'))
+
+    def _headers(self, body):
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+        prehash = f"{timestamp}POST{self.config['price_endpoint']}{body}"
+        signature = hmac.new(self.config['secret_key'].encode(), prehash.encode(), hashlib.sha256).digest()
+        return {
+            'Content-Type': 'application/json',
+            'OK-ACCESS-KEY': self.config['api_key'],
+            'OK-ACCESS-SIGN': base64.b64encode(signature).decode(),
+            'OK-ACCESS-TIMESTAMP': timestamp,
+            'OK-ACCESS-PASSPHRASE': self.config['passphrase'],
+            'OK-ACCESS-PROJECT': self.config.get('project_id', '')
+        }
+
+    def get_price(self, chain, token_address):
+        return self.get_prices([(chain, token_address)]).get((chain, token_address))
+
+    def get_prices(self, items):
+        request_items = []
+        by_key = {}
+        for chain, token_address in items:
+            chain_index = SUPPORTED_CHAINS.get(chain, {}).get('okx_chain_index')
+            if chain_index is None:
+                continue
+            request_items.append({'chainIndex': chain_index, 'tokenContractAddress': token_address})
+            by_key[(chain_index, token_address.lower())] = (chain, token_address)
+        if not request_items:
+            return {}
+
+        body = json.dumps(request_items, separators=(',', ':'))
+        try:
+            response = get_fetch_engine().post(self.url, data=body, headers=self._headers(body))
+            payload = response.json()
+        except Exception as e:
+            logger.error(f"OKX DEX API error: {e}")
+            return {}
+        if payload.get('code') != '0':
+            logger.warning(f"OKX DEX API returned {payload.get('code')}: {payload.get('msg')}")
+            return {}
+
+        prices = {}
+        for row in payload.get('data') or []:
+            key = by_key.get((str(row.get('chainIndex')), str(row.get('tokenContractAddress', '')).lower()))
+            try:
+                price = float(row.get('price'))
+            except (TypeError, ValueError):
+                continue
+            if key is not None and price > 0:
+                prices[key] = price
+        return prices
+
+
+def _parse_number(raw):
+    """'1,234.5' -> 1234.5, '0,0123' -> 0.0123"""
+    if b',' in raw and b'.' in raw:
+        raw = raw.replace(b',', b'')
+    else:
+        raw = raw.replace(b',', b'.')
+    return float(raw)
+
+
+class FastPriceExtractor:
+    """Поиск цены в сыром HTML без построения DOM.
+    Стратегии проверяются по порядку до первого попадания; сработавшая
+    привязанная к разметке стратегия запоминается для сети и в следующий раз
+    проверяется первой."""
+
+    # Элементы цены (как селекторы .token-price, .price-value, ... в старом парсере)
+    SELECTOR_RE = re.compile(
+        rb'(?:class="(?:[^"]*\s)?(?:token-price|price-value|token-price-value|price|token-info-price|price-display)(?:\s[^"]*)?"'
+        rb'|data-testid="token-price")[^>]*>(?:\s*(?:<[^>]+>|\$))*\s*(\d[\d,]*\.?\d*)')
+    TITLE_RE = re.compile(rb'<title[^>]*>[^<]*?\$(\d[\d,.]*)')
+    TEXT_RES = [
+        re.compile(rb'\$?(\d{1,3}(?:,\d{3})*(?:\.\d+)?)'),
+        re.compile(rb'(\d+\.\d+)'),
+        re.compile(rb'(\d+,\d+)')
+    ]
+
+    def __init__(self):
+        self.strategies = {
+            'selector': self.find_selector,
+            'title': self.find_title,
+            'text': self.find_text
+        }
+        self.order = ['selector', 'title', 'text']
+        self.preferred = {}  # {chain: имя стратегии}
+
+    @staticmethod
+    def find_selector(content):
+        for match in FastPriceExtractor.SELECTOR_RE.finditer(content):
+            try:
+                price = _parse_number(match.group(1))
+            except ValueError:
+                continue
+            if price > 0:
+                return price
+        return None
+
+    @staticmethod
+    def find_title(content):
+        match = FastPriceExtractor.TITLE_RE.search(content)
+        if match:
+            try:
+                return _parse_number(match.group(1).rstrip(b'.,'))
+            except ValueError:
+                return None
+        return None
+
+    @staticmethod
+    def find_text(content):
+        for pattern in FastPriceExtractor.TEXT_RES:
+            for match in pattern.finditer(content):
+                try:
+                    price = float(match.group(1).replace(b',', b''))
+                except ValueError:
+                    continue
+                if 0.000001 < price < 1000000:  # Разумный диапазон цен
+                    return price
+        return None
+
+    def extract(self, content, chain=None):
+        """Вернуть (цена, стратегия) или (None, None)"""
+        preferred = self.preferred.get(chain)
+        order = self.order if preferred is None else [preferred] + [n for n in self.order if n != preferred]
+        for name in order:
+            price = self.strategies[name](content)
+            if price is not None:
+                # Поиск по всему тексту не запоминаем - он срабатывает почти всегда
+                if preferred != name and name != 'text':
+                    self.preferred[chain] = name
+                return price, name
+        return None, None
+
+
+class OkxHtmlProvider(DexPriceProvider):
+    """Парсинг страницы токена web3.okx.com (запасной вариант)"""
+
+    name = 'okx_html'
+
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'ru-RU,ru;q=0.8,en-US;q=0.5,en;q=0.3',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1'
+    }
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.extractor = FastPriceExtractor()
+
+    def get_price(self, chain, token_address):
+        try:
+            okx_url = f"https://web3.okx.com/ru/token/{chain}/{token_address}"
+            response = get_fetch_engine().get(okx_url, headers=self.headers, timeout=self.timeout)
+            if response.status_code != 200 or not response.content:
+                logger.warning(f"OKX request failed: {response.status_code}")
+                return None
+            price, strategy = self.extractor.extract(response.content, chain)
+            if price is None:
+                logger.warning(f"Could not find price on OKX page for {chain}")
+                return None
+            logger.debug(f"OKX Price ({chain.upper()}) from {strategy}: {price}")
+            return price
+        except Exception as e:
+            logger.error(f"OKX price fetch error for {token_address}: {e}")
+            return None
+
+
+class DexPriceSource:
+    """Цепочка провайдеров: каждый следующий получает токены, не найденные предыдущим"""
+
+    def __init__(self, providers):
+        self.providers = providers
+
+    def batch_size(self):
+        active = [p for p in self.providers if p.available()]
+        return active[0].batch_size if active else 1
+
+    def get_prices(self, items, throttle=None):
+        """{(chain, address): price} для найденных цен. Каждая пачка провайдера -
+        один HTTP запрос; throttle() вызывается перед каждым запросом, кроме
+        первого (его оплатил вызывающий), и может ждать бюджет запросов.
+        throttle() вернул False - остальные запросы не делаем"""
+        prices = {}
+        remaining = list(dict.fromkeys(items))
+        first = True
+        for provider in self.providers:
+            if not remaining or not provider.available():
+                continue
+            for i in range(0, len(remaining), provider.batch_size):
+                if not first and throttle is not None and not throttle():
+                    return prices
+                first = False
+                prices.update(provider.get_prices(remaining[i:i + provider.batch_size]))
+            remaining = [item for item in remaining if item not in prices]
+        return prices
+
+    def get_price(self, token_address, chain_hint=None):
+        item = (normalize_chain(token_address, chain_hint), token_address)
+        return self.get_prices([item]).get(item)
+
+
+_source = None
+_source_lock = threading.Lock()
+
+
+def get_price_source():
+    """Общий источник DEX цен: JSON API, затем HTML страница"""
+    global _source
+    with _source_lock:
+        if _source is None:
+            _source = DexPriceSource([OkxDexApiProvider(), OkxHtmlProvider()])
+        return _source
@@ -0,0 +1,148 @@
+"""
+Планировщик опроса DEX цен.
+Каждый токен опрашивается со своим интервалом: токены со спредом около порога
+чаще, спокойные реже. Общий бюджет запросов в секунду и джиттер не дают
+запросам выстраиваться в одну линию и перегружать OKX.
+"""
+
+import heapq
+import logging
+import random
+import threading
+import time
+
+from config import MONITORING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class DexPollScheduler:
+    """Очередь опроса токенов по времени с адаптивным интервалом и лимитом запросов"""
+
+    def __init__(self, base_interval=None, requests_per_second=None):
+        self.base_interval = base_interval or MONITORING_CONFIG['default_monitor_interval']
+        self.requests_per_second = requests_per_second or MONITORING_CONFIG['dex_requests_per_second']
+        self.min_factor = MONITORING_CONFIG['dex_min_interval_factor']
+        self.max_factor = MONITORING_CONFIG['dex_max_interval_factor']
+        self.jitter = MONITORING_CONFIG['dex_poll_jitter']
+
+        self.cond = threading.Condition()
+        self.running = True
+        self.heap = []  # [(due, seq, token_name)]
+        self.due = {}  # {token_name: due} - актуальные записи кучи
+        self.tokens = {}  # {token_name: token}
+        self.seq = 0
+
+        # Token bucket для глобального лимита запросов
+        self.budget = 1.0
+        self.budget_time = time.monotonic()
+
+    def _push(self, token_name, due):
+        self.seq += 1
+        self.due[token_name] = due
+        heapq.heappush(self.heap, (due, self.seq, token_name))
+
+    def sync(self, tokens_data):
+        """Привести набор токенов к tokens_data; новые токены разносятся по первому интервалу"""
+        now = time.monotonic()
+        with self.cond:
+            names = set()
+            for token in tokens_data:
+                token_name = token['name']
+                names.add(token_name)
+                is_new = token_name not in self.tokens
+                self.tokens[token_name] = token
+                if is_new:
+                    self._push(token_name, now + random.uniform(0, self.base_interval))
+            for token_name in list(self.tokens):
+                if token_name not in names:
+                    del self.tokens[token_name]
+                    self.due.pop(token_name, None)
+            self.cond.notify_all()
+
+    def set_interval(self, base_interval):
+        with self.cond:
+            self.base_interval = base_interval
+            self.cond.notify_all()
+
+    def interval_for(self, spread=None, threshold=None):
+        """Интервал опроса: от min_factor (спред у порога) до max_factor (спред около нуля)"""
+        if spread is None or not threshold:
+            factor = 1.0
+        else:
+            closeness = min(abs(spread) / threshold, 1.0)
+            factor = self.max_factor - (self.max_factor - self.min_factor) * closeness
+        interval = self.base_interval * factor
+        return interval * random.uniform(1.0 - self.jitter, 1.0 + self.jitter)
+
+    def reschedule(self, token_name, spread=None, threshold=None):
+        """Поставить токен в очередь после опроса"""
+        interval = self.interval_for(spread, threshold)
+        with self.cond:
+            if token_name in self.tokens and token_name not in self.due:
+                self._push(token_name, time.monotonic() + interval)
+                self.cond.notify_all()
+
+    def _take_budget(self, now):
+        """Вернуть 0, если запрос разрешён, иначе сколько ждать"""
+        rate = self.requests_per_second
+        self.budget = min(max(rate, 1.0), self.budget + (now - self.budget_time) * rate)
+        self.budget_time = now
+        if self.budget >= 1.0:
+            self.budget -= 1.0
+            return 0
+        return (1.0 - self.budget) / rate
+
+    def _poll(self, now):
+        """(токен, 0), если пора опрашивать, иначе (None, сколько ждать или None); под cond"""
+        # Выбрасываем устаревшие записи кучи
+        while self.heap and self.due.get(self.heap[0][2]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+        if self.heap and self.heap[0][0] <= now:
+            wait = self._take_budget(now)
+            if wait == 0:
+                _, _, token_name = heapq.heappop(self.heap)
+                del self.due[token_name]
+                return self.tokens[token_name], 0
+            return None, wait
+        if self.heap:
+            return None, self.heap[0][0] - now
+        return None, None
+
+    def poll(self):
+        """Токен к опросу без ожидания: (token, 0) или (None, секунд до следующего)"""
+        with self.cond:
+            if not self.running:
+                return None, None
+            return self._poll(time.monotonic())
+
+    def take_due(self, limit):
+        """Забрать до limit уже подошедших токенов без ожидания (для пакетного запроса)"""
+        batch = []
+        now = time.monotonic()
+        with self.cond:
+            while self.heap and len(batch) < limit and self.heap[0][0] <= now:
+                due, _, token_name = heapq.heappop(self.heap)
+                if self.due.get(token_name) != due:
+                    continue
+                del self.due[token_name]
+                batch.append(self.tokens[token_name])
+        return batch
+
+    def acquire(self):
+        """Дождаться и списать один запрос из общего бюджета (в потоке пула):
+        так оплачиваются дополнительные запросы пачки, например запасной
+        провайдер для не найденных токенов. False - планировщик остановлен"""
+        with self.cond:
+            while self.running:
+                wait = self._take_budget(time.monotonic())
+                if wait == 0:
+                    return True
+                self.cond.wait(wait)
+            return False
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.cond.notify_all()
@@ -0,0 +1,8 @@
+"""
+Движок мониторинга спредов без GUI.
+Импортируется и из окна приложения, и из консоли: python -m engine
+"""
+
+from engine.monitor import BackgroundMonitor
+
+__all__ = ['BackgroundMonitor']
@@ -0,0 +1,141 @@
+"""
+Консольный запуск мониторинга без GUI (Tk и matplotlib не загружаются).
+
+    python -m engine --threshold 3 --output spreads.jsonl --format jsonl
+    python -m engine --shard 0/4   # процесс на ядро: каждый 4-й токен, начиная с 0-го
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+
+from engine.monitor import BackgroundMonitor
+
+logger = logging.getLogger(__name__)
+
+
+def parse_shard(value):
+    """'i/n' -> (i, n)"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError("shard must look like INDEX/COUNT, e.g. 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError("shard index must be in [0, COUNT)")
+    return index, count
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m engine',
+                                     description="Headless CEX/DEX spread monitoring")
+    parser.add_argument('--tokens', default='tokens.json', help="tokens file (default: tokens.json)")
+    parser.add_argument('--threshold', type=float, default=5.0, help="alert spread threshold, %%")
+    parser.add_argument('--interval', type=float, default=2.0, help="base DEX poll interval, seconds")
+    parser.add_argument('--every', type=float, default=1.0, help="how often to print spreads, seconds")
+    parser.add_argument('--output', help="append to this file instead of stdout")
+    parser.add_argument('--format', choices=('text', 'jsonl'), default='text')
+    parser.add_argument('--alerts-only', action='store_true', help="print only high spread alerts")
+    parser.add_argument('--shard', type=parse_shard, help="monitor every COUNT-th token starting at INDEX")
+    parser.add_argument('--duration', type=float, help="stop after this many seconds")
+    parser.add_argument('--log-level', default='WARNING')
+    return parser.parse_args(argv)
+
+
+def spread_percent(cex_price, dex_price):
+    if not cex_price or dex_price is None:
+        return None
+    return (dex_price - cex_price) / cex_price * 100
+
+
+def format_record(fmt, record):
+    """Строка вывода для записи {'type', 'time', 'token', 'cex', 'dex', 'spread'}"""
+    if fmt == 'jsonl':
+        return json.dumps(record, ensure_ascii=False)
+    stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['time']))
+    spread = record['spread']
+    spread_text = f"{spread:+.2f}%" if spread is not None else "n/a"
+    label = 'ALERT ' if record['type'] == 'alert' else ''
+    return f"{stamp} {label}{record['token']} cex={record['cex']} dex={record['dex']} spread={spread_text}"
+
+
+def collect(monitor, seen, alerts_only, since=0.0):
+    """Записи за период: алерты мониторинга и изменившиеся спреды.
+    Цены старше since (прогрев из архива до запуска) не выводятся; время
+    записи - время последней из двух цен, а не момент вывода"""
+    now = time.time()
+    records = []
+    for message in monitor.gui_queue.drain():
+        if message.get('type') != 'high_spread':
+            continue
+        token = message['token']
+        records.append({
+            'type': 'alert',
+            'time': message.get('timestamp', now),
+            'token': token['name'] if isinstance(token, dict) else token,
+            'cex': message.get('cex_price'),
+            'dex': message.get('dex_price'),
+            'spread': message.get('spread')
+        })
+    if alerts_only:
+        return records
+    for token_name, (cex_price, dex_price) in sorted(monitor.price_channel.changed(seen).items()):
+        spread = spread_percent(cex_price, dex_price)
+        if spread is None:
+            continue
+        token_prices = monitor.price_data.get(token_name, {})
+        cex_time = token_prices.get('cex_time', 0.0)
+        dex_time = token_prices.get('dex_time', 0.0)
+        if min(cex_time, dex_time) < since:
+            continue
+        records.append({
+            'type': 'spread',
+            'time': max(cex_time, dex_time),
+            'token': token_name,
+            'cex': cex_price,
+            'dex': dex_price,
+            'spread': spread
+        })
+    return records
+
+
+def run(args):
+    started = time.time()
+    monitor = BackgroundMonitor()
+    monitor.tokens_file = args.tokens
+    monitor.shard = args.shard
+    monitor.update_settings(spread_threshold=args.threshold, monitor_interval=args.interval)
+    monitor.start_monitoring()
+    if not monitor.running:
+        logger.error("Monitoring did not start (no tokens?)")
+        return 1
+
+    output = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    deadline = time.monotonic() + args.duration if args.duration else None
+    seen = {}  # {token_name: версия цены, уже выведенная}
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            time.sleep(args.every)
+            records = collect(monitor, seen, args.alerts_only, since=started)
+            if records:
+                output.write(''.join(format_record(args.format, record) + '\n' for record in records))
+                output.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        monitor.stop_monitoring()
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.WARNING),
+                        format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr)
+    return run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
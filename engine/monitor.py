@@ -0,0 +1,583 @@
+"""
+Фоновый мониторинг спредов CEX/DEX без зависимостей от GUI.
+CEX цены приходят из общего WebSocket фида MEXC, DEX цены опрашиваются
+по расписанию через пул соединений. Наружу мониторинг отдаёт алерты
+(gui_queue), последние цены (price_channel) и историю тиков.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from dex_fetcher import get_fetch_engine
+from dex_providers import get_price_source, normalize_chain
+from dex_scheduler import DexPollScheduler
+from gui_bridge import MonitorMessageQueue, LatestValueChannel
+from market_core import get_market_core
+from mexc_feed import MexcFeedManager, PriceBus
+from price_history import TickStore
+from tick_archive import TickArchive, history_rows
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundMonitor:
+    """Класс для фонового мониторинга всех токенов и обнаружения спредов"""
+    
+    # Наибольшая пауза цикла опроса без токенов к опросу (секунды)
+    IDLE_WAIT = 0.25
+    # Сколько при остановке ждать запросов в полёте, прежде чем отменить (секунды)
+    STOP_WAIT = 2.0
+    
+    def __init__(self, parent_gui=None):
+        self.parent_gui = parent_gui  # GUI не обязателен: движок работает и без окна
+        self.running = False
+        self.stopping = False  # Остановка ещё дожидается задач и сбрасывает архив
+        self.monitor_task = None  # Задача опроса в цикле ядра рыночных данных
+        self.batch_tasks = set()  # Задачи poll_batch в полёте
+        self.core = get_market_core()
+        self.tokens_data = []
+        self.price_data = {}  # {token_name: {'cex': price, 'dex': price, 'last_update': timestamp}}
+        self.spread_threshold = 5.0  # Порог спреда в процентах
+        self.monitor_interval = 2.0  # Интервал проверки в секундах
+        self.auto_open_charts = True  # Автоматически открывать графики
+        self.disable_alerts = False  # Отключить алерты о высоком спреде
+        self.opened_charts = set()  # Множество уже открытых графиков для избежания дублирования
+        self.sent_alerts = set()  # Уже отправленные немедленные алерты (токен + целый спред)
+        self.blacklisted_tokens = set()  # Черный список токенов
+        self.blacklist_file = 'blacklist.json'  # Файл для сохранения черного списка
+        self.tokens_file = 'tokens.json'  # Файл со списком токенов
+        self.shard = None  # (номер, всего): отслеживать только каждый N-й токен
+        
+        # Общие WebSocket соединения MEXC для всех токенов
+        self.mexc_feed = MexcFeedManager()
+        # Шина цен для окон графиков (без собственных соединений)
+        self.price_bus = PriceBus()
+        
+        # Планировщик опроса DEX цен (создаётся при запуске мониторинга)
+        self.dex_scheduler = None
+        # Параллельная загрузка DEX цен через общий пул соединений
+        self.fetch_engine = get_fetch_engine()
+        self.price_source = get_price_source()
+        
+        # Очередь для передачи сообщений в GUI поток (ограничиваем размер)
+        self.gui_queue = MonitorMessageQueue(maxsize=100)
+        # Последние цены токенов с версиями: GUI читает только изменившиеся
+        self.price_channel = LatestValueChannel()
+        
+        # История данных для всех токенов (15 минут)
+        self.history_duration = 15 * 60  # 15 минут в секундах
+        self.history_data = TickStore(duration=self.history_duration)
+        self.tick_archive = TickArchive()  # История на диске между запусками
+        
+        # Загружаем черный список при инициализации
+        self.load_blacklist()
+        
+        logger.info("Background monitor initialized")
+    
+    def update_history(self, token_name, cex_price=None, dex_price=None):
+        """Обновление истории данных для токена"""
+        current_time = time.time()
+        history = self.history_data.slot(token_name)
+
+        # Новая CEX цена добавляет точку, DEX цена обновляет последнюю;
+        # точки старше history_duration отбрасываются внутри буфера
+        if cex_price is not None:
+            history.add_cex(current_time, cex_price)
+        if dex_price is not None:
+            history.add_dex(current_time, dex_price)
+        self.tick_archive.append(token_name, current_time,
+                                 np.nan if cex_price is None else cex_price,
+                                 np.nan if dex_price is None else dex_price)
+
+    def get_history(self, token_name, start=None, end=None):
+        """Копия истории токена: NumPy массивы times/cex_prices/dex_prices (NaN - нет цены)"""
+        if start is None and end is None:
+            return self.history_data.snapshot(token_name)
+        return self.history_data.range(token_name, start, end)
+
+    def get_archived_history(self, token_name, start=None, end=None):
+        """История токена из архива на диске (может быть глубже history_duration).
+        Диск не сбрасывается: незаписанные тики архив отдаёт из памяти"""
+        events = self.tick_archive.load(token_name, start, end)
+        times, cex, dex = history_rows(events['times'], events['cex_prices'], events['dex_prices'])
+        return {'times': times, 'cex_prices': cex, 'dex_prices': dex}
+    
+    def warm_async(self):
+        """Прогрев из архива в пуле HTTP: чтение с диска не задерживает запуск"""
+        return self.core.submit(self.core.run_blocking(self.warm_from_archive))
+    
+    def warm_from_archive(self):
+        """Восстановить историю и последние цены токенов из архива"""
+        start = time.time() - self.history_duration
+        warmed = 0
+        for token in list(self.tokens_data):
+            if not self.running:
+                break
+            token_name = token['name']
+            try:
+                history = self.get_archived_history(token_name, start)
+            except Exception as e:
+                logger.error(f"Error loading archived ticks for {token_name}: {e}")
+                continue
+            times = history['times']
+            if not len(times):
+                continue
+            self.history_data.extend(token_name, times, history['cex_prices'], history['dex_prices'])
+            token_prices = self.price_data.setdefault(token_name, {})
+            for key, prices in (('cex', history['cex_prices']), ('dex', history['dex_prices'])):
+                known = np.flatnonzero(~np.isnan(prices))
+                if len(known) and key not in token_prices:
+                    token_prices[key] = float(prices[known[-1]])
+                    token_prices[f'{key}_time'] = float(times[known[-1]])
+            self.price_channel.publish(token_name, (token_prices.get('cex'), token_prices.get('dex')))
+            warmed += 1
+        if warmed:
+            logger.info(f"Warmed history for {warmed} tokens from tick archive")
+    
+    def history_memory_usage(self):
+        """Память, занятая историей всех токенов"""
+        return self.history_data.memory_usage()
+    
+    def load_tokens(self):
+        """Загрузка токенов из JSON файла"""
+        try:
+            if os.path.exists(self.tokens_file):
+                with open(self.tokens_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    self.tokens_data = data.get('tokens', [])
+                    if self.shard:
+                        index, count = self.shard
+                        self.tokens_data = self.tokens_data[index::count]
+                    logger.info(f"Loaded {len(self.tokens_data)} tokens for monitoring")
+            else:
+                self.tokens_data = []
+                logger.warning("No tokens.json file found")
+        except Exception as e:
+            logger.error(f"Error loading tokens: {e}")
+            self.tokens_data = []
+    
+    def connect_mexc_websocket(self, token_symbol):
+        """Подписка токена на MEXC Futures через общий мультиплексированный WebSocket"""
+        self.mexc_feed.subscribe(token_symbol, self.make_cex_handler(token_symbol))
+    
+    def make_cex_handler(self, token_symbol):
+        """Обработчик push.ticker/push.deal для конкретного токена"""
+        def on_cex_price(channel, price):
+            # Сначала раздаём тик графикам, чтобы не добавлять задержку
+            self.price_bus.publish(token_symbol, channel, price)
+            
+            token_prices = self.price_data.setdefault(token_symbol, {})
+            old_price = token_prices.get('cex')
+            token_prices['cex'] = price
+            token_prices['cex_time'] = time.time()
+            
+            # Немедленно проверяем спред при изменении цены
+            if old_price != price:
+                self.check_spread_immediately(token_symbol, price, token_prices.get('dex'))
+                logger.debug(f"MEXC {channel} price for {token_symbol}: {price}")
+            
+            # Обновляем историю
+            self.update_history(token_symbol, cex_price=price)
+            
+            # Последние цены для таблицы (перезаписываются, не копятся)
+            self.price_channel.publish(token_symbol, (price, token_prices.get('dex')))
+        
+        return on_cex_price
+    
+    def reload_tokens(self):
+        """Перечитать tokens.json и обновить подписки без переподключения"""
+        self.load_tokens()
+        if not self.running:
+            return
+        for token in self.tokens_data:
+            self.price_data.setdefault(token['name'], {})
+        self.dex_scheduler.sync(self.tokens_data)
+        self.sync_feed_subscriptions()
+    
+    def sync_feed_subscriptions(self):
+        """Подписки фида = отслеживаемые токены + токены открытых графиков"""
+        token_names = self.price_bus.tokens()
+        if self.running:
+            token_names += [token['name'] for token in self.tokens_data]
+        if not token_names:
+            self.mexc_feed.stop()
+            return
+        self.mexc_feed.start()
+        self.mexc_feed.sync({name: self.make_cex_handler(name) for name in token_names})
+        logger.info(f"MEXC subscriptions synced: {len(set(token_names))} tokens")
+    
+    def subscribe_chart(self, token_name, callback):
+        """Подписать окно графика на тики токена из общего фида"""
+        self.price_bus.subscribe(token_name, callback)
+        if not self.mexc_feed.is_subscribed(token_name):
+            self.mexc_feed.start()
+            self.connect_mexc_websocket(token_name)
+        
+        # Отдаём последнюю известную цену сразу
+        cex_price = self.price_data.get(token_name, {}).get('cex')
+        if cex_price is not None:
+            callback('cached', cex_price)
+    
+    def unsubscribe_chart(self, token_name, callback):
+        """Отписать окно графика; фид отписывается, если токен больше никому не нужен"""
+        if self.price_bus.unsubscribe(token_name, callback):
+            monitored = self.running and any(t['name'] == token_name for t in self.tokens_data)
+            if not monitored:
+                self.mexc_feed.unsubscribe(token_name)
+    
+    def get_dex_price(self, token_address, chain_hint=None):
+        """Получение цены с OKX DEX"""
+        return self.price_source.get_price(token_address, chain_hint)
+    
+    def check_spread(self, token_name, cex_price, dex_price):
+        """Проверка спреда между CEX и DEX ценами"""
+        if cex_price is None or dex_price is None or cex_price <= 0 or dex_price <= 0:
+            return None
+        
+        spread = ((dex_price - cex_price) / cex_price) * 100
+        return spread
+    
+    def check_spread_immediately(self, token_name, cex_price, dex_price):
+        """Немедленная проверка спреда при изменении цены"""
+        if not cex_price or not dex_price:
+            return
+        
+        spread = ((dex_price - cex_price) / cex_price) * 100
+        abs_spread = abs(spread)
+        
+        # Проверяем на алерт (спред больше порога)
+        if abs_spread >= self.spread_threshold:
+            # Отправляем алерт немедленно
+            try:
+                if not self.disable_alerts:
+                    alert_key = f"{token_name}_{int(abs_spread)}"
+                    token = self.find_token(token_name)
+                    # Токен только из окна графика (не отслеживается) - алерт не нужен
+                    if token is not None and alert_key not in self.sent_alerts:
+                        message = {
+                            'type': 'high_spread',
+                            'token': token,
+                            'spread': spread,
+                            'cex_price': cex_price,
+                            'dex_price': dex_price,
+                            'timestamp': time.time()
+                        }
+                        self.gui_queue.put_nowait(message)
+                        self.sent_alerts.add(alert_key)
+                        # Удаляем из множества через 5 минут
+                        self.core.call_later(300, self.sent_alerts.discard, alert_key)
+                        logger.info(f"Immediate high spread alert: {token_name} - {spread:.2f}%")
+            except queue.Full:
+                logger.debug("GUI queue is full, skipping high spread alert")
+            except Exception as e:
+                logger.error(f"Error in immediate spread check: {e}")
+    
+    def find_token(self, token_name):
+        """Запись отслеживаемого токена из tokens.json или None"""
+        for token in self.tokens_data:
+            if token['name'] == token_name:
+                return token
+        return None
+    
+    def fetch_dex_prices(self, tokens):
+        """DEX цены пачки токенов одним запросом (в потоке пула): {token_name: цена или None}"""
+        items = {}
+        for token in tokens:
+            items[token['name']] = (normalize_chain(token['address'], token.get('chain')), token['address'])
+        
+        # Получаем DEX цены (CEX уже получается через WebSocket). Первый запрос
+        # пачки оплачен в планировщике, запасные запросы списываются из того же бюджета
+        scheduler = self.dex_scheduler
+        prices = self.price_source.get_prices(list(items.values()),
+                                              throttle=scheduler.acquire if scheduler else None)
+        return {token_name: prices.get(item) for token_name, item in items.items()}
+    
+    def apply_dex_price(self, token, dex_price):
+        """Учёт новой DEX цены токена и проверка спреда; возвращает спред или None"""
+        token_name = token['name']
+        current_time = time.time()
+        token_prices = self.price_data.setdefault(token_name, {})
+        
+        if dex_price is not None:
+            old_dex_price = token_prices.get('dex')
+            token_prices['dex'] = dex_price
+            token_prices['dex_time'] = current_time
+            logger.debug(f"Updated DEX price for {token_name}: {dex_price}")
+            
+            # Немедленно проверяем спред при изменении DEX цены
+            if old_dex_price != dex_price:
+                cex_price = token_prices.get('cex')
+                self.check_spread_immediately(token_name, cex_price, dex_price)
+            
+            # Обновляем историю
+            self.update_history(token_name, dex_price=dex_price)
+            
+            # Последние цены для таблицы (перезаписываются, не копятся)
+            self.price_channel.publish(token_name, (token_prices.get('cex'), dex_price))
+        else:
+            # Опрос не удался: спред по последней цене нужен только планировщику
+            return self.check_spread(token_name, token_prices.get('cex'), token_prices.get('dex'))
+        
+        # Проверяем спред
+        cex_price = token_prices.get('cex')
+        if cex_price is None:
+            return None
+        spread = self.check_spread(token_name, cex_price, dex_price)
+        if spread is None:
+            return None
+        logger.debug(f"{token_name}: CEX={cex_price:.6f}, DEX={dex_price:.6f}, Spread={spread:.2f}%")
+        
+        # Проверяем превышение порога
+        if abs(spread) >= self.spread_threshold:
+            chart_key = f"{token_name}_{abs(spread):.1f}"
+            if chart_key not in self.opened_charts and self.auto_open_charts:
+                logger.warning(f"High spread detected for {token_name}: {spread:.2f}%")
+                
+                # Отправляем сигнал в GUI для открытия графика только если алерты не отключены
+                if not self.disable_alerts:
+                    try:
+                        self.gui_queue.put_nowait({
+                            'type': 'high_spread',
+                            'token': token,
+                            'spread': spread,
+                            'cex_price': cex_price,
+                            'dex_price': dex_price
+                        })
+                    except queue.Full:
+                        logger.debug("GUI queue is full, skipping high spread alert")
+                
+                self.opened_charts.add(chart_key)
+                
+                # Удаляем из множества через 5 минут
+                self.core.call_later(300, self.opened_charts.discard, chart_key)
+        
+        return spread
+    
+    async def monitor_loop(self):
+        """Основной цикл мониторинга (задача в цикле ядра рыночных данных)"""
+        logger.info("Background monitoring started")
+        
+        # Подписываем все токены через общие WebSocket соединения
+        self.mexc_feed.start()
+        for token in self.tokens_data:
+            token_name = token['name']
+            self.price_data.setdefault(token_name, {})
+            self.connect_mexc_websocket(token_name)
+        
+        self.dex_scheduler.sync(self.tokens_data)
+        scheduler = self.dex_scheduler
+        
+        # Не больше запросов в полёте, чем воркеров в пуле
+        inflight = asyncio.Semaphore(self.fetch_engine.max_workers)
+        
+        while self.running:
+            try:
+                token, wait = scheduler.poll()
+                if token is None:
+                    # Спим до следующего токена, но не дольше IDLE_WAIT:
+                    # новые токены и смена интервала подхватываются быстро
+                    await asyncio.sleep(min(wait, self.IDLE_WAIT) if wait is not None else self.IDLE_WAIT)
+                    continue
+                await inflight.acquire()
+                
+                # Уже подошедшие токены добираем в ту же пачку, если источник умеет пакетные запросы
+                batch = [token] + scheduler.take_due(self.price_source.batch_size() - 1)
+                
+                # Токены из черного списка не опрашиваем, но оставляем в расписании
+                # с самым длинным интервалом (нулевой спред -> max_factor)
+                for token in batch:
+                    if self.is_blacklisted(token['name']):
+                        scheduler.reschedule(token['name'], 0.0, self.spread_threshold)
+                batch = [token for token in batch if not self.is_blacklisted(token['name'])]
+                if not batch:
+                    inflight.release()
+                    continue
+                
+                task = asyncio.ensure_future(self.poll_batch(batch, inflight))
+                self.batch_tasks.add(task)
+                task.add_done_callback(self.batch_tasks.discard)
+                
+            except Exception as e:
+                logger.error(f"Error in monitor loop: {e}")
+                await asyncio.sleep(5)  # Пауза при ошибке
+        
+        # Дожидаемся запросов в полёте: stop_monitoring очищает историю после нас
+        if self.batch_tasks:
+            done, pending = await asyncio.wait(set(self.batch_tasks), timeout=self.STOP_WAIT)
+            for task in pending:
+                task.cancel()
+        
+        logger.info("Background monitoring stopped")
+    
+    async def poll_batch(self, batch, inflight):
+        """Опрос пачки токенов в пуле HTTP и перепланирование по спредам.
+        Цены применяются в цикле ядра и только пока мониторинг запущен:
+        ответ, пришедший после остановки, не попадает в очищенную историю"""
+        token_names = [token['name'] for token in batch]
+        spreads = {}
+        try:
+            prices = await self.core.run_blocking(self.fetch_dex_prices, batch)
+            if self.running:
+                spreads = {token['name']: self.apply_dex_price(token, prices.get(token['name']))
+                           for token in batch}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"DEX poll error for {token_names}: {e}")
+        finally:
+            inflight.release()
+            # Токен возвращается в расписание при любой ошибке провайдера
+            if self.running:
+                for token_name in token_names:
+                    self.dex_scheduler.reschedule(token_name, spreads.get(token_name), self.spread_threshold)
+    
+    def start_monitoring(self, warm=True):
+        """Запуск мониторинга; warm=False - прогрев из архива вызывающий
+        запустит сам (warm_async), например после показа окна"""
+        if self.running:
+            logger.warning("Monitoring is already running")
+            return
+        if self.stopping:
+            logger.warning("Monitoring is still stopping")
+            return
+        
+        self.load_tokens()
+        if not self.tokens_data:
+            logger.warning("No tokens to monitor")
+            return
+        
+        self.running = True
+        self.tick_archive.start()
+        self.dex_scheduler = DexPollScheduler(self.monitor_interval)
+        self.monitor_task = self.core.submit(self.monitor_loop())
+        if warm:
+            self.warm_async()
+        logger.info(f"Started monitoring {len(self.tokens_data)} tokens")
+    
+    def stop_monitoring(self, on_stopped=None):
+        """Остановка мониторинга. Без on_stopped возвращается после полной
+        остановки (консоль). С on_stopped ожидание задачи опроса и сброс
+        архива на диск идут в отдельном потоке, а по окончании из него
+        вызывается on_stopped() - поток GUI не блокируется"""
+        if not self.running:
+            if on_stopped is not None:
+                on_stopped()
+            return
+        
+        logger.info("Stopping background monitoring...")
+        self.running = False
+        self.stopping = True
+        if self.dex_scheduler:
+            self.dex_scheduler.stop()
+        
+        # Закрываем общие WebSocket соединения (оставляем токены открытых графиков)
+        try:
+            self.sync_feed_subscriptions()
+        except Exception as e:
+            logger.error(f"Error closing MEXC feed: {e}")
+        
+        if on_stopped is None:
+            self.finish_stop()
+            return
+        
+        def finish():
+            try:
+                self.finish_stop()
+            finally:
+                on_stopped()
+        
+        threading.Thread(target=finish, name="monitor-stop", daemon=True).start()
+    
+    def finish_stop(self):
+        """Вторая часть остановки: дождаться задачи опроса, очистить данные, закрыть архив"""
+        try:
+            # Дожидаемся завершения задачи опроса
+            if self.monitor_task is not None:
+                try:
+                    self.monitor_task.result(timeout=3)
+                except Exception as e:
+                    logger.warning(f"Monitor task did not stop gracefully: {e}")
+                    self.monitor_task.cancel()
+                self.monitor_task = None
+            
+            # Очищаем все данные
+            usage = self.history_memory_usage()
+            logger.info(f"History store: {usage['tokens']} tokens, {usage['ticks']} ticks, "
+                        f"{usage['allocated_bytes'] / 1048576:.1f} MB allocated")
+            self.price_data.clear()
+            self.price_channel.clear()
+            self.history_data.clear()
+            self.tick_archive.close()  # История остаётся на диске
+        finally:
+            self.stopping = False
+        
+        logger.info("Background monitoring stopped")
+    
+    def update_settings(self, spread_threshold=None, monitor_interval=None, auto_open_charts=None, disable_alerts=None):
+        """Обновление настроек мониторинга"""
+        if spread_threshold is not None:
+            self.spread_threshold = spread_threshold
+        if monitor_interval is not None:
+            self.monitor_interval = monitor_interval
+            if self.dex_scheduler:
+                self.dex_scheduler.set_interval(monitor_interval)
+        if auto_open_charts is not None:
+            self.auto_open_charts = auto_open_charts
+        if disable_alerts is not None:
+            self.disable_alerts = disable_alerts
+        logger.info(f"Monitor settings updated: threshold={self.spread_threshold}%, interval={self.monitor_interval}s, auto_open={self.auto_open_charts}, disable_alerts={self.disable_alerts}")
+    
+    def add_to_blacklist(self, token_name):
+        """Добавить токен в черный список"""
+        self.blacklisted_tokens.add(token_name)
+        self.save_blacklist()  # Сохраняем изменения
+        logger.info(f"Token {token_name} added to blacklist")
+    
+    def remove_from_blacklist(self, token_name):
+        """Удалить токен из черного списка"""
+        self.blacklisted_tokens.discard(token_name)
+        self.save_blacklist()  # Сохраняем изменения
+        logger.info(f"Token {token_name} removed from blacklist")
+    
+    def is_blacklisted(self, token_name):
+        """Проверить, находится ли токен в черном списке"""
+        return token_name in self.blacklisted_tokens
+    
+    def get_blacklisted_tokens(self):
+        """Получить список токенов в черном списке"""
+        return list(self.blacklisted_tokens)
+    
+    def load_blacklist(self):
+        """Загрузка черного списка из файла"""
+        try:
+            if os.path.exists(self.blacklist_file):
+                with open(self.blacklist_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                    self.blacklisted_tokens = set(data.get('blacklisted_tokens', []))
+                    logger.info(f"Loaded blacklist with {len(self.blacklisted_tokens)} tokens")
+            else:
+                self.blacklisted_tokens = set()
+                logger.info("No blacklist file found, starting with empty blacklist")
+        except Exception as e:
+            logger.error(f"Error loading blacklist: {e}")
+            self.blacklisted_tokens = set()
+    
+    def save_blacklist(self):
+        """Сохранение черного списка в файл"""
+        try:
+            data = {
+                'blacklisted_tokens': list(self.blacklisted_tokens),
+                'last_updated': time.time()
+            }
+            with open(self.blacklist_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            logger.info(f"Blacklist saved with {len(self.blacklisted_tokens)} tokens")
+        except Exception as e:
+            logger.error(f"Error saving blacklist: {e}")
@@ -0,0 +1,121 @@
+"""
+Передача сообщений фонового мониторинга в GUI поток.
+Алерты о высоком спреде идут отдельной приоритетной очередью и не теряются;
+остальные сообщения - в ограниченную очередь, GUI забирает всё накопленное за тик.
+Цены передаются не сообщениями, а через LatestValueChannel: последнее значение
+и номер версии на токен.
+"""
+
+import collections
+import itertools
+import queue
+import threading
+import time
+
+# Типы сообщений, которые не должны ждать за обновлениями цен
+PRIORITY_TYPES = ('high_spread',)
+
+
+class MonitorMessageQueue:
+    """Очередь сообщений монитор -> GUI с приоритетной полосой и счётчиками"""
+
+    def __init__(self, maxsize=100):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.priority = collections.deque()
+        self.normal = collections.deque()
+        # Счётчики
+        self.received = 0
+        self.dropped = 0
+        self.delivered = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def put_nowait(self, message):
+        """Поставить сообщение; при переполнении обычной полосы - queue.Full"""
+        item = (time.monotonic(), message)
+        with self.lock:
+            self.received += 1
+            if message.get('type') in PRIORITY_TYPES:
+                self.priority.append(item)
+                return
+            if len(self.normal) >= self.maxsize:
+                self.dropped += 1
+                raise queue.Full
+            self.normal.append(item)
+
+    def put(self, message, block=True, timeout=None):
+        # Производители не должны блокироваться на GUI
+        self.put_nowait(message)
+
+    def drain(self):
+        """Забрать все накопленные сообщения: сначала приоритетные"""
+        with self.lock:
+            items = list(self.priority) + list(self.normal)
+            self.priority.clear()
+            self.normal.clear()
+        now = time.monotonic()
+        for enqueued, _ in items:
+            latency = now - enqueued
+            self.latency_total += latency
+            if latency > self.latency_max:
+                self.latency_max = latency
+        self.delivered += len(items)
+        return [message for _, message in items]
+
+    def qsize(self):
+        return len(self.priority) + len(self.normal)
+
+    def stats(self):
+        """Счётчики: глубина очередей, потери, задержка доставки (секунды)"""
+        with self.lock:
+            priority_depth = len(self.priority)
+            normal_depth = len(self.normal)
+        return {
+            'depth': priority_depth + normal_depth,
+            'priority_depth': priority_depth,
+            'received': self.received,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'avg_latency': self.latency_total / self.delivered if self.delivered else 0.0,
+            'max_latency': self.latency_max
+        }
+
+
+class LatestValueChannel:
+    """Последнее значение по ключу с версией; запись O(1) без блокировок.
+
+    Производители перезаписывают значение, читатель получает только ключи,
+    версия которых изменилась с его прошлого чтения. Промежуточные значения
+    схлопываются, но последнее не теряется никогда.
+    """
+
+    def __init__(self):
+        self.counter = itertools.count(1)
+        self.values = {}  # {key: value}
+        self.versions = {}  # {key: номер версии}
+
+    def publish(self, key, value):
+        # next() у itertools.count и присваивания в dict атомарны под GIL
+        self.values[key] = value
+        self.versions[key] = next(self.counter)
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def changed(self, seen):
+        """{key: value} для ключей с новой версией; seen - {key: версия} читателя, обновляется"""
+        updates = {}
+        for key, version in list(self.versions.items()):
+            if seen.get(key) != version:
+                seen[key] = version
+                updates[key] = self.values.get(key)
+        return updates
+
+    def discard(self, key):
+        self.versions.pop(key, None)
+        self.values.pop(key, None)
+
+    def clear(self):
+        self.versions.clear()
+        self.values.clear()
@@ -10,8 +10,10 @@ echo ✓ Папка logs создана
 
 echo.
 echo [2/4] Установка зависимостей...
-pip install websocket-client matplotlib numpy requests beautifulsoup4 pyperclip
+pip install matplotlib numpy requests pyperclip
 echo ✓ Зависимости установлены
+rem orjson необязателен: ускоряет разбор кадров MEXC фида, без него - стандартный json
+pip install orjson && echo ✓ orjson установлен || echo - orjson не установлен, используется стандартный json
 
 echo.
 echo [3/4] Проверка файлов...
@@ -0,0 +1,60 @@
+"""
+Подключаемый JSON декодер для горячих путей (кадры MEXC фида).
+orjson -> ujson -> стандартный json: берётся первый установленный,
+либо явно заданный в конфиге. Все варианты принимают bytes и str
+и при ошибке бросают ValueError (или его наследника).
+"""
+
+import importlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DECODER_ORDER = ('orjson', 'ujson', 'json')
+
+
+_raw_decode = json.JSONDecoder().raw_decode
+
+
+def _json_loads(data):
+    """Стандартный json для кадров фида: bytes декодируются без определения
+    кодировки (кадры всегда UTF-8), документ разбирается raw_decode без
+    регулярных выражений для пробелов. Кадр с пробелом в начале или чем-то
+    после документа уходит в json.loads: он разберёт пробелы или бросит
+    ValueError, как и другие декодеры"""
+    text = data.decode('utf-8') if isinstance(data, bytes) else data
+    try:
+        value, end = _raw_decode(text)
+    except ValueError:
+        return json.loads(text)
+    if end != len(text) and text[end:].strip():
+        return json.loads(text)
+    return value
+
+
+def _import_loads(name):
+    if name == 'json':
+        return _json_loads
+    try:
+        return importlib.import_module(name).loads
+    except ImportError:
+        return None
+
+
+def available_decoders():
+    """Имена установленных декодеров в порядке предпочтения"""
+    return [name for name in DECODER_ORDER if _import_loads(name) is not None]
+
+
+def get_decoder(name='auto'):
+    """(имя, loads) для декодера name; 'auto' - самый быстрый из установленных"""
+    if name != 'auto':
+        loads = _import_loads(name)
+        if loads is not None:
+            return name, loads
+        logger.warning(f"JSON decoder '{name}' is not installed, using the fastest available")
+    for candidate in DECODER_ORDER:
+        loads = _import_loads(candidate)
+        if loads is not None:
+            return candidate, loads
@@ -1,22 +1,26 @@
-import websocket
+import sys
+import startup_profile
+if __name__ == "__main__" and '--profile-startup' in sys.argv:
+    startup_profile.enable()
+import asyncio
 import json
 import threading
 import time
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from datetime import datetime
 import numpy as np
 import logging
-import requests
-from bs4 import BeautifulSoup
-import re
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import os
-from ctypes import windll, byref, c_int
-import queue
-import pyperclip
+import bisect
+import contextlib
+from dex_fetcher import get_fetch_engine
+from dex_providers import get_price_source
+from engine import BackgroundMonitor
+from market_core import get_market_core
+from mexc_feed import MexcFeedManager
+from chart_render import BlitAnimation, ChartRenderScheduler
+from chart_series import ChartSeries, MinMaxDecimator, epoch_to_datenum, now_datenum
+from config import CHART_CONFIG
 
 # Настройка логирования
 logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -32,11 +36,32 @@ click_logger.addHandler(click_handler)
 click_logger.setLevel(logging.DEBUG)
 click_logger.propagate = False  # Не передавать в основной логгер
 
+# matplotlib.pyplot грузится ~0.7 с: импортируем при первом графике
+# (или в фоне после запуска GUI), стиль применяем один раз
+_pyplot = None
+_pyplot_lock = threading.Lock()
+
+
+def get_pyplot():
+    global _pyplot
+    with _pyplot_lock:
+        if _pyplot is None:
+            import matplotlib.pyplot as plt
+            plt.style.use('dark_background')
+            _pyplot = plt
+        return _pyplot
+
+
+def pyplot_loaded():
+    return _pyplot is not None
+
+
 # Windows: включить тёмную тему заголовка окна (кнопки свернуть/развернуть/закрыть)
 def enable_dark_title_bar(tk_window):
     if os.name != 'nt':
         return
     try:
+        from ctypes import windll, byref, c_int
         hwnd = tk_window.winfo_id()
         use_dark = c_int(1)
         # 20 — Windows 10 2004+/11, 19 — Windows 10 1809+
@@ -46,18 +71,35 @@ def enable_dark_title_bar(tk_window):
         logger.error(f"Failed to enable dark title bar: {e}")
 
 class HybridChart:
+    # Запас по оси X (доля видимого диапазона), чтобы границы менялись не на каждом кадре
+    AXIS_HEADROOM = 0.1
+    
     def __init__(self, parent_window=None):
-        # Данные для графика (как было)
-        self.times = []
-        self.cex_prices = []
-        self.dex_prices = []
+        # Данные для графика: скользящее окно в NumPy буферах; на линии идёт
+        # прореженная (min/max) версия видимого диапазона
+        self.series = ChartSeries(window=CHART_CONFIG['history_points'])
+        self.decimator = MinMaxDecimator(CHART_CONFIG['max_data_points'])
         
         # Реальные данные
         self.mexc_price = None
         self.dex_price = None
+        self.frame_prices = None  # Цены, показанные на последнем кадре
+        
+        # Изменения стиля с панели ползунков: применяются пачкой, одна перерисовка на кадр
+        self.pending_styles = {}  # {имя ползунка: функция обновления}
+        self.style_depth = 0  # Вложенность style_transaction
+        self.style_dirty = False
+        self.redraw_after = None  # id отложенной перерисовки Tk
         
-        # WebSocket соединения
-        self.ws_mexc = None
+        # Собственные подключения (график без фонового мониторинга): задачи ядра рыночных данных
+        self.mexc_feed = None
+        self.dex_task = None
+        
+        self.history_request = None  # Текущая загрузка истории (устаревшие результаты отбрасываются)
+        
+        # Подписка на шину цен фонового мониторинга (вместо своего WebSocket)
+        self.price_monitor = None
+        self.price_symbol = None
         
         # Флаг для остановки
         self.running = True
@@ -66,8 +108,7 @@ class HybridChart:
         self.parent_window = parent_window
         
         # Настройка matplotlib
-        plt.style.use('dark_background')
-        self.fig, self.ax = plt.subplots(figsize=(6, 4))
+        self.fig, self.ax = get_pyplot().subplots(figsize=(6, 4))
         # Тёмный фон для фигуры и области графика
         self.fig.patch.set_facecolor('#000000')
         self.ax.set_facecolor('#000000')
@@ -100,6 +141,8 @@ class HybridChart:
         self.ax.spines['top'].set_visible(False)
         self.ax.spines['bottom'].set_color('white')
         self.ax.grid(True, alpha=0.2, linestyle='-', linewidth=0.5)
+        # Время по X - числа дат matplotlib (float), подписи как у datetime
+        self.ax.xaxis_date()
         
         # Инициализация линий с более контрастными цветами
         self.line_cex, = self.ax.plot([], [], color='#00FF00', linewidth=3, label='CEX Price (MEXC Futures)', alpha=0.9)
@@ -182,8 +225,9 @@ class HybridChart:
         new_ylim = [y_center - y_range/2, y_center + y_range/2]
         
         # Если у нас есть данные, убеждаемся что правая граница не выходит за пределы данных
-        if len(self.times) > 0:
-            max_time = max(self.times)
+        bounds = self.series.time_bounds()
+        if bounds is not None:
+            max_time = bounds[1]
             # Если правая граница выходит за пределы данных, корректируем её
             if new_xlim[1] > max_time:
                 # Сдвигаем окно так, чтобы правая граница была на последней точке данных
@@ -201,6 +245,7 @@ class HybridChart:
         self.manual_ylim = new_ylim
         
         # Обновляем график
+        self.update_lines()
         self.fig.canvas.draw()
     
     def on_press(self, event):
@@ -238,9 +283,9 @@ class HybridChart:
         new_ylim = [ylim[0] - dy, ylim[1] - dy]
         
         # Ограничиваем панорамирование границами данных
-        if len(self.times) > 0:
-            min_time = min(self.times)
-            max_time = max(self.times)
+        bounds = self.series.time_bounds()
+        if bounds is not None:
+            min_time, max_time = bounds
             
             # Если левая граница выходит за пределы данных, корректируем
             if new_xlim[0] < min_time:
@@ -267,6 +312,7 @@ class HybridChart:
         self.pan_start = (event.xdata, event.ydata)
         
         # Обновляем график
+        self.update_lines()
         self.fig.canvas.draw()
     
     def reset_zoom(self):
@@ -276,323 +322,94 @@ class HybridChart:
         self.manual_ylim = None
         self.ax.relim()
         self.ax.autoscale_view()
+        self.update_lines()
         self.fig.canvas.draw()
     
     def connect_mexc(self, token_symbol):
-        """Подключение к MEXC Futures WebSocket (из working_real_chart.py)"""
-        # Добавляем уникальный идентификатор для этого соединения
-        self.ws_id = f"{token_symbol}_{id(self)}"
-        
-        def on_message(ws, message):
-            try:
-                data = json.loads(message)
-                
-                # Обработка тикера (раз в ~1s)
-                if data.get("channel") == "push.ticker" and "data" in data:
-                    ticker_data = data["data"]
-                    symbol_name = f"{token_symbol}_USDT"
-                    if ticker_data.get("symbol") == symbol_name and "lastPrice" in ticker_data:
-                        price = float(ticker_data["lastPrice"])
-                        self.mexc_price = price
-                        # Немедленно обновляем GUI
-                        if hasattr(self, 'fig') and self.fig:
-                            self.fig.canvas.draw_idle()
-                        logger.debug(f"MEXC Futures Price: {price}")
-                # Обработка сделок (tick-by-tick)
-                elif data.get("channel") == "push.deal" and "data" in data:
-                    deals = data["data"]
-                    # формат обычно массив сделок; берём последнюю
-                    if isinstance(deals, list) and len(deals) > 0:
-                        last = deals[-1]
-                        # возможные ключи: price / p
-                        p = last.get("price") or last.get("p")
-                        s = last.get("symbol") or last.get("s")
-                        symbol_name = f"{token_symbol}_USDT"
-                        if p is not None and (s is None or s == symbol_name):
-                            try:
-                                price = float(p)
-                                old_price = self.mexc_price
-                                self.mexc_price = price
-                                # Немедленно обновляем GUI при каждой сделке
-                                if hasattr(self, 'fig') and self.fig:
-                                    self.fig.canvas.draw_idle()
-                                # Логируем только при изменении цены
-                                if old_price != price:
-                                    logger.debug(f"MEXC Deal Price: {price} (change: {price - old_price if old_price else 0})")
-                            except Exception:
-                                pass
-                
-                # Обработка pong ответа
-                elif data.get("method") == "pong":
-                    pass
-                    
-            except Exception as e:
-                logger.error(f"MEXC message error: {e}")
-        
-        def on_error(ws, error):
-            logger.error(f"MEXC WebSocket error: {error}")
-        
-        def on_close(ws, close_status_code, close_msg):
-            logger.debug("MEXC WebSocket connection closed")
-            if self.running:
-                threading.Timer(5.0, lambda: self.connect_mexc(token_symbol)).start()
-        
-        def on_open(ws):
-            logger.debug(f"MEXC Futures WebSocket connected for {token_symbol} (ID: {self.ws_id})")
-            symbol_name = f"{token_symbol}_USDT"
-            subscribe_msg = {
-                "method": "sub.ticker",
-                "param": {
-                    "symbol": symbol_name
-                }
-            }
-            ws.send(json.dumps(subscribe_msg))
-            logger.info(f"Subscribed to {symbol_name} ticker")
-            # Дополнительно подписываемся на сделки (tick-by-tick)
-            subscribe_deal = {
-                "method": "sub.deal",
-                "param": {
-                    "symbol": symbol_name
-                }
-            }
-            try:
-                ws.send(json.dumps(subscribe_deal))
-                logger.info(f"Subscribed to {symbol_name} deals")
-            except Exception as e:
-                logger.error(f"Subscribe deal error: {e}")
-        
-        def ping_loop():
-            while self.running and self.ws_mexc:
-                try:
-                    ping_msg = {"method": "ping"}
-                    self.ws_mexc.send(json.dumps(ping_msg))
-                    time.sleep(10)
-                except Exception as e:
-                    logger.debug(f"MEXC ping error: {e}")
-                    break
-        
-        def run_websocket():
-            self.ws_mexc = websocket.WebSocketApp(
-                "wss://contract.mexc.com/edge",
-                on_message=on_message,
-                on_error=on_error,
-                on_close=on_close,
-                on_open=on_open
-            )
-            threading.Thread(target=ping_loop, daemon=True).start()
-            self.ws_mexc.run_forever()
-        
-        threading.Thread(target=run_websocket, daemon=True).start()
+        """Своё подключение к MEXC Futures WebSocket (график без фонового мониторинга)"""
+        self.mexc_feed = MexcFeedManager(max_connections=1)
+        self.mexc_feed.start()
+        self.mexc_feed.subscribe(token_symbol, self.on_bus_price)
+    
+    def on_bus_price(self, channel, price):
+        """Тик из общего фида фонового мониторинга (push.ticker/push.deal)"""
+        if not self.running:
+            return
+        old_price = self.mexc_price
+        # Кадр выведет таймер анимации, здесь только запоминаем цену
+        self.mexc_price = price
+        if old_price != price:
+            logger.debug(f"MEXC {channel} price: {price}")
     
     def parse_okx_price(self, token_address, chain_hint=None):
-        """Парсинг цены с OKX Web3. Поддержка chain_hint: ethereum | bsc | solana | base | arbitrum | polygon"""
-        try:
-            # Определяем блокчейн
-            chain = None
-            if chain_hint:
-                ch = chain_hint.strip().lower()
-                # нормализуем известные варианты
-                mapping = {
-                    'ethereum': 'ethereum', 'eth': 'ethereum', 'erc20': 'ethereum',
-                    'bsc': 'bsc', 'bep20': 'bsc', 'binance-smart-chain': 'bsc',
-                    'sol': 'solana', 'solana': 'solana',
-                    'base': 'base',
-                    'arbitrum': 'arbitrum', 'arbitrum_one': 'arbitrum', 'arbitrum one': 'arbitrum',
-                    'polygon': 'polygon', 'matic': 'polygon'
-                }
-                chain = mapping.get(ch)
-            if chain is None:
-                # эвристика по адресу
-                if len(token_address) == 44:
-                    chain = 'solana'
-                elif token_address.startswith('0x'):
-                    # по умолчанию для EVM ставим bsc если не указан chain
-                    chain = 'bsc'
-                else:
-                    chain = 'bsc'
-            
-            okx_url = f"https://web3.okx.com/ru/token/{chain}/{token_address}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'ru-RU,ru;q=0.8,en-US;q=0.5,en;q=0.3',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1'
-            }
-            
-            response = requests.get(okx_url, headers=headers, timeout=15)
-            if response.status_code == 200 and response.text:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Ищем цену в различных элементах страницы
-                price_selectors = [
-                    '.token-price',
-                    '.price-value', 
-                    '[data-testid="token-price"]',
-                    '.token-price-value',
-                    '.price',
-                    '.token-info-price',
-                    '.price-display'
-                ]
-                
-                for selector in price_selectors:
-                    price_elem = soup.select_one(selector)
-                    if price_elem:
-                        price_text = price_elem.get_text().strip()
-                        # Извлекаем число из текста
-                        price_match = re.search(r'[\d,]+\.?\d*', price_text.replace(',', ''))
-                        if price_match:
-                            price = float(price_match.group().replace(',', ''))
-                            if price > 0:
-                                logger.debug(f"OKX Price ({chain.upper()}): {price}")
-                                return price
-                
-                # Поиск в title страницы
-                if soup.title:
-                    title_text = soup.title.string
-                    match = re.search(r'\$([0-9,.]+)', title_text)
-                    if match:
-                        price = float(match.group(1).replace(',', '.'))
-                        logger.debug(f"OKX Price ({chain.upper()}) from title: {price}")
-                        return price
-                
-                # Поиск по regex в тексте страницы
-                page_text = response.text
-                price_patterns = [
-                    r'\$?(\d{1,3}(?:,\d{3})*(?:\.\d+)?)',
-                    r'(\d+\.\d+)',
-                    r'(\d+,\d+)'
-                ]
-                
-                for pattern in price_patterns:
-                    matches = re.findall(pattern, page_text)
-                    for match in matches:
-                        try:
-                            price = float(match.replace(',', ''))
-                            if 0.000001 < price < 1000000:  # Разумный диапазон цен
-                                logger.debug(f"OKX Price ({chain.upper()}) from regex: {price}")
-                                return price
-                        except ValueError:
-                            continue
-                
-                logger.warning(f"Could not find price on OKX page for {chain}")
-                return None
-            else:
-                logger.warning(f"OKX request failed: {response.status_code}")
-                return None
-        except Exception as e:
-            logger.error(f"OKX parse error: {e}")
-            return None
+        """Цена токена с OKX DEX (JSON API, при недоступности - страница web3.okx.com).
+        Поддержка chain_hint: ethereum | bsc | solana | base | arbitrum | polygon"""
+        return get_price_source().get_price(token_address, chain_hint)
     
     def connect_dex(self, token_address, chain_hint=None):
         """Подключение к OKX Web3 для получения цены. chain_hint может указывать сеть: ethereum/bsc/solana/..."""
-        def poll_dex_price():
-            while self.running:
-                try:
-                    price = self.parse_okx_price(token_address, chain_hint=chain_hint)
-                    if price and price != self.dex_price:  # Обновляем только при изменении
-                        self.dex_price = price
-                        # Немедленно обновляем GUI
-                        if hasattr(self, 'fig') and self.fig:
-                            self.fig.canvas.draw_idle()
-                    # Убираем sleep - обновляем максимально часто
-                except Exception as e:
-                    logger.error(f"OKX polling error: {e}")
-                    time.sleep(0.01)  # Минимальная пауза только при ошибке
-        
-        threading.Thread(target=poll_dex_price, daemon=True).start()
+        self.dex_task = get_market_core().submit(self.poll_dex_price(token_address, chain_hint))
+    
+    async def poll_dex_price(self, token_address, chain_hint=None):
+        """Задача опроса DEX цены в цикле ядра; сам запрос выполняется в пуле HTTP.
+        Запрос не чаще dex_poll_interval: воркер пула и слот хоста OKX заняты
+        только на время запроса и остаются пакетному опросу мониторинга"""
+        core = get_market_core()
+        interval = CHART_CONFIG['dex_poll_interval']
+        while self.running:
+            started = time.monotonic()
+            try:
+                price = await core.run_blocking(self.parse_okx_price, token_address, chain_hint)
+                if price and price != self.dex_price:  # Обновляем только при изменении
+                    self.dex_price = price
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"OKX polling error: {e}")
+            await asyncio.sleep(max(interval - (time.monotonic() - started), 0))
     
     def animate(self, frame):
-        """Анимация графика - оптимизированная версия"""
+        """Анимация графика - оптимизированная версия.
+        Возвращает False, если цены не изменились (кадр можно не выводить)"""
         if not self.running:
-            return self.line_cex, self.line_dex
-        
-        # Обновляем данные
-        current_time = datetime.now()
-        
-        # Всегда добавляем время, но цены только если они доступны
-        self.times.append(current_time)
-        
-        if self.mexc_price is not None:
-            self.cex_prices.append(self.mexc_price)
-        else:
-            # Если цена недоступна, используем последнюю известную цену или 0
-            last_price = self.cex_prices[-1] if self.cex_prices else 0
-            self.cex_prices.append(last_price)
-        
-        if self.dex_price is not None:
-            self.dex_prices.append(self.dex_price)
-        else:
-            # Если DEX цена недоступна, используем последнюю известную цену или 0
-            last_dex_price = self.dex_prices[-1] if self.dex_prices else 0
-            self.dex_prices.append(last_dex_price)
-        
-        # Ограничиваем количество точек (10 минут для более быстрой работы)
-        max_points = 600  # 10 минут истории
-        if len(self.times) > max_points:
-            self.times = self.times[-max_points:]
-            self.cex_prices = self.cex_prices[-max_points:]
-            self.dex_prices = self.dex_prices[-max_points:]
+            return False
+        
+        # Обновляем данные: новая точка в буфер окна, линии получают срезы без копий
+        current_time = now_datenum()
+        last_cex, last_dex = self.series.last()
+        # Если цена недоступна, используем последнюю известную (NaN - линия не рисуется)
+        cex_value = self.mexc_price if self.mexc_price is not None else last_cex
+        dex_value = self.dex_price if self.dex_price is not None else last_dex
+        self.series.append(current_time, cex_value, dex_value)
+        # NaN != NaN, поэтому сравниваем с None вместо отсутствующих цен
+        prices = tuple(float(v) if v == v else None for v in (cex_value, dex_value))
+        changed = prices != self.frame_prices
+        self.frame_prices = prices
         
         # Обновляем график
-        if len(self.times) > 0:
-            # Убеждаемся, что все массивы имеют одинаковую длину
-            min_length = min(len(self.times), len(self.cex_prices), len(self.dex_prices))
-            if min_length == 0:
-                return self.line_cex, self.line_dex
-            
-            # Обрезаем массивы до минимальной длины
-            times_trimmed = self.times[-min_length:]
-            cex_prices_trimmed = self.cex_prices[-min_length:]
-            dex_prices_trimmed = self.dex_prices[-min_length:]
-            
-            times_np = np.array(times_trimmed)
-            cex_prices_np = np.array(cex_prices_trimmed)
-            
-            # Фильтруем данные DEX по времени - используем тот же массив времени
-            if len(dex_prices_trimmed) > 0:
-                # Синхронизируем DEX данные с CEX временем
-                dex_prices_synced = []
-                for i in range(len(times_trimmed)):
-                    if i < len(dex_prices_trimmed):
-                        dex_prices_synced.append(dex_prices_trimmed[i])
-                    else:
-                        dex_prices_synced.append(dex_prices_trimmed[-1] if dex_prices_trimmed else 0)
-                
-                dex_times_np = times_np
-                dex_prices_np = np.array(dex_prices_synced)
-            else:
-                dex_times_np = np.array([])
-                dex_prices_np = np.array([])
-            
-            # Обновляем линии (оптимизированно)
-            self.line_cex.set_data(times_np, cex_prices_np)
-            if len(dex_times_np) > 0:
-                self.line_dex.set_data(dex_times_np, dex_prices_np)
-            else:
-                self.line_dex.set_data([], [])
+        if len(self.series) > 0:
+            times_np, cex_prices_np, dex_prices_np = self.series.views()
             
             # Заливка отключена для лучшей производительности
             
-            # Обновляем оси только если не используется ручное масштабирование (реже для производительности)
-            if not self.manual_zoom and frame % 3 == 0:  # Обновляем оси каждый 3-й кадр
+            # Обновляем оси только если не используется ручное масштабирование.
+            # Границы меняются скачком с запасом: пока данные в них помещаются,
+            # оси не перерисовываются и кадр выводится блиттингом
+            if not self.manual_zoom:
                 # Обновляем ось X с учетом отступов
                 if len(times_np) > 1:
                     x_margin = getattr(self, 'x_margin', 0.0)
-                    time_range = times_np[-1] - times_np[0]
-                    margin_value = time_range * x_margin
-                    self.ax.set_xlim(times_np[0] - margin_value, times_np[-1] + margin_value)
+                    x0, x1 = times_np[0], times_np[-1]
+                    margin_value = (x1 - x0) * x_margin
+                    cur_x0, cur_x1 = self.ax.get_xlim()
+                    if x1 > cur_x1 or x0 < cur_x0 - margin_value or (cur_x1 - cur_x0) > 2 * (x1 - x0) * (1 + 2 * x_margin):
+                        headroom = (x1 - x0) * self.AXIS_HEADROOM
+                        self.ax.set_xlim(x0 - margin_value, x1 + headroom + margin_value)
                 
-                # Обновляем ось Y с улучшенным масштабом
-                if len(cex_prices_np) > 0:
-                    all_prices = [cex_prices_np]
-                    if len(dex_prices_np) > 0:
-                        all_prices.append(dex_prices_np)
-                    
-                    all_prices_combined = np.concatenate(all_prices)
-                    min_price = np.min(all_prices_combined)
-                    max_price = np.max(all_prices_combined)
+                # Обновляем ось Y с улучшенным масштабом (min/max окна поддерживаются буфером)
+                bounds = self.series.price_bounds()
+                if bounds is not None:
+                    min_price, max_price = bounds
                     
                     # Увеличиваем отступы для лучшей читаемости
                     price_range = max_price - min_price
@@ -603,12 +420,16 @@ class HybridChart:
                     else:
                         margin_value = max_price * 0.1 if max_price > 0 else 0.1
                     
-                    self.ax.set_ylim(min_price - margin_value, max_price + margin_value)
+                    # Меняем границы, только если цены вышли за них или масштаб стал слишком крупным
+                    y0, y1 = min_price - margin_value, max_price + margin_value
+                    cur_y0, cur_y1 = self.ax.get_ylim()
+                    if min_price < cur_y0 or max_price > cur_y1 or (cur_y1 - cur_y0) > 1.5 * (y1 - y0):
+                        self.ax.set_ylim(y0, y1)
             else:
                 # При ручном масштабировании проверяем, нужно ли обновить правую границу
                 if len(times_np) > 0 and self.manual_xlim is not None:
                     current_xlim = self.ax.get_xlim()
-                    max_time = max(times_np)
+                    max_time = times_np[-1]
                     
                     # Если данные вышли за правую границу, обновляем её
                     if max_time > current_xlim[1]:
@@ -623,9 +444,12 @@ class HybridChart:
                 if self.manual_ylim is not None:
                     self.ax.set_ylim(self.manual_ylim)
             
+            # Линии - по видимому диапазону после обновления границ
+            self.update_lines()
+            
             # Обновляем правые метки цен (CEХ/DEX) на текущих значениях
-            if len(cex_prices_np) > 0:  # Обновляем метки на каждом кадре для видимости
-                current_cex_val = float(cex_prices_np[-1])
+            if np.isfinite(cex_value):  # Обновляем метки на каждом кадре для видимости
+                current_cex_val = float(cex_value)
                 self.cex_price_label.set_text(f"CEX {current_cex_val:.6f}")
                 # Нормализуем позицию по Y в координатах оси
                 y0, y1 = self.ax.get_ylim()
@@ -640,8 +464,8 @@ class HybridChart:
                 self.cex_badge.xy = (self.ax.get_xlim()[1], current_cex_val)
                 self.cex_badge.set_text(f"{current_cex_val:.6f}")
                 
-                if len(dex_prices_np) > 0:
-                    current_dex_val = float(dex_prices_np[-1])
+                if np.isfinite(dex_value):
+                    current_dex_val = float(dex_value)
                     self.dex_price_label.set_text(f"DEX {current_dex_val:.6f}")
                     if y1 != y0:
                         dex_rel = (current_dex_val - y0) / (y1 - y0)
@@ -660,9 +484,9 @@ class HybridChart:
                 # Удалено обновление меток оси Y - оно создавало дублирующие ценники
             
             # Обновляем спред (реже для производительности)
-            if len(cex_prices_np) > 0 and len(dex_prices_np) > 0 and frame % 2 == 0:  # Обновляем спред каждый 2-й кадр
-                current_cex = cex_prices_np[-1]
-                current_dex = dex_prices_np[-1]
+            if np.isfinite(cex_value) and np.isfinite(dex_value) and frame % 2 == 0:  # Обновляем спред каждый 2-й кадр
+                current_cex = cex_value
+                current_dex = dex_value
                 if current_cex > 0 and current_dex > 0:
                     spread = ((current_dex - current_cex) / current_cex) * 100
                     self.current_spread = spread  # Сохраняем для ползунка яркости
@@ -682,70 +506,95 @@ class HybridChart:
                 self.spread_text.set_text('Waiting for data...')
                 self.spread_text.set_color('white')
         
-        # Возвращаем объекты для анимации (без blit)
-        return self.line_cex, self.line_dex
+        return changed
+    
+    def update_lines(self):
+        """Данные линий: видимый диапазон, прореженный до ~2 точек на пиксель"""
+        x0, x1 = self.ax.get_xlim()
+        cex_times, cex_prices, dex_times, dex_prices = self.decimator.update(
+            self.series, x0, x1, self.ax.bbox.width)
+        self.line_cex.set_data(cex_times, cex_prices)
+        self.line_dex.set_data(dex_times, dex_prices)
     
-    def start(self, token_address, token_symbol, background_monitor=None):
-        """Запуск графика"""
+    def animated_artists(self):
+        """Artist'ы, меняющиеся на каждом кадре (рисуются блиттингом)"""
+        return [self.line_cex, self.line_dex, self.cex_guide, self.dex_guide,
+                self.cex_price_label, self.dex_price_label, self.cex_badge, self.dex_badge,
+                self.spread_text]
+    
+    def start(self, token_address, token_symbol, background_monitor=None, scheduler=None):
+        """Запуск графика; scheduler - общий таймер отрисовки окон GUI"""
         logger.info(f"Starting hybrid chart for {token_symbol}...")
         
         # Обновляем заголовок с названием токена
         self.ax.set_title(f'{token_symbol}/USDT Price Comparison', color='white', fontsize=18, fontweight='bold', pad=20)
         
-        # Загружаем историю данных если доступна
+        # История грузится в пуле HTTP (чтение архива с диска), в окно попадает через after
         if background_monitor:
-            history = background_monitor.get_history(token_symbol)
-            if history['times']:
-                logger.info(f"Loading {len(history['times'])} historical data points for {token_symbol}")
-                # Конвертируем временные метки в datetime объекты
-                from datetime import datetime
-                self.times = [datetime.fromtimestamp(t) for t in history['times']]
-                self.cex_prices = [p for p in history['cex_prices'] if p is not None]
-                self.dex_prices = [p for p in history['dex_prices'] if p is not None]
-                
-                # Синхронизируем данные
-                if len(self.cex_prices) > 0:
-                    self.mexc_price = self.cex_prices[-1]
-                if len(self.dex_prices) > 0:
-                    self.dex_price = self.dex_prices[-1]
-        
-        # Подключаемся к источникам данных
-        self.connect_mexc(token_symbol)
+            request = self.history_request = object()
+            get_fetch_engine().submit(self.fetch_history, background_monitor, token_symbol,
+                                      callback=lambda future: self.on_history_loaded(request, future))
+        
+        # Подключаемся к источникам данных: CEX цены берём из фида мониторинга,
+        # собственный WebSocket нужен только для графика без мониторинга
+        if background_monitor:
+            self.price_monitor = background_monitor
+            self.price_symbol = token_symbol
+            background_monitor.subscribe_chart(token_symbol, self.on_bus_price)
+        else:
+            self.connect_mexc(token_symbol)
         # Пытаемся угадать подсказку сети по символу для EVM: если RAIL/DUSK и т.п., укажите явно в tokens.json (chain)
         chain_hint = None
         if hasattr(self, 'current_chain_hint'):
             chain_hint = self.current_chain_hint
         self.connect_dex(token_address, chain_hint=chain_hint)
         
-        # Запускаем анимацию с настраиваемой скоростью
+        # Запускаем анимацию с настраиваемой скоростью: статичная часть кэшируется,
+        # на кадре перерисовываются только линии, метки и текст
         animation_interval = getattr(self, 'animation_interval', 100)  # Увеличиваем интервал для более быстрой анимации
-        self.ani = animation.FuncAnimation(self.fig, self.animate, interval=animation_interval, blit=False, cache_frame_data=False)
+        self.ani = BlitAnimation(self.fig, self.animate, self.animated_artists(),
+                                 interval=animation_interval, scheduler=scheduler)
         
         logger.info("Hybrid chart started")
         
         # Если это GUI, не показываем plt.show()
         if self.parent_window is None:
-            plt.show()
+            get_pyplot().show()
     
     def stop(self):
         """Остановка графика"""
         logger.info("Stopping hybrid chart...")
         self.running = False
+        self.history_request = None
+        
+        # Отписываемся от шины цен
+        if self.price_monitor:
+            try:
+                self.price_monitor.unsubscribe_chart(self.price_symbol, self.on_bus_price)
+            except Exception as e:
+                logger.error(f"Error unsubscribing chart from price bus: {e}")
+            finally:
+                self.price_monitor = None
         
         # Останавливаем WebSocket соединение
-        if self.ws_mexc:
+        if self.mexc_feed:
             try:
-                self.ws_mexc.close()
+                self.mexc_feed.stop()
                 logger.debug("MEXC WebSocket closed")
             except Exception as e:
                 logger.error(f"Error closing MEXC WebSocket: {e}")
             finally:
-                self.ws_mexc = None
+                self.mexc_feed = None
+        
+        # Останавливаем опрос DEX
+        if self.dex_task:
+            self.dex_task.cancel()
+            self.dex_task = None
         
         # Останавливаем анимацию
         try:
             if hasattr(self, 'ani') and self.ani:
-                self.ani.event_source.stop()
+                self.ani.stop()
                 self.ani = None
                 logger.info("Animation stopped")
         except Exception as e:
@@ -761,569 +610,73 @@ class HybridChart:
             logger.error(f"Error stopping threads: {e}")
         
         # Очищаем данные
-        self.times.clear()
-        self.cex_prices.clear()
-        self.dex_prices.clear()
+        self.series.clear()
+        self.decimator.reset()
         self.mexc_price = None
         self.dex_price = None
         
         logger.info("Hybrid chart stopped")
-
-
-class BackgroundMonitor:
-    """Класс для фонового мониторинга всех токенов и обнаружения спредов"""
-    
-    def __init__(self, parent_gui):
-        self.parent_gui = parent_gui
-        self.running = False
-        self.monitor_thread = None
-        self.tokens_data = []
-        self.price_data = {}  # {token_name: {'cex': price, 'dex': price, 'last_update': timestamp}}
-        self.spread_threshold = 5.0  # Порог спреда в процентах
-        self.monitor_interval = 2.0  # Интервал проверки в секундах
-        self.auto_open_charts = True  # Автоматически открывать графики
-        self.disable_alerts = False  # Отключить алерты о высоком спреде
-        self.opened_charts = set()  # Множество уже открытых графиков для избежания дублирования
-        self.blacklisted_tokens = set()  # Черный список токенов
-        self.blacklist_file = 'blacklist.json'  # Файл для сохранения черного списка
-        
-        # WebSocket соединения для каждого токена
-        self.ws_connections = {}  # {token_name: websocket}
-        self.ws_threads = {}  # {token_name: thread}
-        
-        # Очередь для передачи данных в GUI поток (ограничиваем размер)
-        self.gui_queue = queue.Queue(maxsize=100)
-        
-        # История данных для всех токенов (15 минут)
-        self.history_data = {}  # {token_name: {'times': [], 'cex_prices': [], 'dex_prices': []}}
-        self.history_duration = 15 * 60  # 15 минут в секундах
-        
-        # Загружаем черный список при инициализации
-        self.load_blacklist()
-        
-        logger.info("Background monitor initialized")
-    
-    def update_history(self, token_name, cex_price=None, dex_price=None):
-        """Обновление истории данных для токена"""
-        current_time = time.time()
-        
-        if token_name not in self.history_data:
-            self.history_data[token_name] = {
-                'times': [],
-                'cex_prices': [],
-                'dex_prices': []
-            }
-        
-        history = self.history_data[token_name]
-        
-        # Добавляем новые данные
-        if cex_price is not None:
-            history['times'].append(current_time)
-            history['cex_prices'].append(cex_price)
-            # Дублируем последнюю DEX цену если нет новой
-            if len(history['dex_prices']) > 0:
-                history['dex_prices'].append(history['dex_prices'][-1])
-            else:
-                history['dex_prices'].append(None)
-        
-        if dex_price is not None:
-            # Если у нас уже есть время для CEX, обновляем DEX цену
-            if len(history['times']) > 0:
-                history['dex_prices'][-1] = dex_price
-            else:
-                # Если нет CEX данных, создаем запись только с DEX
-                history['times'].append(current_time)
-                history['cex_prices'].append(None)
-                history['dex_prices'].append(dex_price)
-        
-        # Очищаем старые данные (старше 15 минут)
-        cutoff_time = current_time - self.history_duration
-        while history['times'] and history['times'][0] < cutoff_time:
-            history['times'].pop(0)
-            history['cex_prices'].pop(0)
-            history['dex_prices'].pop(0)
-    
-    def get_history(self, token_name):
-        """Получение истории данных для токена"""
-        return self.history_data.get(token_name, {
-            'times': [],
-            'cex_prices': [],
-            'dex_prices': []
-        })
     
-    def load_tokens(self):
-        """Загрузка токенов из JSON файла"""
-        try:
-            if os.path.exists('tokens.json'):
-                with open('tokens.json', 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.tokens_data = data.get('tokens', [])
-                    logger.info(f"Loaded {len(self.tokens_data)} tokens for monitoring")
-            else:
-                self.tokens_data = []
-                logger.warning("No tokens.json file found")
-        except Exception as e:
-            logger.error(f"Error loading tokens: {e}")
-            self.tokens_data = []
+    def fetch_history(self, background_monitor, token_symbol):
+        """История токена для графика (в потоке пула)"""
+        # Архив на диске глубже истории в памяти; без архива - последние 15 минут
+        history = background_monitor.get_archived_history(
+            token_symbol, time.time() - CHART_CONFIG['history_seconds'])
+        if not len(history['times']):
+            history = background_monitor.get_history(token_symbol)
+        return history
     
-    def connect_mexc_websocket(self, token_symbol):
-        """Подключение к MEXC Futures WebSocket для конкретного токена"""
-        def on_message(ws, message):
-            try:
-                data = json.loads(message)
-                
-                # Обработка тикера (раз в ~1s)
-                if data.get("channel") == "push.ticker" and "data" in data:
-                    ticker_data = data["data"]
-                    symbol_name = f"{token_symbol}_USDT"
-                    if ticker_data.get("symbol") == symbol_name and "lastPrice" in ticker_data:
-                        price = float(ticker_data["lastPrice"])
-                        old_price = self.price_data[token_symbol].get('cex')
-                        self.price_data[token_symbol]['cex'] = price
-                        # Немедленно проверяем спред при изменении цены
-                        if old_price != price:
-                            self.check_spread_immediately(token_symbol, price, self.price_data[token_symbol].get('dex'))
-                        self.price_data[token_symbol]['cex_time'] = time.time()
-                        logger.debug(f"MEXC WebSocket Price for {token_symbol}: {price}")
-                        
-                        # Обновляем историю
-                        self.update_history(token_symbol, cex_price=price)
-                        
-                        # Отправляем сигнал для обновления таблицы (с проверкой переполнения)
-                        try:
-                            self.gui_queue.put_nowait({
-                                'type': 'price_update',
-                                'token_name': token_symbol
-                            })
-                        except queue.Full:
-                            logger.debug("GUI queue is full, skipping price update")
-                
-                # Обработка сделок (tick-by-tick)
-                elif data.get("channel") == "push.deal" and "data" in data:
-                    deals = data["data"]
-                    if isinstance(deals, list) and len(deals) > 0:
-                        last = deals[-1]
-                        p = last.get("price") or last.get("p")
-                        s = last.get("symbol") or last.get("s")
-                        symbol_name = f"{token_symbol}_USDT"
-                        if p is not None and (s is None or s == symbol_name):
-                            try:
-                                price = float(p)
-                                old_price = self.price_data[token_symbol].get('cex')
-                                self.price_data[token_symbol]['cex'] = price
-                                self.price_data[token_symbol]['cex_time'] = time.time()
-                                
-                                # Немедленно проверяем спред при каждой сделке
-                                if old_price != price:
-                                    dex_price = self.price_data[token_symbol].get('dex')
-                                    self.check_spread_immediately(token_symbol, price, dex_price)
-                                    logger.debug(f"MEXC Deal Price for {token_symbol}: {price} (change: {price - old_price if old_price else 0})")
-                                
-                                # Обновляем историю
-                                self.update_history(token_symbol, cex_price=price)
-                                
-                                # Отправляем сигнал для обновления таблицы (с проверкой переполнения)
-                                try:
-                                    self.gui_queue.put_nowait({
-                                        'type': 'price_update',
-                                        'token_name': token_symbol
-                                    })
-                                except queue.Full:
-                                    logger.debug("GUI queue is full, skipping price update")
-                            except Exception:
-                                pass
-                
-                # Обработка pong ответа
-                elif data.get("method") == "pong":
-                    pass
-                    
-            except Exception as e:
-                logger.error(f"MEXC message error for {token_symbol}: {e}")
-        
-        def on_error(ws, error):
-            logger.error(f"MEXC WebSocket error for {token_symbol}: {error}")
-        
-        def on_close(ws, close_status_code, close_msg):
-            logger.debug(f"MEXC WebSocket connection closed for {token_symbol}")
-            if self.running and token_symbol in self.ws_connections:
-                threading.Timer(5.0, lambda: self.connect_mexc_websocket(token_symbol)).start()
-        
-        def on_open(ws):
-            logger.debug(f"MEXC Futures WebSocket connected for {token_symbol}")
-            symbol_name = f"{token_symbol}_USDT"
-            subscribe_msg = {
-                "method": "sub.ticker",
-                "param": {
-                    "symbol": symbol_name
-                }
-            }
-            ws.send(json.dumps(subscribe_msg))
-            logger.info(f"Subscribed to {symbol_name} ticker")
-            
-            # Дополнительно подписываемся на сделки
-            subscribe_deal = {
-                "method": "sub.deal",
-                "param": {
-                    "symbol": symbol_name
-                }
-            }
-            try:
-                ws.send(json.dumps(subscribe_deal))
-                logger.info(f"Subscribed to {symbol_name} deals")
-            except Exception as e:
-                logger.error(f"Subscribe deal error for {token_symbol}: {e}")
-        
-        def ping_loop():
-            while self.running and token_symbol in self.ws_connections:
-                try:
-                    ping_msg = {"method": "ping"}
-                    self.ws_connections[token_symbol].send(json.dumps(ping_msg))
-                    time.sleep(10)
-                except Exception as e:
-                    logger.debug(f"MEXC ping error for {token_symbol}: {e}")
-                    break
-        
-        def run_websocket():
-            ws = websocket.WebSocketApp(
-                "wss://contract.mexc.com/edge",
-                on_message=on_message,
-                on_error=on_error,
-                on_close=on_close,
-                on_open=on_open
-            )
-            self.ws_connections[token_symbol] = ws
-            threading.Thread(target=ping_loop, daemon=True).start()
-            ws.run_forever()
-        
-        # Запускаем WebSocket в отдельном потоке
-        thread = threading.Thread(target=run_websocket, daemon=True)
-        thread.start()
-        self.ws_threads[token_symbol] = thread
-    
-    def get_dex_price(self, token_address, chain_hint=None):
-        """Получение цены с OKX Web3"""
+    def on_history_loaded(self, request, future):
+        """Передать загруженную историю в поток Tk"""
         try:
-            # Определяем блокчейн
-            chain = None
-            if chain_hint:
-                ch = chain_hint.strip().lower()
-                mapping = {
-                    'ethereum': 'ethereum', 'eth': 'ethereum', 'erc20': 'ethereum',
-                    'bsc': 'bsc', 'bep20': 'bsc', 'binance-smart-chain': 'bsc',
-                    'sol': 'solana', 'solana': 'solana',
-                    'base': 'base',
-                    'arbitrum': 'arbitrum', 'arbitrum_one': 'arbitrum', 'arbitrum one': 'arbitrum',
-                    'polygon': 'polygon', 'matic': 'polygon'
-                }
-                chain = mapping.get(ch)
-            if chain is None:
-                if len(token_address) == 44:
-                    chain = 'solana'
-                elif token_address.startswith('0x'):
-                    chain = 'bsc'
-                else:
-                    chain = 'bsc'
-            
-            okx_url = f"https://web3.okx.com/ru/token/{chain}/{token_address}"
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'ru-RU,ru;q=0.8,en-US;q=0.5,en;q=0.3',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1'
-            }
-            
-            response = requests.get(okx_url, headers=headers, timeout=10)
-            if response.status_code == 200 and response.text:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Ищем цену в различных элементах страницы
-                price_selectors = [
-                    '.token-price', '.price-value', '[data-testid="token-price"]',
-                    '.token-price-value', '.price', '.token-info-price', '.price-display'
-                ]
-                
-                for selector in price_selectors:
-                    price_elem = soup.select_one(selector)
-                    if price_elem:
-                        price_text = price_elem.get_text().strip()
-                        price_match = re.search(r'[\d,]+\.?\d*', price_text.replace(',', ''))
-                        if price_match:
-                            price = float(price_match.group().replace(',', ''))
-                            if price > 0:
-                                logger.debug(f"OKX Price ({chain.upper()}): {price}")
-                                return price
-                
-                # Поиск в title страницы
-                if soup.title:
-                    title_text = soup.title.string
-                    match = re.search(r'\$([0-9,.]+)', title_text)
-                    if match:
-                        price = float(match.group(1).replace(',', '.'))
-                        return price
-                
-                # Поиск по regex в тексте страницы
-                page_text = response.text
-                price_patterns = [
-                    r'\$?(\d{1,3}(?:,\d{3})*(?:\.\d+)?)',
-                    r'(\d+\.\d+)',
-                    r'(\d+,\d+)'
-                ]
-                
-                for pattern in price_patterns:
-                    matches = re.findall(pattern, page_text)
-                    for match in matches:
-                        try:
-                            price = float(match.replace(',', ''))
-                            if 0.000001 < price < 1000000:
-                                return price
-                        except ValueError:
-                            continue
-            return None
+            history = future.result()
         except Exception as e:
-            logger.error(f"OKX price fetch error for {token_address}: {e}")
-            return None
-    
-    def check_spread(self, token_name, cex_price, dex_price):
-        """Проверка спреда между CEX и DEX ценами"""
-        if cex_price is None or dex_price is None or cex_price <= 0 or dex_price <= 0:
-            return None
-        
-        spread = ((dex_price - cex_price) / cex_price) * 100
-        return spread
-    
-    def check_spread_immediately(self, token_name, cex_price, dex_price):
-        """Немедленная проверка спреда при изменении цены"""
-        if not cex_price or not dex_price:
+            logger.error(f"Error loading chart history: {e}")
             return
-        
-        spread = ((dex_price - cex_price) / cex_price) * 100
-        abs_spread = abs(spread)
-        
-        # Проверяем на алерт (спред больше порога)
-        if abs_spread >= self.spread_threshold:
-            # Отправляем алерт немедленно
-            try:
-                if not self.disable_alerts:
-                    alert_key = f"{token_name}_{int(abs_spread)}"
-                    if alert_key not in self.sent_alerts:
-                        message = {
-                            'type': 'high_spread',
-                            'token': token_name,
-                            'spread': spread,
-                            'cex_price': cex_price,
-                            'dex_price': dex_price,
-                            'timestamp': time.time()
-                        }
-                        self.gui_queue.put(message)
-                        self.sent_alerts.add(alert_key)
-                        logger.info(f"Immediate high spread alert: {token_name} - {spread:.2f}%")
-            except Exception as e:
-                logger.error(f"Error in immediate spread check: {e}")
-    
-    def monitor_loop(self):
-        """Основной цикл мониторинга"""
-        logger.info("Background monitoring started")
-        
-        # Подключаемся к WebSocket для всех токенов
-        for token in self.tokens_data:
-            token_name = token['name']
-            self.price_data[token_name] = {}
-            self.connect_mexc_websocket(token_name)
-            # Убираем задержку - подключаемся максимально быстро
-        
-        while self.running:
-            try:
-                current_time = time.time()
-                
-                for token in self.tokens_data:
-                    if not self.running:
-                        break
-                    
-                    token_name = token['name']
-                    
-                    # Пропускаем токены из черного списка
-                    if self.is_blacklisted(token_name):
-                        continue
-                    
-                    token_address = token['address']
-                    chain_hint = token.get('chain')
-                    
-                    # Получаем DEX цену (CEX уже получается через WebSocket)
-                    dex_price = self.get_dex_price(token_address, chain_hint)
-                    
-                    if dex_price is not None:
-                        old_dex_price = self.price_data[token_name].get('dex')
-                        self.price_data[token_name]['dex'] = dex_price
-                        self.price_data[token_name]['dex_time'] = current_time
-                        logger.debug(f"Updated DEX price for {token_name}: {dex_price}")
-                        
-                        # Немедленно проверяем спред при изменении DEX цены
-                        if old_dex_price != dex_price:
-                            cex_price = self.price_data[token_name].get('cex')
-                            self.check_spread_immediately(token_name, cex_price, dex_price)
-                        
-                        # Обновляем историю
-                        self.update_history(token_name, dex_price=dex_price)
-                        
-                        # Отправляем сигнал для обновления таблицы (с проверкой переполнения)
-                        try:
-                            self.gui_queue.put_nowait({
-                                'type': 'price_update',
-                                'token_name': token_name
-                            })
-                        except queue.Full:
-                            logger.debug("GUI queue is full, skipping price update")
-                    
-                    # Проверяем спред
-                    cex_price = self.price_data[token_name].get('cex')
-                    if cex_price is not None and dex_price is not None:
-                        spread = self.check_spread(token_name, cex_price, dex_price)
-                        if spread is not None:
-                            logger.debug(f"{token_name}: CEX={cex_price:.6f}, DEX={dex_price:.6f}, Spread={spread:.2f}%")
-                            
-                            # Проверяем превышение порога
-                            if abs(spread) >= self.spread_threshold:
-                                chart_key = f"{token_name}_{abs(spread):.1f}"
-                                if chart_key not in self.opened_charts and self.auto_open_charts:
-                                    logger.warning(f"High spread detected for {token_name}: {spread:.2f}%")
-                                    
-                                    # Отправляем сигнал в GUI для открытия графика только если алерты не отключены
-                                    if not self.disable_alerts:
-                                        try:
-                                            self.gui_queue.put_nowait({
-                                                'type': 'high_spread',
-                                                'token': token,
-                                                'spread': spread,
-                                                'cex_price': cex_price,
-                                                'dex_price': dex_price
-                                            })
-                                        except queue.Full:
-                                            logger.debug("GUI queue is full, skipping high spread alert")
-                                    
-                                    self.opened_charts.add(chart_key)
-                                    
-                                    # Удаляем из множества через 5 минут
-                                    threading.Timer(300, lambda: self.opened_charts.discard(chart_key)).start()
-                
-                # Убираем sleep - работаем в реальном времени
-                # time.sleep(0.1)  # Убрано для максимальной скорости
-                
-            except Exception as e:
-                logger.error(f"Error in monitor loop: {e}")
-                time.sleep(5)  # Пауза при ошибке
-        
-        logger.info("Background monitoring stopped")
+        try:
+            self.fig.canvas.get_tk_widget().after(0, self.apply_history, request, history)
+        except (RuntimeError, tk.TclError) as e:
+            logger.debug(f"Chart closed before history loaded: {e}")
     
-    def start_monitoring(self):
-        """Запуск мониторинга"""
-        if self.running:
-            logger.warning("Monitoring is already running")
-            return
-        
-        self.load_tokens()
-        if not self.tokens_data:
-            logger.warning("No tokens to monitor")
+    def apply_history(self, request, history):
+        """Вставить историю перед точками, накопленными с открытия окна (поток Tk)"""
+        if request is not self.history_request or not self.running or not len(history['times']):
             return
-        
+        logger.info(f"Loading {len(history['times'])} historical data points")
+        # Unix время -> числа дат matplotlib (векторно)
+        times = epoch_to_datenum(history['times'])
+        live_times, live_cex, live_dex = (view.copy() for view in self.series.views())
+        newer = live_times > times[-1]
+        self.series.clear()
+        self.series.extend(times, history['cex_prices'], history['dex_prices'])
+        self.series.extend(live_times[newer], live_cex[newer], live_dex[newer])
+        self.decimator.reset()
+        self.frame_prices = None  # Перерисовать кадр с историей
+        
+        # Синхронизируем данные, если живые цены ещё не пришли
+        cex, dex = history['cex_prices'][-1], history['dex_prices'][-1]
+        if self.mexc_price is None and np.isfinite(cex):
+            self.mexc_price = float(cex)
+        if self.dex_price is None and np.isfinite(dex):
+            self.dex_price = float(dex)
+    
+    def reset(self):
+        """Подготовка остановленного графика к новому токену (окно из пула)"""
         self.running = True
-        self.monitor_thread = threading.Thread(target=self.monitor_loop, daemon=True)
-        self.monitor_thread.start()
-        logger.info(f"Started monitoring {len(self.tokens_data)} tokens")
-    
-    def stop_monitoring(self):
-        """Остановка мониторинга"""
-        if not self.running:
-            return
-        
-        logger.info("Stopping background monitoring...")
-        self.running = False
-        
-        # Закрываем все WebSocket соединения
-        for token_name, ws in list(self.ws_connections.items()):
-            try:
-                if ws:
-                    ws.close()
-                    logger.debug(f"Closed WebSocket for {token_name}")
-            except Exception as e:
-                logger.error(f"Error closing WebSocket for {token_name}: {e}")
-        
-        # Очищаем соединения
-        self.ws_connections.clear()
-        self.ws_threads.clear()
-        
-        # Останавливаем основной поток мониторинга
-        if self.monitor_thread and self.monitor_thread.is_alive():
-            self.monitor_thread.join(timeout=3)
-            if self.monitor_thread.is_alive():
-                logger.warning("Monitor thread did not stop gracefully")
-        
-        # Очищаем все данные
-        self.price_data.clear()
-        self.history_data.clear()
-        
-        logger.info("Background monitoring stopped")
-    
-    def update_settings(self, spread_threshold=None, monitor_interval=None, auto_open_charts=None, disable_alerts=None):
-        """Обновление настроек мониторинга"""
-        if spread_threshold is not None:
-            self.spread_threshold = spread_threshold
-        if monitor_interval is not None:
-            self.monitor_interval = monitor_interval
-        if auto_open_charts is not None:
-            self.auto_open_charts = auto_open_charts
-        if disable_alerts is not None:
-            self.disable_alerts = disable_alerts
-        logger.info(f"Monitor settings updated: threshold={self.spread_threshold}%, interval={self.monitor_interval}s, auto_open={self.auto_open_charts}, disable_alerts={self.disable_alerts}")
-    
-    def add_to_blacklist(self, token_name):
-        """Добавить токен в черный список"""
-        self.blacklisted_tokens.add(token_name)
-        self.save_blacklist()  # Сохраняем изменения
-        logger.info(f"Token {token_name} added to blacklist")
-    
-    def remove_from_blacklist(self, token_name):
-        """Удалить токен из черного списка"""
-        self.blacklisted_tokens.discard(token_name)
-        self.save_blacklist()  # Сохраняем изменения
-        logger.info(f"Token {token_name} removed from blacklist")
-    
-    def is_blacklisted(self, token_name):
-        """Проверить, находится ли токен в черном списке"""
-        return token_name in self.blacklisted_tokens
-    
-    def get_blacklisted_tokens(self):
-        """Получить список токенов в черном списке"""
-        return list(self.blacklisted_tokens)
-    
-    def load_blacklist(self):
-        """Загрузка черного списка из файла"""
-        try:
-            if os.path.exists(self.blacklist_file):
-                with open(self.blacklist_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    self.blacklisted_tokens = set(data.get('blacklisted_tokens', []))
-                    logger.info(f"Loaded blacklist with {len(self.blacklisted_tokens)} tokens")
-            else:
-                self.blacklisted_tokens = set()
-                logger.info("No blacklist file found, starting with empty blacklist")
-        except Exception as e:
-            logger.error(f"Error loading blacklist: {e}")
-            self.blacklisted_tokens = set()
-    
-    def save_blacklist(self):
-        """Сохранение черного списка в файл"""
-        try:
-            data = {
-                'blacklisted_tokens': list(self.blacklisted_tokens),
-                'last_updated': time.time()
-            }
-            with open(self.blacklist_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            logger.info(f"Blacklist saved with {len(self.blacklisted_tokens)} tokens")
-        except Exception as e:
-            logger.error(f"Error saving blacklist: {e}")
+        self.frame_prices = None
+        self.pan_start = None
+        self.pan_active = False
+        self.manual_zoom = False
+        self.manual_xlim = None
+        self.manual_ylim = None
+        self.line_cex.set_data([], [])
+        self.line_dex.set_data([], [])
+        self.cex_guide.set_ydata([np.nan, np.nan])
+        self.dex_guide.set_ydata([np.nan, np.nan])
+        for text in (self.spread_text, self.cex_price_label, self.dex_price_label,
+                     self.cex_badge, self.dex_badge):
+            text.set_text('')
+        self.ax.set_title('Loading...', color='white', fontsize=16, fontweight='bold')
 
 
 class TokenDialog:
@@ -1671,6 +1024,12 @@ class MonitorSettingsDialog:
 
 class ChartGUI:
     def __init__(self):
+        # Мониторинг (подписки WebSocket, опрос DEX) запускаем до построения окна
+        self.background_monitor = BackgroundMonitor(self)
+        self.background_monitor.start_monitoring(warm=False)
+        logger.info("Background monitoring started automatically on startup")
+        startup_profile.mark('monitoring started')
+        
         self.root = tk.Tk()
         self.root.title("Hybrid Price Chart (MEXC Futures + OKX)")
         self.root.geometry("1000x700")
@@ -1678,8 +1037,10 @@ class ChartGUI:
         # Тёмная шапка окна (Windows)
         enable_dark_title_bar(self.root)
         
-        # Список активных графиков
+        # Список активных графиков; кадры всем окнам раздаёт один таймер
         self.charts = []
+        self.chart_pool = []  # Заранее построенные скрытые окна графиков [(chart, window)]
+        self.render_scheduler = ChartRenderScheduler(self.root)
         self._double_click_handled = False  # Флаг для обработки двойного клика
         self.open_chart_count = 0  # Счетчик открытых окон графиков
         self.charts_always_on_top = True  # Флаг для окон поверх всех
@@ -1687,12 +1048,14 @@ class ChartGUI:
         # Загружаем токены из JSON
         self.tokens_data = self.load_tokens()
         
-        # Инициализируем фоновый мониторинг
-        self.background_monitor = BackgroundMonitor(self)
-        
         # Отслеживание отправленных алертов для предотвращения спама
         self.sent_alerts = set()  # Множество уже отправленных алертов
         
+        # Кэш строк таблицы спредов для инкрементального обновления
+        self.spread_rows = {}  # {token_name: (values, tags)} - то, что сейчас в таблице
+        self.spread_order = []  # Порядок строк в таблице
+        self.spread_redraw_pending = False
+        
         # Обработчик закрытия окна
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
         
@@ -1700,14 +1063,29 @@ class ChartGUI:
         self.setup_theme()
         
         self.setup_ui()
+        startup_profile.mark('ui built')
         
-        # Запускаем фоновый мониторинг автоматически
-        self.background_monitor.start_monitoring()
-        logger.info("Background monitoring started automatically on startup")
+        # История из архива - в фоне, когда окно уже показано
+        self.root.after_idle(self.background_monitor.warm_async)
         
         # Запускаем обработку очереди мониторинга
         self.last_table_update = 0
+        self.last_queue_stats = time.time()
+        self.dirty_tokens = set()  # Токены с новыми ценами с прошлого обновления таблицы
+        self.price_versions = {}  # {token_name: версия цены, уже учтённая GUI}
         self.process_monitor_queue()
+        
+        # Окна графиков для алертов строим заранее, когда главное окно уже показано;
+        # matplotlib к этому времени загружается в фоновом потоке
+        self.root.after(CHART_CONFIG['window_pool_refill_delay'], self.preload_charts)
+        
+        if startup_profile.enabled:
+            self.root.after(CHART_CONFIG['startup_profile_timeout'], startup_profile.report)
+    
+    def preload_charts(self):
+        """Загрузить matplotlib в фоне и построить пул окон графиков"""
+        threading.Thread(target=get_pyplot, name="matplotlib-preload", daemon=True).start()
+        self.fill_chart_pool()
     
     def load_tokens(self):
         """Загрузка токенов из JSON файла"""
@@ -1785,23 +1163,34 @@ class ChartGUI:
     def process_monitor_queue(self):
         """Обработка очереди сообщений от фонового мониторинга"""
         try:
-            # Обрабатываем только одно сообщение за раз, чтобы не блокировать GUI
-            message = self.background_monitor.gui_queue.get_nowait()
-            
-            if message['type'] == 'high_spread':
-                self.handle_high_spread_alert(message)
-            elif message['type'] == 'price_update':
-                # Обновляем таблицу с ограничением частоты (не чаще раза в секунду)
-                current_time = time.time()
-                if hasattr(self, 'spread_tree') and current_time - self.last_table_update > 1.0:
-                    self.refresh_spread_table()
-                    self.last_table_update = current_time
-                
-        except queue.Empty:
-            pass
+            # Забираем всё накопленное: алерты идут первыми
+            for message in self.background_monitor.gui_queue.drain():
+                if message['type'] == 'high_spread':
+                    self.handle_high_spread_alert(message)
+            
+            # Токены, чьи цены изменились с прошлого кадра
+            self.dirty_tokens.update(self.background_monitor.price_channel.changed(self.price_versions))
+            if self.dirty_tokens:
+                startup_profile.mark('first price')
+            
+            # Обновляем таблицу с ограничением частоты (не чаще раза в секунду)
+            current_time = time.time()
+            if self.dirty_tokens and hasattr(self, 'spread_tree') and current_time - self.last_table_update > 1.0:
+                self.dirty_tokens.clear()
+                self.refresh_spread_table()
+                self.last_table_update = current_time
+            
+            if current_time - self.last_queue_stats > 60:
+                stats = self.background_monitor.gui_queue.stats()
+                logger.info(f"GUI queue: depth={stats['depth']}, delivered={stats['delivered']}, "
+                            f"dropped={stats['dropped']}, latency avg={stats['avg_latency'] * 1000:.0f}ms "
+                            f"max={stats['max_latency'] * 1000:.0f}ms")
+                self.last_queue_stats = current_time
+        except Exception as e:
+            logger.error(f"Error processing monitor queue: {e}")
         
-        # Планируем следующую проверку с разумной задержкой
-        self.root.after(500, self.process_monitor_queue)
+        # Планируем следующую проверку
+        self.root.after(200, self.process_monitor_queue)
     
     def handle_high_spread_alert(self, message):
         """Обработка уведомления о высоком спреде"""
@@ -1819,6 +1208,7 @@ class ChartGUI:
             # Копируем тикер в буфер обмена
             ticker = f"{token['name']}USDT"
             try:
+                import pyperclip
                 pyperclip.copy(ticker)
                 logger.info(f"Copied ticker to clipboard: {ticker}")
             except Exception as e:
@@ -1838,11 +1228,17 @@ class ChartGUI:
             
             click_logger.info(f"Opening chart for {symbol} (address: {address}, chain: {chain_hint})")
             
-            # Создаем новое окно для графика
-            chart_window = tk.Toplevel(self.root)
+            # Берём готовое скрытое окно из пула; пустой пул - строим новое
+            if self.chart_pool:
+                chart, chart_window = self.chart_pool.pop()
+                chart.reset()
+                self.restore_chart_sliders(chart)
+                click_logger.info(f"Using pre-built chart window ({len(self.chart_pool)} left in pool)")
+            else:
+                chart, chart_window = self.build_chart_window()
+            
             chart_window.title(f"{symbol} Price Chart (Auto-opened)")
-            chart_window.geometry("500x350")
-            chart_window.configure(bg='#2b2b2b')
+            chart.status_label.config(text=f"Auto-opened chart for {symbol} (High spread detected)")
             
             # Позиционируем окно в правом верхнем углу экрана с каскадным расположением
             screen_width = chart_window.winfo_screenwidth()
@@ -1859,73 +1255,130 @@ class ChartGUI:
             # Увеличиваем счетчик открытых окон
             self.open_chart_count += 1
             
-            # Тёмная шапка окна (Windows)
-            enable_dark_title_bar(chart_window)
-            
             # Применяем настройку "поверх всех окон" если она включена
-            if self.charts_always_on_top:
-                chart_window.attributes('-topmost', True)
-            
-            # Создаем график
-            chart = HybridChart(chart_window)
-            chart.current_symbol = symbol
-            
-            # Встраиваем matplotlib в tkinter
-            canvas = FigureCanvasTkAgg(chart.fig, chart_window)
-            canvas.draw()
-            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-            
-            # Панель управления
-            control_frame = ttk.Frame(chart_window)
-            control_frame.pack(fill=tk.X, padx=10, pady=5)
-            
-            stop_button = ttk.Button(control_frame, text="Stop Chart", 
-                                   command=lambda: self.stop_chart(chart, chart_window))
-            stop_button.pack(side=tk.LEFT)
-            
-            # Кнопки управления масштабом
-            zoom_frame = ttk.Frame(control_frame)
-            zoom_frame.pack(side=tk.LEFT, padx=(20, 0))
-            
-            ttk.Button(zoom_frame, text="🔍+", 
-                      command=lambda: self.zoom_in(chart)).pack(side=tk.LEFT, padx=2)
-            ttk.Button(zoom_frame, text="🔍-", 
-                      command=lambda: self.zoom_out(chart)).pack(side=tk.LEFT, padx=2)
-            ttk.Button(zoom_frame, text="🏠 Reset", 
-                      command=lambda: self.reset_zoom(chart)).pack(side=tk.LEFT, padx=2)
-            
-            # Подсказка
-            help_label = ttk.Label(control_frame, text="💡 Mouse wheel: zoom | Left drag: pan", 
-                                 font=('Arial', 8), foreground='gray')
-            help_label.pack(side=tk.LEFT, padx=(20, 0))
-            
-            status_label = ttk.Label(control_frame, text=f"Auto-opened chart for {symbol} (High spread detected)")
-            status_label.pack(side=tk.LEFT, padx=20)
-            
-            # Панель ползунков
-            sliders_frame = ttk.LabelFrame(chart_window, text="Chart Controls", padding="10")
-            sliders_frame.pack(fill=tk.X, padx=10, pady=5)
-            
-            # Создаем ползунки
-            self.create_chart_sliders(sliders_frame, chart)
-            
-            # Обработчик закрытия окна графика
-            chart_window.protocol("WM_DELETE_WINDOW", lambda: self.close_chart_window(chart, chart_window))
+            chart_window.attributes('-topmost', self.charts_always_on_top)
+            chart_window.deiconify()
             
             # Запускаем график
+            chart.current_symbol = symbol
             chart.current_chain_hint = chain_hint
-            chart.start(address, symbol, self.background_monitor)
+            chart.start(address, symbol, self.background_monitor, scheduler=self.render_scheduler)
             
             # Добавляем в список активных графиков
             self.charts.append((chart, chart_window))
             
             click_logger.info(f"Successfully opened chart for {symbol}")
             
+            # Пул пополняется в фоне, когда новое окно уже отрисовано
+            self.root.after(CHART_CONFIG['window_pool_refill_delay'], self.fill_chart_pool)
+            
         except Exception as e:
             click_logger.error(f"Error opening chart for {token['name']}: {e}")
             click_logger.error(f"Exception details: {str(e)}")
             messagebox.showerror("Error", f"Failed to open chart: {str(e)}")
     
+    def build_chart_window(self):
+        """Скрытое окно графика: Toplevel, фигура, canvas, панель управления и ползунки"""
+        chart_window = tk.Toplevel(self.root)
+        chart_window.withdraw()
+        chart_window.title("Price Chart")
+        chart_window.geometry("500x350")
+        chart_window.configure(bg='#2b2b2b')
+        
+        # Тёмная шапка окна (Windows)
+        enable_dark_title_bar(chart_window)
+        
+        # Создаем график
+        chart = HybridChart(chart_window)
+        
+        # Встраиваем matplotlib в tkinter
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        canvas = FigureCanvasTkAgg(chart.fig, chart_window)
+        canvas.draw()
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        
+        # Панель управления
+        control_frame = ttk.Frame(chart_window)
+        control_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        stop_button = ttk.Button(control_frame, text="Stop Chart", 
+                               command=lambda: self.stop_chart(chart, chart_window))
+        stop_button.pack(side=tk.LEFT)
+        
+        # Кнопки управления масштабом
+        zoom_frame = ttk.Frame(control_frame)
+        zoom_frame.pack(side=tk.LEFT, padx=(20, 0))
+        
+        ttk.Button(zoom_frame, text="🔍+", 
+                  command=lambda: self.zoom_in(chart)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(zoom_frame, text="🔍-", 
+                  command=lambda: self.zoom_out(chart)).pack(side=tk.LEFT, padx=2)
+        ttk.Button(zoom_frame, text="🏠 Reset", 
+                  command=lambda: self.reset_zoom(chart)).pack(side=tk.LEFT, padx=2)
+        
+        # Подсказка
+        help_label = ttk.Label(control_frame, text="💡 Mouse wheel: zoom | Left drag: pan", 
+                             font=('Arial', 8), foreground='gray')
+        help_label.pack(side=tk.LEFT, padx=(20, 0))
+        
+        chart.status_label = ttk.Label(control_frame, text="")
+        chart.status_label.pack(side=tk.LEFT, padx=20)
+        
+        # Панель ползунков
+        sliders_frame = ttk.LabelFrame(chart_window, text="Chart Controls", padding="10")
+        sliders_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        # Создаем ползунки
+        self.create_chart_sliders(sliders_frame, chart)
+        
+        # Обработчик закрытия окна графика
+        chart_window.protocol("WM_DELETE_WINDOW", lambda: self.close_chart_window(chart, chart_window))
+        return chart, chart_window
+    
+    def fill_chart_pool(self):
+        """Достроить пул скрытых окон графиков - по одному окну за вызов"""
+        if len(self.chart_pool) >= CHART_CONFIG['window_pool_size']:
+            return
+        if not pyplot_loaded():
+            # Ждём фоновую загрузку matplotlib, чтобы не блокировать GUI
+            self.root.after(200, self.fill_chart_pool)
+            return
+        try:
+            self.chart_pool.append(self.build_chart_window())
+        except Exception as e:
+            logger.error(f"Error pre-building chart window: {e}")
+            return
+        if len(self.chart_pool) < CHART_CONFIG['window_pool_size']:
+            self.root.after(CHART_CONFIG['window_pool_refill_delay'], self.fill_chart_pool)
+    
+    def release_chart_window(self, chart, chart_window):
+        """Вернуть остановленное окно графика в пул или закрыть его"""
+        if len(self.chart_pool) < CHART_CONFIG['window_pool_size']:
+            chart_window.withdraw()
+            self.chart_pool.append((chart, chart_window))
+        else:
+            self.destroy_chart_window(chart, chart_window)
+    
+    def destroy_chart_window(self, chart, chart_window):
+        """Закрыть окно графика и освободить его фигуру в pyplot"""
+        chart_window.destroy()
+        get_pyplot().close(chart.fig)
+    
+    def restore_chart_sliders(self, chart):
+        """Вернуть ползунки окна из пула к значениям нового окна:
+        настройки прошлого токена не переходят к следующему"""
+        changed = [var_name for var_name, default_val in chart.slider_defaults.items()
+                   if chart.slider_vars[var_name].get() != default_val]
+        if not changed:
+            return
+        for var_name in changed:
+            default_val = chart.slider_defaults[var_name]
+            chart.slider_vars[var_name].set(default_val)
+            if var_name in chart.slider_labels:
+                chart.slider_labels[var_name].config(text=f"{default_val:.2f}")
+        chart.pending_styles.clear()
+        self.reset_all_sliders(chart)
+    
     def close_chart_window(self, chart, chart_window):
         """Закрытие окна графика с уменьшением счетчика"""
         # Уменьшаем счетчик открытых окон
@@ -1960,6 +1413,9 @@ class ChartGUI:
         if self.background_monitor.running:
             messagebox.showinfo("Info", "Background monitoring is already running")
             return
+        if self.background_monitor.stopping:
+            messagebox.showinfo("Info", "Background monitoring is still stopping, try again in a moment")
+            return
         
         self.background_monitor.start_monitoring()
         self.start_monitor_button.config(text="Start Background Monitor ✓")
@@ -1972,11 +1428,25 @@ class ChartGUI:
             messagebox.showinfo("Info", "Background monitoring is not running")
             return
         
-        self.background_monitor.stop_monitoring()
+        # Ожидание задач и сброс архива идут в фоне; итог сообщаем через after
+        self.status_label.config(text="Stopping background monitoring...")
+        self.background_monitor.stop_monitoring(
+            on_stopped=lambda: self.call_in_gui(self.on_background_monitoring_stopped))
         self.start_monitor_button.config(text="Start Background Monitor")
+        logger.info("Background monitoring stop requested from GUI")
+    
+    def on_background_monitoring_stopped(self):
+        """Мониторинг остановлен полностью (вызывается в потоке Tk)"""
         self.status_label.config(text="Background monitoring stopped")
         logger.info("Background monitoring stopped from GUI")
     
+    def call_in_gui(self, func):
+        """Выполнить func в потоке Tk (из любого потока); окно уже закрыто - ничего не делаем"""
+        try:
+            self.root.after(0, func)
+        except (RuntimeError, tk.TclError):
+            pass
+    
     def open_monitor_settings(self):
         """Открытие настроек мониторинга"""
         MonitorSettingsDialog(self.root, self.background_monitor)
@@ -2000,30 +1470,23 @@ class ChartGUI:
     
     
     def update_spread_table(self):
-        """Обновление таблицы спредов"""
-        # Сохраняем текущее выделение
-        selected_items = self.spread_tree.selection()
-        selected_token = None
-        if selected_items:
-            values = self.spread_tree.item(selected_items[0], 'values')
-            if values:
-                selected_token = values[0]  # Сохраняем имя токена
-        
-        # Очищаем таблицу
-        for item in self.spread_tree.get_children():
-            self.spread_tree.delete(item)
-        
-        # Собираем данные всех токенов с вычисленными спредами
-        token_data_list = []
-        
+        """Запросить обновление таблицы спредов (все запросы за кадр - одна перерисовка)"""
+        if self.spread_redraw_pending:
+            return
+        self.spread_redraw_pending = True
+        self.root.after_idle(self.redraw_spread_table)
+    
+    def build_spread_rows(self):
+        """Строки таблицы спредов, отсортированные по абсолютному спреду"""
+        rows = []
+        seen = set()
         for token in self.tokens_data:
             token_name = token['name']
             
-            # Пропускаем токены из черного списка
-            if self.background_monitor.is_blacklisted(token_name):
+            # Пропускаем токены из черного списка и повторы
+            if token_name in seen or self.background_monitor.is_blacklisted(token_name):
                 continue
-                
-            chain = token['chain']
+            seen.add(token_name)
             
             # Получаем данные о ценах из мониторинга
             price_data = self.background_monitor.price_data.get(token_name, {})
@@ -2034,8 +1497,6 @@ class ChartGUI:
             cex_str = f"{cex_price:.6f}" if cex_price else "N/A"
             dex_str = f"{dex_price:.6f}" if dex_price else "N/A"
             
-            logger.debug(f"Token {token_name}: CEX={cex_price}, DEX={dex_price}")
-            
             # Вычисляем спред
             if cex_price and dex_price and cex_price > 0:
                 spread = ((dex_price - cex_price) / cex_price) * 100
@@ -2063,44 +1524,88 @@ class ChartGUI:
                 status = "No data"
                 tags = ('no_data',)
             
-            # Добавляем данные в список для сортировки
-            token_data_list.append({
-                'token_name': token_name,
-                'chain': chain,
-                'cex_str': cex_str,
-                'dex_str': dex_str,
-                'spread_str': spread_str,
-                'status': status,
-                'tags': tags,
-                'abs_spread': abs_spread
-            })
+            values = (token_name, token['chain'], cex_str, dex_str, spread_str, status)
+            rows.append((abs_spread, token_name, values, tags))
         
         # Сортируем по абсолютному значению спреда (от большего к меньшему)
-        token_data_list.sort(key=lambda x: x['abs_spread'], reverse=True)
-        
-        # Добавляем отсортированные данные в таблицу
-        click_logger.info(f"=== UPDATING SPREAD TABLE ===")
-        click_logger.info(f"Total tokens to add: {len(token_data_list)}")
-        for token_data in token_data_list:
-            click_logger.info(f"Adding token: {token_data['token_name']} with tags: {token_data['tags']} (spread: {token_data['spread_str']})")
-            item_id = self.spread_tree.insert('', 'end', values=(
-                token_data['token_name'],
-                token_data['chain'],
-                token_data['cex_str'],
-                token_data['dex_str'],
-                token_data['spread_str'],
-                token_data['status']
-            ), tags=token_data['tags'])
-            
-            # Восстанавливаем выделение для выбранного токена
-            if selected_token and token_data['token_name'] == selected_token:
-                self.spread_tree.selection_set(item_id)
-        
-        # Настраиваем цвета для разных статусов
-        self.spread_tree.tag_configure('high_spread', background='#ff4444', foreground='white')
-        self.spread_tree.tag_configure('medium_spread', background='#ffaa44', foreground='black')
-        self.spread_tree.tag_configure('low_spread', background='#44ff44', foreground='black')
-        self.spread_tree.tag_configure('no_data', background='#666666', foreground='white')
+        rows.sort(key=lambda row: row[0], reverse=True)
+        return rows
+    
+    @staticmethod
+    def stable_rows(old_order, new_order):
+        """Строки, которые можно не двигать: наибольшая подпоследовательность,
+        идущая в старом порядке так же, как в новом"""
+        old_index = {name: i for i, name in enumerate(old_order)}
+        tails = []  # tails[k] - минимальный старый индекс, которым заканчивается цепочка длины k+1
+        tail_names = []
+        prev = {}
+        for name in new_order:
+            i = old_index[name]
+            k = bisect.bisect_left(tails, i)
+            prev[name] = tail_names[k - 1] if k else None
+            if k == len(tails):
+                tails.append(i)
+                tail_names.append(name)
+            else:
+                tails[k] = i
+                tail_names[k] = name
+        stay = set()
+        name = tail_names[-1] if tail_names else None
+        while name is not None:
+            stay.add(name)
+            name = prev[name]
+        return stay
+    
+    def redraw_spread_table(self):
+        """Применить к таблице только изменения: ячейки, новые/удалённые строки, порядок.
+        id строки - имя токена, поэтому выделение сохраняется само"""
+        self.spread_redraw_pending = False
+        if not hasattr(self, 'spread_tree'):
+            return
+        tree = self.spread_tree
+        rows = self.build_spread_rows()
+        wanted = {row[1] for row in rows}
+        
+        # Удаляем строки пропавших токенов
+        for token_name in [name for name in self.spread_rows if name not in wanted]:
+            del self.spread_rows[token_name]
+            self.spread_order.remove(token_name)
+            if tree.exists(token_name):
+                tree.delete(token_name)
+        
+        changed = 0
+        for _, token_name, values, tags in rows:
+            cached = self.spread_rows.get(token_name)
+            if cached is None:
+                tree.insert('', 'end', iid=token_name, values=values, tags=tags)
+                self.spread_order.append(token_name)
+            elif cached != (values, tags):
+                tree.item(token_name, values=values, tags=tags)
+            else:
+                continue
+            self.spread_rows[token_name] = (values, tags)
+            changed += 1
+        
+        # Перемещаем только строки, сменившие позицию
+        moved = 0
+        new_order = [row[1] for row in rows]
+        if new_order != self.spread_order:
+            order = self.spread_order
+            stay = self.stable_rows(order, new_order)
+            for index, token_name in enumerate(new_order):
+                if token_name in stay:
+                    continue
+                order.remove(token_name)
+                position = order.index(new_order[index - 1]) + 1 if index else 0
+                order.insert(position, token_name)
+                tree.move(token_name, '', position)
+                moved += 1
+        
+        if changed or moved:
+            logger.debug(f"Spread table: {changed} rows updated, {moved} moved")
+        if self.spread_rows and startup_profile.enabled:
+            startup_profile.mark('first spread row')
+            startup_profile.report()
     
     def send_spread_alert(self, token, spread, cex_price, dex_price):
         """Отправка алерта о высоком спреде из таблицы"""
@@ -2119,8 +1624,7 @@ class ChartGUI:
         self.sent_alerts.add(alert_key)
         
         # Очищаем старые алерты через 5 минут
-        import threading
-        threading.Timer(300, lambda: self.sent_alerts.discard(alert_key)).start()
+        self.root.after(300000, lambda: self.sent_alerts.discard(alert_key))
         
         # Звуковой сигнал
         try:
@@ -2151,6 +1655,7 @@ class ChartGUI:
             # Копируем тикер в буфер обмена
             ticker = f"{token['name']}USDT"
             try:
+                import pyperclip
                 pyperclip.copy(ticker)
                 logger.info(f"Copied ticker to clipboard: {ticker}")
             except Exception as e:
@@ -2188,6 +1693,7 @@ class ChartGUI:
                 # Копируем тикер в буфер обмена (например, RAILUSDT)
                 ticker = f"{token_name}USDT"
                 try:
+                    import pyperclip
                     pyperclip.copy(ticker)
                     click_logger.info(f"Copied ticker to clipboard: {ticker}")
                 except Exception as e:
@@ -2271,6 +1777,8 @@ class ChartGUI:
             else:
                 self.tokens_data = []
             self.update_token_combobox()
+            # Обновляем подписки фонового мониторинга без переподключения
+            self.background_monitor.reload_tokens()
             # восстановить выбор, если он всё ещё существует
             token_names = [f"{t['name']} ({t['chain']})" for t in self.tokens_data]
             if previous_selection in token_names:
@@ -2294,6 +1802,7 @@ class ChartGUI:
             self.tokens_data.append(token)
             self.save_tokens()
             self.update_token_combobox()
+            self.background_monitor.reload_tokens()
             messagebox.showinfo("Success", f"Token {token['name']} added successfully!")
     
     def remove_token(self):
@@ -2307,6 +1816,7 @@ class ChartGUI:
             self.tokens_data = [t for t in self.tokens_data if f"{t['name']} ({t['chain']})" != selected]
             self.save_tokens()
             self.update_token_combobox()
+            self.background_monitor.reload_tokens()
             messagebox.showinfo("Success", "Token removed successfully!")
     
     def update_token_combobox(self):
@@ -2439,6 +1949,12 @@ class ChartGUI:
         self.spread_tree.bind('<Button-1>', self.on_spread_table_single_click)
         self.spread_tree.bind('<Double-1>', self.on_spread_table_double_click)
         
+        # Настраиваем цвета для разных статусов
+        self.spread_tree.tag_configure('high_spread', background='#ff4444', foreground='white')
+        self.spread_tree.tag_configure('medium_spread', background='#ffaa44', foreground='black')
+        self.spread_tree.tag_configure('low_spread', background='#44ff44', foreground='black')
+        self.spread_tree.tag_configure('no_data', background='#666666', foreground='white')
+        
         # Инициализируем таблицу токенами
         self.update_spread_table()
         
@@ -2523,8 +2039,8 @@ class ChartGUI:
             # Удаляем из списка активных графиков
             self.charts = [(c, w) for c, w in self.charts if w != window]
             
-            # Закрываем окно
-            window.destroy()
+            # Скрываем окно в пул для следующего графика (или закрываем)
+            self.release_chart_window(chart, window)
             
             self.status_label.config(text="Chart stopped")
             logger.info("Chart stopped successfully")
@@ -2879,6 +2395,13 @@ class ChartGUI:
             'subplot_adjust_hspace': 0.2
         }
         
+        # Значения всех ползунков существуют сразу (update_* читают их),
+        # виджеты - только у открытых вкладок
+        for var_name, default_val in default_values.items():
+            chart.slider_vars[var_name] = tk.DoubleVar(value=default_val)
+        # Значения нового окна: к ним возвращается окно из пула
+        chart.slider_defaults = dict(default_values)
+        
         # Создаем систему вкладок для организации ползунков
         notebook = ttk.Notebook(parent_frame)
         notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
@@ -2915,29 +2438,21 @@ class ChartGUI:
         system_frame = ttk.Frame(notebook)
         notebook.add(system_frame, text="⚙️ Система")
         
-        # === ВКЛАДКА 1: ОСНОВНЫЕ НАСТРОЙКИ ===
-        self.create_basic_sliders(basic_frame, chart, default_values)
-        
-        # === ВКЛАДКА 2: ЦВЕТА ===
-        self.create_color_sliders(colors_frame, chart, default_values)
-        
-        # === ВКЛАДКА 3: РАЗМЕРЫ ЭЛЕМЕНТОВ ===
-        self.create_size_sliders(sizes_frame, chart, default_values)
-        
-        # === ВКЛАДКА 4: РАЗМЕРЫ ПАНЕЛЕЙ ===
-        self.create_panel_sliders(panels_frame, chart, default_values)
-        
-        # === ВКЛАДКА 5: РАЗМЕРЫ ОКОН ===
-        self.create_window_sliders(windows_frame, chart, default_values)
-        
-        # === ВКЛАДКА 6: РАЗМЕРЫ СООБЩЕНИЙ ===
-        self.create_message_sliders(messages_frame, chart, default_values)
-        
-        # === ВКЛАДКА 7: РАЗМЕРЫ ТОРГОВЫХ ЭЛЕМЕНТОВ ===
-        self.create_trading_sliders(trading_frame, chart, default_values)
-        
-        # === ВКЛАДКА 8: РАЗМЕРЫ СИСТЕМНЫХ ЭЛЕМЕНТОВ ===
-        self.create_system_sliders(system_frame, chart, default_values)
+        # Содержимое вкладок строится при первом открытии: окно графика
+        # показывается сразу, не дожидаясь сотни виджетов ползунков
+        chart.slider_tabs = {
+            str(basic_frame): self.create_basic_sliders,
+            str(colors_frame): self.create_color_sliders,
+            str(sizes_frame): self.create_size_sliders,
+            str(panels_frame): self.create_panel_sliders,
+            str(windows_frame): self.create_window_sliders,
+            str(messages_frame): self.create_message_sliders,
+            str(trading_frame): self.create_trading_sliders,
+            str(system_frame): self.create_system_sliders
+        }
+        notebook.bind('<<NotebookTabChanged>>',
+                      lambda e: self.build_slider_tab(chart, notebook, default_values))
+        notebook.after_idle(lambda: self.build_slider_tab(chart, notebook, default_values))
         
         # Кнопки управления (внизу всех вкладок)
         buttons_frame = ttk.Frame(parent_frame)
@@ -2961,88 +2476,102 @@ class ChartGUI:
         # Применяем настройки по умолчанию сразу после создания слайдеров
         self.apply_default_settings(chart)
     
+    def build_slider_tab(self, chart, notebook, default_values):
+        """Построить содержимое выбранной вкладки ползунков (один раз)"""
+        try:
+            tab = notebook.select()
+        except tk.TclError:
+            return
+        builder = chart.slider_tabs.pop(tab, None)
+        if builder is None:
+            return
+        started = time.perf_counter()
+        builder(notebook.nametowidget(tab), chart, default_values)
+        logger.debug(f"Slider tab built in {(time.perf_counter() - started) * 1000:.1f} ms")
+    
     def apply_default_settings(self, chart):
         """Применение настроек по умолчанию к графику"""
         try:
             # Применяем все настройки по умолчанию
-            self.update_line_opacity(chart)
-            self.update_line_width(chart)
-            self.update_marker_size(chart)
-            self.update_fill_opacity(chart)
-            self.update_font_size(chart)
-            self.update_grid_alpha(chart)
-            self.update_title_size(chart)
-            self.update_y_margin(chart)
-            self.update_x_margin(chart)
-            self.update_axis_label_size(chart)
-            self.update_tick_size(chart)
-            self.update_animation_speed(chart)
-            self.update_spread_brightness(chart)
-            self.update_line_style_alpha(chart)
-            self.update_background_alpha(chart)
-            self.update_border_width(chart)
-            self.update_data_point_size(chart)
-            self.update_trend_line_width(chart)
-            self.update_volume_alpha(chart)
-            # Цвета
-            self.update_cex_color(chart)
-            self.update_dex_color(chart)
-            self.update_grid_line_width(chart)
-            self.update_grid_line_style(chart)
-            self.update_spine_color(chart)
-            self.update_text_color(chart)
-            self.update_marker_edge_width(chart)
-            self.update_marker_alpha(chart)
-            self.update_fill_color(chart)
-            self.update_title_color(chart)
-            # Размеры
-            self.update_axis_ticks_length(chart)
-            self.update_axis_ticks_width(chart)
-            self.update_axis_ticks_direction(chart)
-            self.update_minor_ticks_alpha(chart)
-            self.update_major_ticks_alpha(chart)
-            self.update_tick_label_pad(chart)
-            self.update_axis_label_pad(chart)
-            self.update_title_pad(chart)
-            # Функции размеров
-            self.update_figure_width(chart)
-            self.update_figure_height(chart)
-            self.update_chart_area_width(chart)
-            self.update_title_box_width(chart)
-            self.update_marker_box_size(chart)
-            self.update_grid_cell_width(chart)
-            self.update_grid_cell_height(chart)
-            self.update_grid_major_width(chart)
-            self.update_side_panel_width(chart)
-            self.update_bottom_panel_height(chart)
-            self.update_top_panel_height(chart)
-            self.update_trading_panel_width(chart)
-            self.update_portfolio_panel_width(chart)
-            self.update_orderbook_panel_width(chart)
-            self.update_main_window_width(chart)
-            self.update_chart_window_width(chart)
-            self.update_control_panel_width(chart)
-            self.update_dialog_width(chart)
-            self.update_modal_width(chart)
-            self.update_popup_width(chart)
-            self.update_notification_width(chart)
-            self.update_tooltip_width(chart)
-            self.update_success_message_width(chart)
-            self.update_error_message_width(chart)
-            self.update_warning_message_width(chart)
-            self.update_info_message_width(chart)
-            self.update_spread_box_width(chart)
-            self.update_price_label_width(chart)
-            self.update_volume_bar_width(chart)
-            self.update_trend_line_box_width(chart)
-            self.update_badge_width(chart)  # Это применит badge_width = 0.11
-            self.update_progress_bar_width(chart)
-            self.update_menu_bar_width(chart)
-            self.update_toolbar_width(chart)
-            self.update_status_bar_width(chart)
-            self.update_close_button_width(chart)
-            self.update_minimize_button_width(chart)
-            self.update_maximize_button_width(chart)
+            with self.style_transaction(chart):
+                self.update_line_opacity(chart)
+                self.update_line_width(chart)
+                self.update_marker_size(chart)
+                self.update_fill_opacity(chart)
+                self.update_font_size(chart)
+                self.update_grid_alpha(chart)
+                self.update_title_size(chart)
+                self.update_y_margin(chart)
+                self.update_x_margin(chart)
+                self.update_axis_label_size(chart)
+                self.update_tick_size(chart)
+                self.update_animation_speed(chart)
+                self.update_spread_brightness(chart)
+                self.update_line_style_alpha(chart)
+                self.update_background_alpha(chart)
+                self.update_border_width(chart)
+                self.update_data_point_size(chart)
+                self.update_trend_line_width(chart)
+                self.update_volume_alpha(chart)
+                # Цвета
+                self.update_cex_color(chart)
+                self.update_dex_color(chart)
+                self.update_grid_line_width(chart)
+                self.update_grid_line_style(chart)
+                self.update_spine_color(chart)
+                self.update_text_color(chart)
+                self.update_marker_edge_width(chart)
+                self.update_marker_alpha(chart)
+                self.update_fill_color(chart)
+                self.update_title_color(chart)
+                # Размеры
+                self.update_axis_ticks_length(chart)
+                self.update_axis_ticks_width(chart)
+                self.update_axis_ticks_direction(chart)
+                self.update_minor_ticks_alpha(chart)
+                self.update_major_ticks_alpha(chart)
+                self.update_tick_label_pad(chart)
+                self.update_axis_label_pad(chart)
+                self.update_title_pad(chart)
+                # Функции размеров
+                self.update_figure_width(chart)
+                self.update_figure_height(chart)
+                self.update_chart_area_width(chart)
+                self.update_title_box_width(chart)
+                self.update_marker_box_size(chart)
+                self.update_grid_cell_width(chart)
+                self.update_grid_cell_height(chart)
+                self.update_grid_major_width(chart)
+                self.update_side_panel_width(chart)
+                self.update_bottom_panel_height(chart)
+                self.update_top_panel_height(chart)
+                self.update_trading_panel_width(chart)
+                self.update_portfolio_panel_width(chart)
+                self.update_orderbook_panel_width(chart)
+                self.update_main_window_width(chart)
+                self.update_chart_window_width(chart)
+                self.update_control_panel_width(chart)
+                self.update_dialog_width(chart)
+                self.update_modal_width(chart)
+                self.update_popup_width(chart)
+                self.update_notification_width(chart)
+                self.update_tooltip_width(chart)
+                self.update_success_message_width(chart)
+                self.update_error_message_width(chart)
+                self.update_warning_message_width(chart)
+                self.update_info_message_width(chart)
+                self.update_spread_box_width(chart)
+                self.update_price_label_width(chart)
+                self.update_volume_bar_width(chart)
+                self.update_trend_line_box_width(chart)
+                self.update_badge_width(chart)  # Это применит badge_width = 0.11
+                self.update_progress_bar_width(chart)
+                self.update_menu_bar_width(chart)
+                self.update_toolbar_width(chart)
+                self.update_status_bar_width(chart)
+                self.update_close_button_width(chart)
+                self.update_minimize_button_width(chart)
+                self.update_maximize_button_width(chart)
             
             logger.info("Default settings applied to chart")
         except Exception as e:
@@ -3486,35 +3015,80 @@ class ChartGUI:
         control_frame.pack(fill=tk.X)
         
         # Ползунок
-        chart.slider_vars[var_name] = tk.DoubleVar(value=default_val)
+        # Переменная создана заранее и могла измениться (загрузка настроек, сброс)
+        if var_name not in chart.slider_vars:
+            chart.slider_vars[var_name] = tk.DoubleVar(value=default_val)
+            chart.slider_defaults[var_name] = default_val
         scale = ttk.Scale(control_frame, from_=min_val, to=max_val, variable=chart.slider_vars[var_name], 
                          orient=tk.HORIZONTAL, length=80, command=lambda v: self.update_slider_value(chart, var_name, update_func))
         scale.pack(side=tk.LEFT, padx=(0, 5))
         
         # Метка значения
-        chart.slider_labels[var_name] = ttk.Label(control_frame, text=f"{default_val:.2f}", 
+        chart.slider_labels[var_name] = ttk.Label(control_frame, text=f"{chart.slider_vars[var_name].get():.2f}", 
                                                  font=('Arial', 8), width=6)
         chart.slider_labels[var_name].pack(side=tk.LEFT)
     
     def update_slider_value(self, chart, var_name, update_func):
-        """Обновление значения ползунка и вызов функции обновления"""
+        """Обновление значения ползунка; функция обновления - раз в кадр"""
         value = chart.slider_vars[var_name].get()
         chart.slider_labels[var_name].config(text=f"{value:.2f}")
-        update_func(chart)
+        # События перетаскивания схлопываются: применяется последнее значение
+        chart.pending_styles[var_name] = update_func
+        self.request_chart_redraw(chart)
+    
+    @contextlib.contextmanager
+    def style_transaction(self, chart):
+        """Пакет изменений стиля графика: одна перерисовка после выхода"""
+        chart.style_depth += 1
+        try:
+            yield
+        finally:
+            chart.style_depth -= 1
+            if chart.style_depth == 0 and chart.style_dirty:
+                chart.style_dirty = False
+                self.request_chart_redraw(chart)
+    
+    def request_chart_redraw(self, chart):
+        """Отложенная перерисовка графика: не чаще одного раза за кадр"""
+        if chart.style_depth:
+            chart.style_dirty = True
+            return
+        if chart.redraw_after is None:
+            chart.redraw_after = self.root.after(
+                self.render_scheduler.tick_ms, lambda: self.flush_chart_styles(chart))
+    
+    def flush_chart_styles(self, chart):
+        """Применить накопленные изменения ползунков и перерисовать график один раз"""
+        chart.redraw_after = None
+        if not chart.running:
+            chart.pending_styles.clear()
+            return
+        pending, chart.pending_styles = chart.pending_styles, {}
+        chart.style_depth += 1
+        try:
+            for update_func in pending.values():
+                try:
+                    update_func(chart)
+                except Exception as e:
+                    logger.error(f"Error applying chart style: {e}")
+        finally:
+            chart.style_depth -= 1
+        chart.style_dirty = False
+        chart.fig.canvas.draw_idle()
     
     def update_line_opacity(self, chart):
         """Обновление прозрачности линий"""
         opacity = chart.slider_vars['line_opacity'].get()
         chart.line_cex.set_alpha(opacity)
         chart.line_dex.set_alpha(opacity)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_line_width(self, chart):
         """Обновление толщины линий"""
         width = chart.slider_vars['line_width'].get()
         chart.line_cex.set_linewidth(width)
         chart.line_dex.set_linewidth(width)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_marker_size(self, chart):
         """Обновление размера маркера (отключено)"""
@@ -3532,13 +3106,13 @@ class ChartGUI:
         chart.spread_text.set_fontsize(size + 4)
         chart.cex_price_label.set_fontsize(size)
         chart.dex_price_label.set_fontsize(size)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_grid_alpha(self, chart):
         """Обновление яркости сетки"""
         alpha = chart.slider_vars['grid_alpha'].get()
         chart.ax.grid(True, alpha=alpha, linestyle='-', linewidth=0.5)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_animation_speed(self, chart):
         """Обновление скорости анимации"""
@@ -3553,17 +3127,14 @@ class ChartGUI:
         chart.y_margin = margin
         # Применяем только если не ручное масштабирование
         if not chart.manual_zoom:
-            if len(chart.cex_prices) > 0:
-                all_prices = chart.cex_prices.copy()
-                if len(chart.dex_prices) > 0:
-                    all_prices.extend(chart.dex_prices)
-                min_price = min(all_prices)
-                max_price = max(all_prices)
+            bounds = chart.series.price_bounds()
+            if bounds is not None:
+                min_price, max_price = bounds
                 price_range = max_price - min_price
                 if price_range > 0:
                     margin_value = price_range * margin
                     chart.ax.set_ylim(min_price - margin_value, max_price + margin_value)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_spread_brightness(self, chart):
         """Обновление яркости отображения спреда"""
@@ -3579,13 +3150,13 @@ class ChartGUI:
             else:
                 color = f'44{int(255/brightness):02x}44'
             chart.spread_text.set_color(color)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_title_size(self, chart):
         """Обновление размера заголовка"""
         size = int(chart.slider_vars['title_size'].get())
         chart.ax.set_title(chart.ax.get_title(), fontsize=size, fontweight='bold')
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_legend_size(self, chart):
         """Обновление размера легенды - УДАЛЕНО"""
@@ -3602,45 +3173,45 @@ class ChartGUI:
         size = int(chart.slider_vars['axis_label_size'].get())
         chart.ax.set_xlabel(chart.ax.get_xlabel(), fontsize=size)
         chart.ax.set_ylabel(chart.ax.get_ylabel(), fontsize=size)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_tick_size(self, chart):
         """Обновление размера делений"""
         size = int(chart.slider_vars['tick_size'].get())
         chart.ax.tick_params(labelsize=size)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_x_margin(self, chart):
         """Обновление отступов по X"""
         margin = chart.slider_vars['x_margin'].get()
         chart.x_margin = margin
-        if not chart.manual_zoom and len(chart.times) > 0:
-            times_np = np.array(chart.times)
+        if not chart.manual_zoom and len(chart.series) > 0:
+            times_np = chart.series.views()[0]
             if len(times_np) > 1:
                 time_range = times_np[-1] - times_np[0]
                 margin_value = time_range * margin
                 chart.ax.set_xlim(times_np[0] - margin_value, times_np[-1] + margin_value)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_line_style_alpha(self, chart):
         """Обновление прозрачности стиля линий"""
         alpha = chart.slider_vars['line_style_alpha'].get()
         chart.line_cex.set_alpha(alpha)
         chart.line_dex.set_alpha(alpha)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_background_alpha(self, chart):
         """Обновление прозрачности фона"""
         alpha = chart.slider_vars['background_alpha'].get()
         chart.ax.set_facecolor(f'#000000{int(alpha*255):02x}')
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_border_width(self, chart):
         """Обновление толщины границ"""
         width = chart.slider_vars['border_width'].get()
         for spine in chart.ax.spines.values():
             spine.set_linewidth(width)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_data_point_size(self, chart):
         """Обновление размера точек данных (отключено)"""
@@ -3651,7 +3222,7 @@ class ChartGUI:
         width = chart.slider_vars['trend_line_width'].get()
         chart.cex_guide.set_linewidth(width)
         chart.dex_guide.set_linewidth(width)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_volume_alpha(self, chart):
         """Обновление прозрачности объема (отключено)"""
@@ -3669,7 +3240,7 @@ class ChartGUI:
         chart.cex_marker.set_color(color)
         chart.cex_price_label.set_color(color)
         chart.cex_badge.set_color(color)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_dex_color(self, chart):
         """Обновление цвета DEX линии"""
@@ -3682,13 +3253,13 @@ class ChartGUI:
         chart.dex_marker.set_color(color)
         chart.dex_price_label.set_color(color)
         chart.dex_badge.set_color(color)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_grid_line_width(self, chart):
         """Обновление толщины линий сетки"""
         width = chart.slider_vars['grid_line_width'].get()
         chart.ax.grid(True, linewidth=width)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_grid_line_style(self, chart):
         """Обновление стиля линий сетки"""
@@ -3696,7 +3267,7 @@ class ChartGUI:
         styles = ['-', '--', '-.', ':', ' ']
         style = styles[int(style_val) % len(styles)]
         chart.ax.grid(True, linestyle=style)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_spine_color(self, chart):
         """Обновление цвета границ"""
@@ -3706,7 +3277,7 @@ class ChartGUI:
         color = (r, g, b)
         for spine in chart.ax.spines.values():
             spine.set_color(color)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_text_color(self, chart):
         """Обновление цвета текста"""
@@ -3717,7 +3288,7 @@ class ChartGUI:
         chart.ax.tick_params(colors=color)
         chart.ax.set_xlabel(chart.ax.get_xlabel(), color=color)
         chart.ax.set_ylabel(chart.ax.get_ylabel(), color=color)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_marker_edge_width(self, chart):
         """Обновление толщины границы маркера (отключено)"""
@@ -3739,7 +3310,7 @@ class ChartGUI:
         b = chart.slider_vars['title_color_blue'].get()
         color = (r, g, b)
         chart.ax.set_title(chart.ax.get_title(), color=color)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_legend_alpha(self, chart):
         """Обновление прозрачности легенды - УДАЛЕНО"""
@@ -3763,13 +3334,13 @@ class ChartGUI:
         """Обновление длины делений"""
         length = chart.slider_vars['axis_ticks_length'].get()
         chart.ax.tick_params(length=length)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_axis_ticks_width(self, chart):
         """Обновление толщины делений"""
         width = chart.slider_vars['axis_ticks_width'].get()
         chart.ax.tick_params(width=width)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_axis_ticks_direction(self, chart):
         """Обновление направления делений"""
@@ -3777,38 +3348,38 @@ class ChartGUI:
         directions = ['in', 'out', 'inout']
         direction_name = directions[int(direction) % len(directions)]
         chart.ax.tick_params(direction=direction_name)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_minor_ticks_alpha(self, chart):
         """Обновление прозрачности минорных делений"""
         alpha = chart.slider_vars['minor_ticks_alpha'].get()
         chart.ax.tick_params(which='minor', alpha=alpha)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_major_ticks_alpha(self, chart):
         """Обновление прозрачности мажорных делений"""
         alpha = chart.slider_vars['major_ticks_alpha'].get()
         chart.ax.tick_params(which='major', alpha=alpha)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_tick_label_pad(self, chart):
         """Обновление отступа подписей делений"""
         pad = chart.slider_vars['tick_label_pad'].get()
         chart.ax.tick_params(pad=pad)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_axis_label_pad(self, chart):
         """Обновление отступа подписей осей"""
         pad = chart.slider_vars['axis_label_pad'].get()
         chart.ax.set_xlabel(chart.ax.get_xlabel(), labelpad=pad)
         chart.ax.set_ylabel(chart.ax.get_ylabel(), labelpad=pad)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_title_pad(self, chart):
         """Обновление отступа заголовка"""
         pad = chart.slider_vars['title_pad'].get()
         chart.ax.set_title(chart.ax.get_title(), pad=pad)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     # === ФУНКЦИИ ОБНОВЛЕНИЯ РАЗМЕРОВ ===
     
@@ -3816,19 +3387,19 @@ class ChartGUI:
         """Обновление ширины фигуры"""
         width = chart.slider_vars['figure_width'].get()
         chart.fig.set_figwidth(width)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_figure_height(self, chart):
         """Обновление высоты фигуры"""
         height = chart.slider_vars['figure_height'].get()
         chart.fig.set_figheight(height)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_chart_area_width(self, chart):
         """Обновление ширины области графика"""
         width = chart.slider_vars['chart_area_width'].get()
         chart.ax.set_position([0.1, 0.1, width, 0.8])
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_legend_box_width(self, chart):
         """Обновление ширины блока легенды - УДАЛЕНО"""
@@ -3843,7 +3414,7 @@ class ChartGUI:
         """Обновление ширины блока заголовка"""
         width = chart.slider_vars['title_box_width'].get()
         chart.ax.set_title(chart.ax.get_title(), bbox={'boxstyle': f"round,pad={width}"})
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_marker_box_size(self, chart):
         """Обновление размера блока маркера (отключено)"""
@@ -3853,130 +3424,130 @@ class ChartGUI:
         """Обновление ширины ячейки сетки"""
         width = chart.slider_vars['grid_cell_width'].get()
         chart.ax.grid(True, linewidth=width * 10)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_grid_cell_height(self, chart):
         """Обновление высоты ячейки сетки"""
         height = chart.slider_vars['grid_cell_height'].get()
         chart.ax.grid(True, linewidth=height * 10)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_grid_major_width(self, chart):
         """Обновление ширины мажорной сетки"""
         width = chart.slider_vars['grid_major_width'].get()
         chart.ax.grid(True, linewidth=width * 2)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_side_panel_width(self, chart):
         """Обновление ширины боковой панели"""
         width = chart.slider_vars['side_panel_width'].get()
         # Применяем к позиции графика
         chart.ax.set_position([width, 0.1, 0.8-width, 0.8])
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_bottom_panel_height(self, chart):
         """Обновление высоты нижней панели"""
         height = chart.slider_vars['bottom_panel_height'].get()
         chart.ax.set_position([0.1, height, 0.8, 0.8-height])
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_top_panel_height(self, chart):
         """Обновление высоты верхней панели"""
         height = chart.slider_vars['top_panel_height'].get()
         chart.ax.set_position([0.1, 0.1, 0.8, 0.8-height])
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_trading_panel_width(self, chart):
         """Обновление ширины торговой панели"""
         width = chart.slider_vars['trading_panel_width'].get()
         # Применяем к позиции графика
         chart.ax.set_position([0.1, 0.1, 0.8-width, 0.8])
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_portfolio_panel_width(self, chart):
         """Обновление ширины панели портфеля"""
         width = chart.slider_vars['portfolio_panel_width'].get()
         chart.ax.set_position([0.1, 0.1, 0.8-width, 0.8])
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_orderbook_panel_width(self, chart):
         """Обновление ширины панели ордербука"""
         width = chart.slider_vars['orderbook_panel_width'].get()
         chart.ax.set_position([0.1, 0.1, 0.8-width, 0.8])
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_main_window_width(self, chart):
         """Обновление ширины главного окна"""
         width = chart.slider_vars['main_window_width'].get()
         chart.fig.set_figwidth(width * 10)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_chart_window_width(self, chart):
         """Обновление ширины окна графика"""
         width = chart.slider_vars['chart_window_width'].get()
         chart.fig.set_figwidth(width * 8)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_control_panel_width(self, chart):
         """Обновление ширины панели управления"""
         width = chart.slider_vars['control_panel_width'].get()
         chart.ax.set_position([width, 0.1, 0.8-width, 0.8])
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_dialog_width(self, chart):
         """Обновление ширины диалогового окна"""
         width = chart.slider_vars['dialog_width'].get()
         chart.fig.set_figwidth(width * 6)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_modal_width(self, chart):
         """Обновление ширины модального окна"""
         width = chart.slider_vars['modal_width'].get()
         chart.fig.set_figwidth(width * 8)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_popup_width(self, chart):
         """Обновление ширины всплывающего окна"""
         width = chart.slider_vars['popup_width'].get()
         chart.fig.set_figwidth(width * 4)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_notification_width(self, chart):
         """Обновление ширины уведомления"""
         width = chart.slider_vars['notification_width'].get()
         # Применяем к размеру текста
         chart.ax.text(0.5, 0.5, '', fontsize=width * 20, transform=chart.ax.transAxes)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_tooltip_width(self, chart):
         """Обновление ширины подсказки"""
         width = chart.slider_vars['tooltip_width'].get()
         chart.ax.text(0.5, 0.5, '', fontsize=width * 15, transform=chart.ax.transAxes)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_success_message_width(self, chart):
         """Обновление ширины сообщения об успехе"""
         width = chart.slider_vars['success_message_width'].get()
         chart.ax.text(0.5, 0.5, '', fontsize=width * 18, transform=chart.ax.transAxes)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_error_message_width(self, chart):
         """Обновление ширины сообщения об ошибке"""
         width = chart.slider_vars['error_message_width'].get()
         chart.ax.text(0.5, 0.5, '', fontsize=width * 22, transform=chart.ax.transAxes)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_warning_message_width(self, chart):
         """Обновление ширины предупреждения"""
         width = chart.slider_vars['warning_message_width'].get()
         chart.ax.text(0.5, 0.5, '', fontsize=width * 20, transform=chart.ax.transAxes)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_info_message_width(self, chart):
         """Обновление ширины информационного сообщения"""
         width = chart.slider_vars['info_message_width'].get()
         chart.ax.text(0.5, 0.5, '', fontsize=width * 16, transform=chart.ax.transAxes)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_spread_box_width(self, chart):
         """Обновление ширины блока спреда"""
@@ -3984,14 +3555,14 @@ class ChartGUI:
         # Применяем к размеру текста спреда
         if hasattr(chart, 'spread_text'):
             chart.spread_text.set_fontsize(width * 100)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_price_label_width(self, chart):
         """Обновление ширины метки цены"""
         width = chart.slider_vars['price_label_width'].get()
         chart.cex_price_label.set_fontsize(width * 80)
         chart.dex_price_label.set_fontsize(width * 80)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_volume_bar_width(self, chart):
         """Обновление ширины бара объема"""
@@ -3999,14 +3570,14 @@ class ChartGUI:
         if hasattr(chart, 'volume_bars'):
             for bar in chart.volume_bars:
                 bar.set_width(width)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_trend_line_box_width(self, chart):
         """Обновление ширины блока трендовой линии"""
         width = chart.slider_vars['trend_line_box_width'].get()
         chart.cex_guide.set_linewidth(width * 5)
         chart.dex_guide.set_linewidth(width * 5)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_badge_width(self, chart):
         """Обновление ширины бейджа"""
@@ -4016,21 +3587,21 @@ class ChartGUI:
             chart.cex_badge.set_fontsize(width * 60)
         if hasattr(chart, 'dex_badge'):
             chart.dex_badge.set_fontsize(width * 60)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_progress_bar_width(self, chart):
         """Обновление ширины прогресс-бара"""
         width = chart.slider_vars['progress_bar_width'].get()
         if hasattr(chart, 'progress_bar'):
             chart.progress_bar.set_width(width)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_menu_bar_width(self, chart):
         """Обновление ширины строки меню"""
         width = chart.slider_vars['menu_bar_width'].get()
         # Применяем к размеру заголовка
         chart.ax.set_title(chart.ax.get_title(), fontsize=width * 20)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_toolbar_width(self, chart):
         """Обновление ширины панели инструментов"""
@@ -4039,7 +3610,7 @@ class ChartGUI:
         legend = chart.ax.get_legend()
         if legend:
             legend.get_frame().set_linewidth(width * 3)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_status_bar_width(self, chart):
         """Обновление ширины строки состояния"""
@@ -4047,7 +3618,7 @@ class ChartGUI:
         # Применяем к размеру подписей осей
         chart.ax.set_xlabel(chart.ax.get_xlabel(), fontsize=width * 15)
         chart.ax.set_ylabel(chart.ax.get_ylabel(), fontsize=width * 15)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_close_button_width(self, chart):
         """Обновление ширины кнопки закрытия (отключено)"""
@@ -4058,7 +3629,7 @@ class ChartGUI:
         width = chart.slider_vars['minimize_button_width'].get()
         # Применяем к размеру делений
         chart.ax.tick_params(length=width * 100)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def update_maximize_button_width(self, chart):
         """Обновление ширины кнопки разворачивания"""
@@ -4066,7 +3637,7 @@ class ChartGUI:
         # Применяем к размеру границ
         for spine in chart.ax.spines.values():
             spine.set_linewidth(width * 50)
-        chart.fig.canvas.draw()
+        self.request_chart_redraw(chart)
     
     def save_slider_settings(self, chart):
         """Сохранение настроек ползунков в файл"""
@@ -4094,90 +3665,93 @@ class ChartGUI:
                 for var_name, value in settings.items():
                     if var_name in chart.slider_vars:
                         chart.slider_vars[var_name].set(value)
-                        chart.slider_labels[var_name].config(text=f"{value:.2f}")
+                        # Метки есть только у построенных вкладок
+                        if var_name in chart.slider_labels:
+                            chart.slider_labels[var_name].config(text=f"{value:.2f}")
                 
                 # Применяем все изменения
-                self.update_line_opacity(chart)
-                self.update_line_width(chart)
-                self.update_marker_size(chart)
-                self.update_fill_opacity(chart)
-                self.update_font_size(chart)
-                self.update_grid_alpha(chart)
-                self.update_title_size(chart)
-                # self.update_legend_size(chart)  # УДАЛЕНО
-                self.update_y_margin(chart)
-                self.update_x_margin(chart)
-                self.update_axis_label_size(chart)
-                self.update_tick_size(chart)
-                self.update_animation_speed(chart)
-                self.update_spread_brightness(chart)
-                self.update_line_style_alpha(chart)
-                self.update_background_alpha(chart)
-                self.update_border_width(chart)
-                self.update_data_point_size(chart)
-                self.update_trend_line_width(chart)
-                self.update_volume_alpha(chart)
-                # Новые функции
-                self.update_cex_color(chart)
-                self.update_dex_color(chart)
-                self.update_grid_line_width(chart)
-                self.update_grid_line_style(chart)
-                self.update_spine_color(chart)
-                self.update_text_color(chart)
-                self.update_marker_edge_width(chart)
-                self.update_marker_alpha(chart)
-                self.update_fill_color(chart)
-                self.update_title_color(chart)
-                # self.update_legend_alpha(chart)  # УДАЛЕНО
-                # self.update_legend_frame_width(chart)  # УДАЛЕНО
-                self.update_axis_ticks_length(chart)
-                self.update_axis_ticks_width(chart)
-                self.update_axis_ticks_direction(chart)
-                self.update_minor_ticks_alpha(chart)
-                self.update_major_ticks_alpha(chart)
-                self.update_tick_label_pad(chart)
-                self.update_axis_label_pad(chart)
-                self.update_title_pad(chart)
-                # Функции размеров
-                self.update_figure_width(chart)
-                self.update_figure_height(chart)
-                self.update_chart_area_width(chart)
-                # self.update_legend_box_width(chart)  # УДАЛЕНО
-                self.update_title_box_width(chart)
-                self.update_marker_box_size(chart)
-                self.update_grid_cell_width(chart)
-                self.update_grid_cell_height(chart)
-                self.update_grid_major_width(chart)
-                self.update_side_panel_width(chart)
-                self.update_bottom_panel_height(chart)
-                self.update_top_panel_height(chart)
-                self.update_trading_panel_width(chart)
-                self.update_portfolio_panel_width(chart)
-                self.update_orderbook_panel_width(chart)
-                self.update_main_window_width(chart)
-                self.update_chart_window_width(chart)
-                self.update_control_panel_width(chart)
-                self.update_dialog_width(chart)
-                self.update_modal_width(chart)
-                self.update_popup_width(chart)
-                self.update_notification_width(chart)
-                self.update_tooltip_width(chart)
-                self.update_success_message_width(chart)
-                self.update_error_message_width(chart)
-                self.update_warning_message_width(chart)
-                self.update_info_message_width(chart)
-                self.update_spread_box_width(chart)
-                self.update_price_label_width(chart)
-                self.update_volume_bar_width(chart)
-                self.update_trend_line_box_width(chart)
-                self.update_badge_width(chart)
-                self.update_progress_bar_width(chart)
-                self.update_menu_bar_width(chart)
-                self.update_toolbar_width(chart)
-                self.update_status_bar_width(chart)
-                self.update_close_button_width(chart)
-                self.update_minimize_button_width(chart)
-                self.update_maximize_button_width(chart)
+                with self.style_transaction(chart):
+                    self.update_line_opacity(chart)
+                    self.update_line_width(chart)
+                    self.update_marker_size(chart)
+                    self.update_fill_opacity(chart)
+                    self.update_font_size(chart)
+                    self.update_grid_alpha(chart)
+                    self.update_title_size(chart)
+                    # self.update_legend_size(chart)  # УДАЛЕНО
+                    self.update_y_margin(chart)
+                    self.update_x_margin(chart)
+                    self.update_axis_label_size(chart)
+                    self.update_tick_size(chart)
+                    self.update_animation_speed(chart)
+                    self.update_spread_brightness(chart)
+                    self.update_line_style_alpha(chart)
+                    self.update_background_alpha(chart)
+                    self.update_border_width(chart)
+                    self.update_data_point_size(chart)
+                    self.update_trend_line_width(chart)
+                    self.update_volume_alpha(chart)
+                    # Новые функции
+                    self.update_cex_color(chart)
+                    self.update_dex_color(chart)
+                    self.update_grid_line_width(chart)
+                    self.update_grid_line_style(chart)
+                    self.update_spine_color(chart)
+                    self.update_text_color(chart)
+                    self.update_marker_edge_width(chart)
+                    self.update_marker_alpha(chart)
+                    self.update_fill_color(chart)
+                    self.update_title_color(chart)
+                    # self.update_legend_alpha(chart)  # УДАЛЕНО
+                    # self.update_legend_frame_width(chart)  # УДАЛЕНО
+                    self.update_axis_ticks_length(chart)
+                    self.update_axis_ticks_width(chart)
+                    self.update_axis_ticks_direction(chart)
+                    self.update_minor_ticks_alpha(chart)
+                    self.update_major_ticks_alpha(chart)
+                    self.update_tick_label_pad(chart)
+                    self.update_axis_label_pad(chart)
+                    self.update_title_pad(chart)
+                    # Функции размеров
+                    self.update_figure_width(chart)
+                    self.update_figure_height(chart)
+                    self.update_chart_area_width(chart)
+                    # self.update_legend_box_width(chart)  # УДАЛЕНО
+                    self.update_title_box_width(chart)
+                    self.update_marker_box_size(chart)
+                    self.update_grid_cell_width(chart)
+                    self.update_grid_cell_height(chart)
+                    self.update_grid_major_width(chart)
+                    self.update_side_panel_width(chart)
+                    self.update_bottom_panel_height(chart)
+                    self.update_top_panel_height(chart)
+                    self.update_trading_panel_width(chart)
+                    self.update_portfolio_panel_width(chart)
+                    self.update_orderbook_panel_width(chart)
+                    self.update_main_window_width(chart)
+                    self.update_chart_window_width(chart)
+                    self.update_control_panel_width(chart)
+                    self.update_dialog_width(chart)
+                    self.update_modal_width(chart)
+                    self.update_popup_width(chart)
+                    self.update_notification_width(chart)
+                    self.update_tooltip_width(chart)
+                    self.update_success_message_width(chart)
+                    self.update_error_message_width(chart)
+                    self.update_warning_message_width(chart)
+                    self.update_info_message_width(chart)
+                    self.update_spread_box_width(chart)
+                    self.update_price_label_width(chart)
+                    self.update_volume_bar_width(chart)
+                    self.update_trend_line_box_width(chart)
+                    self.update_badge_width(chart)
+                    self.update_progress_bar_width(chart)
+                    self.update_menu_bar_width(chart)
+                    self.update_toolbar_width(chart)
+                    self.update_status_bar_width(chart)
+                    self.update_close_button_width(chart)
+                    self.update_minimize_button_width(chart)
+                    self.update_maximize_button_width(chart)
                 
                 messagebox.showinfo("Success", "Chart settings loaded from chart_settings.json")
                 logger.info("Chart settings loaded")
@@ -4215,90 +3789,92 @@ class ChartGUI:
         for var_name, default_val in default_values.items():
             if var_name in chart.slider_vars:
                 chart.slider_vars[var_name].set(default_val)
-                chart.slider_labels[var_name].config(text=f"{default_val:.2f}")
+                if var_name in chart.slider_labels:
+                    chart.slider_labels[var_name].config(text=f"{default_val:.2f}")
         
         # Применяем все изменения
-        self.update_line_opacity(chart)
-        self.update_line_width(chart)
-        self.update_marker_size(chart)
-        self.update_fill_opacity(chart)
-        self.update_font_size(chart)
-        self.update_grid_alpha(chart)
-        self.update_title_size(chart)
-        # self.update_legend_size(chart)  # УДАЛЕНО
-        self.update_y_margin(chart)
-        self.update_x_margin(chart)
-        self.update_axis_label_size(chart)
-        self.update_tick_size(chart)
-        self.update_animation_speed(chart)
-        self.update_spread_brightness(chart)
-        self.update_line_style_alpha(chart)
-        self.update_background_alpha(chart)
-        self.update_border_width(chart)
-        self.update_data_point_size(chart)
-        self.update_trend_line_width(chart)
-        self.update_volume_alpha(chart)
-        # Новые функции
-        self.update_cex_color(chart)
-        self.update_dex_color(chart)
-        self.update_grid_line_width(chart)
-        self.update_grid_line_style(chart)
-        self.update_spine_color(chart)
-        self.update_text_color(chart)
-        self.update_marker_edge_width(chart)
-        self.update_marker_alpha(chart)
-        self.update_fill_color(chart)
-        self.update_title_color(chart)
-        # self.update_legend_alpha(chart)  # УДАЛЕНО
-        # self.update_legend_frame_width(chart)  # УДАЛЕНО
-        self.update_axis_ticks_length(chart)
-        self.update_axis_ticks_width(chart)
-        self.update_axis_ticks_direction(chart)
-        self.update_minor_ticks_alpha(chart)
-        self.update_major_ticks_alpha(chart)
-        self.update_tick_label_pad(chart)
-        self.update_axis_label_pad(chart)
-        self.update_title_pad(chart)
-        # Функции размеров
-        self.update_figure_width(chart)
-        self.update_figure_height(chart)
-        self.update_chart_area_width(chart)
-        # self.update_legend_box_width(chart)  # УДАЛЕНО
-        self.update_title_box_width(chart)
-        self.update_marker_box_size(chart)
-        self.update_grid_cell_width(chart)
-        self.update_grid_cell_height(chart)
-        self.update_grid_major_width(chart)
-        self.update_side_panel_width(chart)
-        self.update_bottom_panel_height(chart)
-        self.update_top_panel_height(chart)
-        self.update_trading_panel_width(chart)
-        self.update_portfolio_panel_width(chart)
-        self.update_orderbook_panel_width(chart)
-        self.update_main_window_width(chart)
-        self.update_chart_window_width(chart)
-        self.update_control_panel_width(chart)
-        self.update_dialog_width(chart)
-        self.update_modal_width(chart)
-        self.update_popup_width(chart)
-        self.update_notification_width(chart)
-        self.update_tooltip_width(chart)
-        self.update_success_message_width(chart)
-        self.update_error_message_width(chart)
-        self.update_warning_message_width(chart)
-        self.update_info_message_width(chart)
-        self.update_spread_box_width(chart)
-        self.update_price_label_width(chart)
-        self.update_volume_bar_width(chart)
-        self.update_trend_line_box_width(chart)
-        self.update_badge_width(chart)
-        self.update_progress_bar_width(chart)
-        self.update_menu_bar_width(chart)
-        self.update_toolbar_width(chart)
-        self.update_status_bar_width(chart)
-        self.update_close_button_width(chart)
-        self.update_minimize_button_width(chart)
-        self.update_maximize_button_width(chart)
+        with self.style_transaction(chart):
+            self.update_line_opacity(chart)
+            self.update_line_width(chart)
+            self.update_marker_size(chart)
+            self.update_fill_opacity(chart)
+            self.update_font_size(chart)
+            self.update_grid_alpha(chart)
+            self.update_title_size(chart)
+            # self.update_legend_size(chart)  # УДАЛЕНО
+            self.update_y_margin(chart)
+            self.update_x_margin(chart)
+            self.update_axis_label_size(chart)
+            self.update_tick_size(chart)
+            self.update_animation_speed(chart)
+            self.update_spread_brightness(chart)
+            self.update_line_style_alpha(chart)
+            self.update_background_alpha(chart)
+            self.update_border_width(chart)
+            self.update_data_point_size(chart)
+            self.update_trend_line_width(chart)
+            self.update_volume_alpha(chart)
+            # Новые функции
+            self.update_cex_color(chart)
+            self.update_dex_color(chart)
+            self.update_grid_line_width(chart)
+            self.update_grid_line_style(chart)
+            self.update_spine_color(chart)
+            self.update_text_color(chart)
+            self.update_marker_edge_width(chart)
+            self.update_marker_alpha(chart)
+            self.update_fill_color(chart)
+            self.update_title_color(chart)
+            # self.update_legend_alpha(chart)  # УДАЛЕНО
+            # self.update_legend_frame_width(chart)  # УДАЛЕНО
+            self.update_axis_ticks_length(chart)
+            self.update_axis_ticks_width(chart)
+            self.update_axis_ticks_direction(chart)
+            self.update_minor_ticks_alpha(chart)
+            self.update_major_ticks_alpha(chart)
+            self.update_tick_label_pad(chart)
+            self.update_axis_label_pad(chart)
+            self.update_title_pad(chart)
+            # Функции размеров
+            self.update_figure_width(chart)
+            self.update_figure_height(chart)
+            self.update_chart_area_width(chart)
+            # self.update_legend_box_width(chart)  # УДАЛЕНО
+            self.update_title_box_width(chart)
+            self.update_marker_box_size(chart)
+            self.update_grid_cell_width(chart)
+            self.update_grid_cell_height(chart)
+            self.update_grid_major_width(chart)
+            self.update_side_panel_width(chart)
+            self.update_bottom_panel_height(chart)
+            self.update_top_panel_height(chart)
+            self.update_trading_panel_width(chart)
+            self.update_portfolio_panel_width(chart)
+            self.update_orderbook_panel_width(chart)
+            self.update_main_window_width(chart)
+            self.update_chart_window_width(chart)
+            self.update_control_panel_width(chart)
+            self.update_dialog_width(chart)
+            self.update_modal_width(chart)
+            self.update_popup_width(chart)
+            self.update_notification_width(chart)
+            self.update_tooltip_width(chart)
+            self.update_success_message_width(chart)
+            self.update_error_message_width(chart)
+            self.update_warning_message_width(chart)
+            self.update_info_message_width(chart)
+            self.update_spread_box_width(chart)
+            self.update_price_label_width(chart)
+            self.update_volume_bar_width(chart)
+            self.update_trend_line_box_width(chart)
+            self.update_badge_width(chart)
+            self.update_progress_bar_width(chart)
+            self.update_menu_bar_width(chart)
+            self.update_toolbar_width(chart)
+            self.update_status_bar_width(chart)
+            self.update_close_button_width(chart)
+            self.update_minimize_button_width(chart)
+            self.update_maximize_button_width(chart)
     
     
     def run(self):
@@ -4306,52 +3882,59 @@ class ChartGUI:
         self.root.mainloop()
     
     def on_closing(self):
-        """Обработка закрытия окна"""
+        """Обработка закрытия окна: окна скрываются сразу, мониторинг
+        останавливается в фоне, затем finish_closing завершает процесс"""
         logger.info("Closing application...")
         
-        # Останавливаем фоновый мониторинг
-        try:
-            self.background_monitor.stop_monitoring()
-            logger.info("Background monitoring stopped")
-        except Exception as e:
-            logger.error(f"Error stopping background monitoring: {e}")
-        
-        # Сохраняем черный список при закрытии
-        try:
-            self.background_monitor.save_blacklist()
-            logger.info("Blacklist saved on exit")
-        except Exception as e:
-            logger.error(f"Error saving blacklist on exit: {e}")
-        
         # Останавливаем все активные графики
         for chart, window in self.charts:
             try:
                 logger.info(f"Stopping chart for {chart}")
                 chart.stop()
-                window.destroy()
+                self.destroy_chart_window(chart, window)
             except Exception as e:
                 logger.error(f"Error stopping chart: {e}")
         
         # Очищаем список графиков
         self.charts.clear()
+        for chart, window in self.chart_pool:
+            try:
+                self.destroy_chart_window(chart, window)
+            except Exception as e:
+                logger.error(f"Error closing pooled chart window: {e}")
+        self.chart_pool.clear()
+        self.render_scheduler.stop()
+        self.root.withdraw()
+        
+        # Останавливаем фоновый мониторинг (ожидание задач и сброс архива - не в потоке Tk)
+        try:
+            self.background_monitor.stop_monitoring(on_stopped=lambda: self.call_in_gui(self.finish_closing))
+        except Exception as e:
+            logger.error(f"Error stopping background monitoring: {e}")
+            self.finish_closing()
+    
+    def finish_closing(self):
+        """Завершение закрытия после остановки мониторинга"""
+        logger.info("Background monitoring stopped")
+        
+        # Сохраняем черный список при закрытии
+        try:
+            self.background_monitor.save_blacklist()
+            logger.info("Blacklist saved on exit")
+        except Exception as e:
+            logger.error(f"Error saving blacklist on exit: {e}")
         
         # Закрываем главное окно
         self.root.destroy()
         
-        # Принудительно завершаем все потоки
+        # Останавливаем ядро рыночных данных (фид, опрос) и пул HTTP запросов.
+        # Остальные потоки - демоны: os._exit завершает их без ожидания
         try:
-            import threading
-            import os
-            import sys
-            
-            # Ждем завершения всех потоков (максимум 2 секунды)
-            for thread in threading.enumerate():
-                if thread != threading.current_thread():
-                    thread.join(timeout=2.0)
-            
-            logger.info("All threads stopped")
+            get_market_core().stop()
+            get_fetch_engine().close()
+            logger.info("Market core and fetch pool stopped")
         except Exception as e:
-            logger.error(f"Error stopping threads: {e}")
+            logger.error(f"Error stopping market core: {e}")
         
         # Принудительное завершение процесса
         try:
@@ -0,0 +1,129 @@
+"""
+Ядро рыночных данных: один поток с asyncio циклом.
+В нём живут соединения MEXC фида, ping, переподключения, опрос DEX цен
+и отложенные действия (сброс алертов). Блокирующие HTTP запросы уходят
+в пул DexFetchEngine, цикл только планирует их. В Tk данные попадают
+через gui_bridge (MonitorMessageQueue, LatestValueChannel) - из цикла
+Tk не вызывается.
+"""
+
+import asyncio
+import logging
+import threading
+
+from dex_fetcher import get_fetch_engine
+
+logger = logging.getLogger(__name__)
+
+
+class CoreTimer:
+    """Отменяемое отложенное действие (замена threading.Timer)"""
+
+    def __init__(self):
+        self.handle = None
+        self.cancelled = False
+
+    def _arm(self, loop, delay, func, args):
+        if not self.cancelled:
+            self.handle = loop.call_later(delay, func, *args)
+
+    def cancel(self):
+        self.cancelled = True
+        handle = self.handle
+        if handle is not None:
+            handle.cancel()
+
+
+class MarketDataCore:
+    """asyncio цикл в выделенном потоке; методы можно вызывать из любого потока"""
+
+    # Сколько при остановке ждать отменённые задачи (секунды)
+    STOP_WAIT = 0.5
+
+    def __init__(self):
+        self.loop = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+
+    def start(self):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(target=self._run, name="market-core", daemon=True)
+            self.thread.start()
+        self.ready.wait()
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.set_exception_handler(self._on_loop_error)
+        self.loop = loop
+        self.ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            # Остановка: отменяем оставшиеся задачи (соединения, опрос) и закрываем цикл
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.wait(tasks, timeout=self.STOP_WAIT))
+            loop.close()
+
+    def stop(self, timeout=None):
+        """Остановить цикл и дождаться его потока (при закрытии приложения)"""
+        with self.lock:
+            thread, loop = self.thread, self.loop
+            if thread is None:
+                return
+            self.thread = None
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not threading.current_thread():
+            thread.join(self.STOP_WAIT * 2 if timeout is None else timeout)
+            if thread.is_alive():
+                logger.warning("Market core thread did not stop in time")
+        self.loop = None
+        self.ready.clear()
+
+    def _on_loop_error(self, loop, context):
+        logger.error(f"Market core error: {context.get('exception') or context.get('message')}")
+
+    def in_core_thread(self):
+        return threading.current_thread() is self.thread
+
+    def submit(self, coro):
+        """Запустить корутину в цикле; возвращает concurrent.futures.Future (cancel() отменяет задачу)"""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call_soon(self, func, *args):
+        self.start()
+        if self.in_core_thread():
+            self.loop.call_soon(func, *args)
+        else:
+            self.loop.call_soon_threadsafe(func, *args)
+
+    def call_later(self, delay, func, *args):
+        """func(*args) в цикле через delay секунд; возвращает CoreTimer"""
+        self.start()
+        timer = CoreTimer()
+        self.call_soon(timer._arm, self.loop, delay, func, args)
+        return timer
+
+    async def run_blocking(self, func, *args):
+        """Выполнить блокирующую функцию (HTTP запрос) в пуле DexFetchEngine"""
+        return await self.loop.run_in_executor(get_fetch_engine().executor, func, *args)
+
+
+_core = None
+_core_lock = threading.Lock()
+
+
+def get_market_core():
+    """Общее ядро для мониторинга и окон графиков"""
+    global _core
+    with _core_lock:
+        if _core is None:
+            _core = MarketDataCore()
+        return _core
@@ -0,0 +1,509 @@
+"""
+Мультиплексированный MEXC Futures WebSocket.
+Все подписки sub.ticker/sub.deal идут через небольшое число общих соединений,
+push-сообщения маршрутизируются обработчикам по символу через словарь.
+Соединения и ping - задачи asyncio цикла ядра рыночных данных.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+
+from async_ws import AsyncWebSocket
+from config import WEBSOCKET_CONFIG
+from dex_fetcher import get_fetch_engine
+from json_codec import get_decoder
+from market_core import get_market_core
+
+logger = logging.getLogger(__name__)
+
+MEXC_CONFIG = WEBSOCKET_CONFIG['mexc']
+
+
+# Кадры MEXC компактные и начинаются с ключа канала: {"channel":"push.deal",...}
+CHANNEL_PREFIX = b'{"channel":"'
+PUSH_PREFIXES = (b'{"channel":"push.ticker"', b'{"channel":"push.deal"')
+
+
+def mexc_symbol(token_name):
+    """Имя контракта MEXC для токена (RAIL -> RAIL_USDT)"""
+    return f"{token_name}_USDT"
+
+
+class MexcConnection:
+    """Одно общее WebSocket соединение, обслуживающее группу символов.
+    Задача run - супервизор: единственное логическое соединение, переподключение
+    с экспоненциальной задержкой и случайным разбросом, повторная подписка"""
+
+    def __init__(self, manager, conn_id):
+        self.manager = manager
+        self.conn_id = conn_id
+        self.symbols = set()  # Символы, закреплённые за этим соединением
+        self.ws = None
+        self.connected = False
+        self.active = True
+        self.task = None  # Задача соединения в цикле ядра
+
+        # Метрики
+        self.created_at = time.monotonic()
+        self.connects = 0  # Успешных подключений (переподключений = connects - 1)
+        self.failures = 0  # Неудачных попыток подряд
+        self.connected_at = None  # time.monotonic() текущего подключения
+        self.uptime = 0.0  # Суммарное время завершённых подключений (секунды)
+        self.last_message = 0.0  # time.monotonic() последнего кадра
+        self.last_push = 0.0  # time.monotonic() последнего тика цены
+        self.gap_open = False  # Поток тиков молчит, REST догрузка уже запрошена
+        self.last_error = None
+
+    def start(self):
+        self.task = self.manager.core.submit(self.run())
+
+    def retry_delay(self):
+        """Задержка перед переподключением: retry_delay * 2^(n-1), рост ограничен
+        max_retry_attempts, случайный разброс 50-100% разводит соединения во времени"""
+        attempt = min(self.failures, self.manager.max_retry_attempts)
+        delay = self.manager.retry_delay * 2 ** max(attempt - 1, 0)
+        return random.uniform(delay / 2, delay)
+
+    async def run(self):
+        """Цикл соединения: переподключение внутри одной задачи"""
+        while self.active and self.manager.running:
+            try:
+                self.ws = await AsyncWebSocket.connect(self.manager.url, timeout=self.manager.connect_timeout)
+                self.on_open()
+                while self.active:
+                    message = await self.ws.recv(raw=True)
+                    self.last_message = time.monotonic()
+                    if self.manager.dispatch(message):
+                        self.last_push = self.last_message
+                        self.gap_open = False
+                        # Пошли данные - соединение рабочее, задержка снова минимальная
+                        self.failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                if self.active:
+                    logger.error(f"MEXC feed #{self.conn_id} error: {e}")
+            finally:
+                self.on_close()
+                if self.ws is not None:
+                    await self.ws.close()
+                    self.ws = None
+            if self.active and self.manager.running:
+                self.failures += 1
+                delay = self.retry_delay()
+                if self.failures >= self.manager.max_retry_attempts:
+                    logger.warning(f"MEXC feed #{self.conn_id}: {self.failures} failed attempts in a row, "
+                                   f"next retry in {delay:.1f}s")
+                else:
+                    logger.info(f"MEXC feed #{self.conn_id} reconnecting in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    def on_open(self):
+        self.connected = True
+        self.connects += 1
+        self.connected_at = self.last_message = self.last_push = time.monotonic()
+        self.gap_open = False
+        with self.manager.lock:
+            symbols = list(self.symbols)
+        logger.info(f"MEXC feed #{self.conn_id} connected, subscribing {len(symbols)} symbols")
+        for symbol_name in symbols:
+            self.send_subscription(symbol_name, 'sub')
+        if self.connects > 1 and symbols:
+            # Тики за время разрыва потеряны: текущие цены берём через REST
+            self.manager.request_backfill(symbols)
+
+    def on_close(self):
+        if self.connected_at is not None:
+            self.uptime += time.monotonic() - self.connected_at
+            self.connected_at = None
+        self.connected = False
+
+    def drop(self, reason):
+        """Разорвать зависшее соединение; run переподключится"""
+        logger.warning(f"MEXC feed #{self.conn_id} dropped: {reason}")
+        self.last_error = reason
+        if self.ws is not None:
+            self.ws.abort()
+
+    def total_uptime(self, now):
+        if self.connected_at is None:
+            return self.uptime
+        return self.uptime + now - self.connected_at
+
+    def send(self, payload):
+        """Отправка из любого потока: запись в сокет выполняет цикл ядра"""
+        if not self.connected:
+            return False
+        self.manager.core.call_soon(self._send_now, json.dumps(payload))
+        return True
+
+    def _send_now(self, text):
+        ws = self.ws
+        if not self.connected or ws is None:
+            return
+        try:
+            ws.send_nowait(text)
+        except Exception as e:
+            logger.debug(f"MEXC feed #{self.conn_id} send error: {e}")
+
+    def send_subscription(self, symbol_name, action):
+        """action: 'sub' или 'unsub' для тикера и сделок"""
+        for channel in ('ticker', 'deal'):
+            self.send({"method": f"{action}.{channel}", "param": {"symbol": symbol_name}})
+
+    def close(self):
+        self.active = False
+        self.connected = False
+        if self.task is not None:
+            self.task.cancel()
+
+
+class MexcFeedManager:
+    """Менеджер общих MEXC соединений с маршрутизацией по символу"""
+
+    def __init__(self, max_connections=None, symbols_per_connection=None):
+        self.url = MEXC_CONFIG['url']
+        self.max_connections = max_connections or MEXC_CONFIG['max_connections']
+        self.symbols_per_connection = symbols_per_connection or MEXC_CONFIG['symbols_per_connection']
+        self.ping_interval = MEXC_CONFIG['ping_interval']
+        self.retry_delay = WEBSOCKET_CONFIG['retry_delay']
+        self.max_retry_attempts = WEBSOCKET_CONFIG['max_retry_attempts']
+        self.connect_timeout = WEBSOCKET_CONFIG['connection_timeout']
+        self.stale_timeout = MEXC_CONFIG['stale_timeout']
+        self.gap_timeout = MEXC_CONFIG['gap_timeout']
+        self.rest_ticker_url = MEXC_CONFIG['rest_ticker_url']
+
+        self.decoder, self.loads = get_decoder(MEXC_CONFIG['json_decoder'])
+
+        self.core = get_market_core()
+        self.running = False
+        self.lock = threading.Lock()
+        self.connections = []
+        self.handlers = {}  # {symbol_name: handler(channel, price)}
+        self.symbol_conn = {}  # {symbol_name: MexcConnection}
+        self.ping_task = None
+
+        # Состояние тиков символа для отсева повторов (только в потоке ядра):
+        # {symbol_name: {'price', 'push.ticker': ts, 'push.deal': ts, 'deal_keys': {(t, p, v)}}}
+        self.tick_state = {}
+        self.backfill_pending = set()  # Символы, ждущие REST запроса
+        self.backfill_task = None
+        self.started_at = None
+        self.backfills = 0  # Цен, полученных через REST
+        self.duplicates = 0  # Отброшенных повторных и устаревших тиков
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.started_at = time.monotonic()
+        logger.debug(f"MEXC feed JSON decoder: {self.decoder}")
+        with self.lock:
+            for conn in self.connections:
+                if conn.task is None:
+                    conn.start()
+        self.ping_task = self.core.submit(self.ping_loop())
+
+    def stop(self):
+        if self.running:
+            stats = self.stats()
+            logger.info(f"MEXC feed stats: {stats['connections']} connections, "
+                        f"uptime {stats['uptime'] * 100:.1f}%, {stats['reconnects']} reconnects, "
+                        f"{stats['backfills']} REST backfills, {stats['duplicates']} duplicate ticks dropped")
+        self.running = False
+        if self.ping_task is not None:
+            self.ping_task.cancel()
+            self.ping_task = None
+        with self.lock:
+            connections = list(self.connections)
+            self.connections.clear()
+            self.handlers.clear()
+            self.symbol_conn.clear()
+        for conn in connections:
+            conn.close()
+
+    def stats(self):
+        """Метрики фида: подключения, доля времени на связи, переподключения, догрузки"""
+        now = time.monotonic()
+        with self.lock:
+            connections = list(self.connections)
+        # Доля времени на связи считается от запуска фида или от создания соединения
+        elapsed = sum(now - max(self.started_at or now, conn.created_at) for conn in connections)
+        uptime = sum(conn.total_uptime(now) for conn in connections)
+        return {
+            'connections': len(connections),
+            'connected': sum(1 for conn in connections if conn.connected),
+            'uptime': uptime / elapsed if elapsed > 0 else 0.0,
+            'reconnects': sum(max(conn.connects - 1, 0) for conn in connections),
+            'failures': sum(conn.failures for conn in connections),
+            'backfills': self.backfills,
+            'duplicates': self.duplicates,
+            'per_connection': [{
+                'id': conn.conn_id,
+                'symbols': len(conn.symbols),
+                'connected': conn.connected,
+                'uptime': conn.total_uptime(now),
+                'connects': conn.connects,
+                'failures': conn.failures,
+                'last_error': conn.last_error
+            } for conn in connections]
+        }
+
+    def _pick_connection(self):
+        """Соединение с наименьшей загрузкой; новое создаётся, пока не достигнут лимит"""
+        conn = min(self.connections, key=lambda c: len(c.symbols), default=None)
+        if conn is None or (len(conn.symbols) >= self.symbols_per_connection
+                            and len(self.connections) < self.max_connections):
+            conn = MexcConnection(self, len(self.connections))
+            self.connections.append(conn)
+            if self.running:
+                conn.start()
+        return conn
+
+    def subscribe(self, token_name, handler):
+        """Подписка токена на тикер и сделки; handler(channel, price)"""
+        symbol_name = mexc_symbol(token_name)
+        with self.lock:
+            self.handlers[symbol_name] = handler
+            if symbol_name in self.symbol_conn:
+                return
+            conn = self._pick_connection()
+            conn.symbols.add(symbol_name)
+            self.symbol_conn[symbol_name] = conn
+        # Если соединение ещё не открыто, подписка уйдёт в on_open
+        if conn.connected:
+            conn.send_subscription(symbol_name, 'sub')
+            logger.debug(f"Subscribed {symbol_name} on feed #{conn.conn_id}")
+
+    def is_subscribed(self, token_name):
+        return mexc_symbol(token_name) in self.symbol_conn
+
+    def unsubscribe(self, token_name):
+        self._unsubscribe_symbol(mexc_symbol(token_name))
+
+    def _unsubscribe_symbol(self, symbol_name):
+        with self.lock:
+            self.handlers.pop(symbol_name, None)
+            conn = self.symbol_conn.pop(symbol_name, None)
+            if conn is not None:
+                conn.symbols.discard(symbol_name)
+        # tick_state принадлежит потоку ядра (deliver): очищаем его там же
+        self.core.call_soon(self._drop_tick_state, symbol_name)
+        if conn is not None:
+            conn.send_subscription(symbol_name, 'unsub')
+            logger.debug(f"Unsubscribed {symbol_name} from feed #{conn.conn_id}")
+
+    def _drop_tick_state(self, symbol_name):
+        """Забыть последние тики символа (в потоке ядра), если его не подписали снова"""
+        if symbol_name not in self.symbol_conn:
+            self.tick_state.pop(symbol_name, None)
+
+    def sync(self, token_handlers):
+        """Привести подписки к набору {token_name: handler} без переподключения"""
+        wanted = {mexc_symbol(name): name for name in token_handlers}
+        with self.lock:
+            current = list(self.symbol_conn)
+        for symbol_name in current:
+            if symbol_name not in wanted:
+                self._unsubscribe_symbol(symbol_name)
+        for symbol_name, token_name in wanted.items():
+            self.subscribe(token_name, token_handlers[token_name])
+
+    def dispatch(self, message):
+        """Разбор push-сообщения и вызов обработчика символа; True для тика цены"""
+        tick = self.decode(message)
+        if tick is None:
+            return False
+        self.deliver(*tick)
+        return True
+
+    def decode(self, message):
+        """Разбор кадра в (symbol_name, channel, price, ts, key) или None,
+        если в кадре нет тика цены"""
+        if isinstance(message, str):
+            message = message.encode()
+        # Канал виден по началу кадра: pong и ответы на подписку не разбираем.
+        # Кадр в другом формате (ключи в ином порядке) разбирается целиком
+        if not message.startswith(PUSH_PREFIXES) and message.startswith(CHANNEL_PREFIX):
+            return None
+        try:
+            data = self.loads(message)
+        except ValueError as e:
+            logger.error(f"MEXC feed bad frame: {e}")
+            return None
+
+        channel = data.get("channel")
+        if channel == "push.ticker":
+            payload = data.get("data") or {}
+            symbol_name = data.get("symbol") or payload.get("symbol")
+            p = payload.get("lastPrice")
+            ts = payload.get("timestamp")
+            key = None
+        elif channel == "push.deal":
+            deals = data.get("data")
+            # формат обычно массив сделок; берём последнюю
+            if isinstance(deals, list) and deals:
+                last = deals[-1]
+            elif isinstance(deals, dict):
+                last = deals
+            else:
+                return None
+            symbol_name = data.get("symbol") or last.get("symbol") or last.get("s")
+            p = last.get("price") or last.get("p")
+            ts = last.get("t")
+            # У сделок MEXC нет id: повтор узнаём по (время, цена, объём)
+            key = (ts, p, last.get("v") or last.get("vol"))
+        else:
+            # pong и служебные ответы
+            return None
+
+        if p is None or symbol_name is None:
+            return None
+        return symbol_name, channel, float(p), ts or data.get("ts"), key
+
+    def deliver(self, symbol_name, channel, price, ts, key=None):
+        """Передать тик обработчику, отбросив повтор или устаревший тик.
+        Время сравнивается в пределах своего канала: снимок тикера и сделка
+        идут разными потоками и друг друга не вытесняют.
+        - push.deal: отбрасываются сделки старше последней и уже виденные
+          (по key) сделки с тем же временем - повтор после переподключения;
+        - push.ticker: отбрасывается снимок не новее последнего;
+        - rest.ticker: догрузка проходит, только если цена изменилась и
+          снимок новее последних push обоих каналов.
+        Возвращает False для отброшенного тика"""
+        state = self.tick_state.get(symbol_name)
+        if state is None:
+            state = self.tick_state[symbol_name] = {
+                'price': None, 'push.ticker': None, 'push.deal': None, 'deal_keys': set()}
+        last = state.get(channel)
+        if channel == "push.deal":
+            if ts is not None and last is not None:
+                if ts < last or (ts == last and key in state['deal_keys']):
+                    self.duplicates += 1
+                    return False
+                if ts == last:
+                    state['deal_keys'].add(key)
+            if ts is not None and (last is None or ts > last):
+                state['push.deal'] = ts
+                state['deal_keys'] = {key}
+        elif channel == "push.ticker":
+            if ts is not None and last is not None and ts <= last:
+                self.duplicates += 1
+                return False
+            if ts is not None:
+                state['push.ticker'] = ts
+        else:
+            newest = max((t for t in (state['push.ticker'], state['push.deal']) if t is not None), default=None)
+            if price == state['price'] or (ts is not None and newest is not None and ts <= newest):
+                self.duplicates += 1
+                return False
+        state['price'] = price
+
+        handler = self.handlers.get(symbol_name)
+        if handler is None:
+            return True
+        try:
+            handler(channel, price)
+        except Exception as e:
+            logger.error(f"MEXC feed handler error for {symbol_name}: {e}")
+        return True
+
+    def request_backfill(self, symbols):
+        """Догрузить текущие цены символов через REST (вызывается в потоке ядра)"""
+        self.backfill_pending.update(symbols)
+        if self.backfill_task is None or self.backfill_task.done():
+            self.backfill_task = asyncio.ensure_future(self.backfill())
+
+    async def backfill(self):
+        """Один REST запрос тикеров на все ожидающие символы"""
+        while self.backfill_pending and self.running:
+            symbols = self.backfill_pending
+            self.backfill_pending = set()
+            try:
+                tickers = await self.core.run_blocking(self.fetch_rest_tickers)
+            except Exception as e:
+                logger.error(f"MEXC REST backfill error: {e}")
+                return
+            filled = 0
+            for ticker in tickers:
+                symbol_name = ticker.get("symbol")
+                p = ticker.get("lastPrice")
+                if symbol_name not in symbols or symbol_name not in self.handlers or p is None:
+                    continue
+                if self.deliver(symbol_name, "rest.ticker", float(p), ticker.get("timestamp")):
+                    filled += 1
+            self.backfills += filled
+            logger.info(f"MEXC REST backfill: {filled} of {len(symbols)} symbols")
+
+    def fetch_rest_tickers(self):
+        """Тикеры всех контрактов одним запросом (в пуле HTTP)"""
+        response = get_fetch_engine().get(self.rest_ticker_url)
+        response.raise_for_status()
+        data = response.json().get("data") or []
+        return data if isinstance(data, list) else [data]
+
+    async def ping_loop(self):
+        """Одна задача ping и надзора на все соединения: зависшие соединения
+        разрываются; если соединение живо (pong идут), но тики цен молчат
+        дольше gap_timeout, его символы один раз догружаются через REST"""
+        while self.running:
+            now = time.monotonic()
+            with self.lock:
+                connections = list(self.connections)
+            gaps = []
+            for conn in connections:
+                if not conn.connected:
+                    continue
+                if now - conn.last_message > self.stale_timeout:
+                    conn.drop(f"no frames for {now - conn.last_message:.0f}s")
+                    continue
+                conn.send({"method": "ping"})
+                if not conn.gap_open and now - conn.last_push > self.gap_timeout:
+                    # Одна догрузка на разрыв: следующая - после нового тика и нового молчания
+                    conn.gap_open = True
+                    gaps.extend(conn.symbols)
+            if gaps:
+                self.request_backfill(gaps)
+            await asyncio.sleep(self.ping_interval)
+
+
+class PriceBus:
+    """Публикация CEX цен из фонового фида подписчикам (окнам графиков)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}  # {token_name: (callback, ...)}
+
+    def subscribe(self, token_name, callback):
+        """callback(channel, price) вызывается в потоке фида на каждый тик"""
+        with self.lock:
+            callbacks = self.subscribers.get(token_name, ())
+            if callback not in callbacks:
+                self.subscribers[token_name] = callbacks + (callback,)
+
+    def unsubscribe(self, token_name, callback):
+        """Возвращает True, если у токена не осталось подписчиков"""
+        with self.lock:
+            callbacks = tuple(c for c in self.subscribers.get(token_name, ()) if c != callback)
+            if callbacks:
+                self.subscribers[token_name] = callbacks
+                return False
+            self.subscribers.pop(token_name, None)
+            return True
+
+    def tokens(self):
+        with self.lock:
+            return list(self.subscribers)
+
+    def publish(self, token_name, channel, price):
+        # Кортеж подписчиков неизменяем, поэтому читаем без блокировки
+        for callback in self.subscribers.get(token_name, ()):
+            try:
+                callback(channel, price)
+            except Exception as e:
+                logger.error(f"Price bus subscriber error for {token_name}: {e}")
@@ -0,0 +1,234 @@
+"""
+История цен токенов на NumPy массивах.
+Колонки (timestamp, cex, dex) типа float64, отсутствующая цена - NaN.
+Добавление O(1) (амортизированно), устаревание по времени - сдвиг начала окна.
+TickStore держит буферы всех токенов за индексом символ -> слот.
+"""
+
+import threading
+
+import numpy as np
+
+from config import MONITORING_CONFIG
+
+
+class PriceRingBuffer:
+    """Кольцевой буфер истории цен фиксированной ёмкости.
+
+    Живое окно всегда лежит в массиве непрерывно, поэтому view() отдаёт
+    срезы без копирования. Когда запись доходит до конца массива, окно
+    переносится в новый массив (старые срезы остаются валидными).
+    """
+
+    def __init__(self, capacity=None, duration=None, initial_size=256):
+        self.capacity = capacity or MONITORING_CONFIG['history_capacity']
+        self.duration = duration or MONITORING_CONFIG['history_duration']
+        # Запас за ёмкостью: перенос окна раз в slack добавлений
+        self.max_size = self.capacity + max(self.capacity // 4, 64)
+        self.lock = threading.Lock()
+        size = min(initial_size, self.max_size)
+        self.times = np.empty(size, dtype=np.float64)
+        self.cex = np.empty(size, dtype=np.float64)
+        self.dex = np.empty(size, dtype=np.float64)
+        self.head = 0  # Индекс самой старой точки
+        self.end = 0  # Индекс за последней точкой
+
+    def __len__(self):
+        return self.end - self.head
+
+    def _reserve(self):
+        """Освободить место под одну точку в конце массива"""
+        if self.end - self.head >= self.capacity:
+            self.head += 1  # Буфер полон - вытесняем самую старую точку
+        if self.end < len(self.times):
+            return
+        live = self.end - self.head
+        size = len(self.times)
+        if live * 2 > size and size < self.max_size:
+            size = min(size * 2, self.max_size)
+        times = np.empty(size, dtype=np.float64)
+        cex = np.empty(size, dtype=np.float64)
+        dex = np.empty(size, dtype=np.float64)
+        times[:live] = self.times[self.head:self.end]
+        cex[:live] = self.cex[self.head:self.end]
+        dex[:live] = self.dex[self.head:self.end]
+        self.times, self.cex, self.dex = times, cex, dex
+        self.head, self.end = 0, live
+
+    def _append(self, timestamp, cex_price, dex_price):
+        self._reserve()
+        i = self.end
+        self.times[i] = timestamp
+        self.cex[i] = cex_price
+        self.dex[i] = dex_price
+        self.end = i + 1
+
+    def _expire(self, now):
+        """Сдвинуть начало окна за точки старше duration (бинарный поиск)"""
+        cutoff = now - self.duration
+        if self.end > self.head and self.times[self.head] < cutoff:
+            self.head += int(np.searchsorted(self.times[self.head:self.end], cutoff, side='left'))
+
+    def add_cex(self, timestamp, cex_price):
+        """Новая CEX цена: новая точка с последней известной DEX ценой"""
+        with self.lock:
+            last_dex = self.dex[self.end - 1] if self.end > self.head else np.nan
+            self._append(timestamp, cex_price, last_dex)
+            self._expire(timestamp)
+
+    def add_dex(self, timestamp, dex_price):
+        """Новая DEX цена: обновляет последнюю точку, либо создаёт точку без CEX"""
+        with self.lock:
+            if self.end > self.head:
+                self.dex[self.end - 1] = dex_price
+            else:
+                self._append(timestamp, np.nan, dex_price)
+            self._expire(timestamp)
+
+    def extend(self, times, cex, dex):
+        """Добавить более старые точки пачкой (прогрев из архива).
+        Прогрев идёт в фоне, поэтому живые тики могут прийти раньше: из пачки
+        берутся точки старше первой живой и ставятся перед ней"""
+        if len(times) == 0:
+            return
+        with self.lock:
+            head, end = self.head, self.end
+            if end > head:
+                older = times < self.times[head]
+                times, cex, dex = times[older], cex[older], dex[older]
+            times = np.concatenate((times, self.times[head:end]))[-self.capacity:]
+            cex = np.concatenate((cex, self.cex[head:end]))[-self.capacity:]
+            dex = np.concatenate((dex, self.dex[head:end]))[-self.capacity:]
+            live = len(times)
+            if live == 0:
+                return
+            size = min(max(len(self.times), live * 2), self.max_size)
+            self.times = np.empty(size, dtype=np.float64)
+            self.cex = np.empty(size, dtype=np.float64)
+            self.dex = np.empty(size, dtype=np.float64)
+            self.times[:live] = times
+            self.cex[:live] = cex
+            self.dex[:live] = dex
+            self.head, self.end = 0, live
+            self._expire(times[-1])
+
+    def view(self):
+        """Срезы (times, cex, dex) без копирования; вызывать только под self.lock:
+        срезы разделяют память с буфером, add_dex меняет последнюю точку на месте"""
+        head, end = self.head, self.end
+        return self.times[head:end], self.cex[head:end], self.dex[head:end]
+
+    def snapshot(self):
+        """Потокобезопасная копия истории: {'times', 'cex_prices', 'dex_prices'}"""
+        return self.range()
+
+    def range(self, start=None, end=None):
+        """Копия точек с start <= time < end (бинарный поиск по времени)"""
+        with self.lock:
+            times, cex, dex = self.view()
+            lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+            hi = len(times) if end is None else int(np.searchsorted(times, end, side='left'))
+            return {
+                'times': times[lo:hi].copy(),
+                'cex_prices': cex[lo:hi].copy(),
+                'dex_prices': dex[lo:hi].copy()
+            }
+
+    def nbytes(self):
+        """(занято живыми точками, выделено под массивы) в байтах"""
+        with self.lock:
+            row = self.times.itemsize * 3
+            return (self.end - self.head) * row, len(self.times) * row
+
+
+class TickStore:
+    """Колоночное хранилище тиков всех токенов: индекс символ -> слот с буфером"""
+
+    def __init__(self, capacity=None, duration=None):
+        self.capacity = capacity
+        self.duration = duration
+        self.lock = threading.Lock()
+        self.index = {}  # {token_name: номер слота}
+        self.slots = []  # [PriceRingBuffer]
+        self.free_slots = []
+
+    def slot(self, token_name, create=True):
+        """Буфер токена (создаётся при первом обращении).
+        Поиск под блокировкой: clear/remove могут освободить слот и отдать
+        его другому токену, пока обработчик фида ищет свой буфер"""
+        with self.lock:
+            slot = self.index.get(token_name)
+            if slot is None:
+                if not create:
+                    return None
+                buffer = PriceRingBuffer(self.capacity, self.duration)
+                if self.free_slots:
+                    slot = self.free_slots.pop()
+                    self.slots[slot] = buffer
+                else:
+                    slot = len(self.slots)
+                    self.slots.append(buffer)
+                self.index[token_name] = slot
+            return self.slots[slot]
+
+    def add_cex(self, token_name, timestamp, cex_price):
+        self.slot(token_name).add_cex(timestamp, cex_price)
+
+    def add_dex(self, token_name, timestamp, dex_price):
+        self.slot(token_name).add_dex(timestamp, dex_price)
+
+    def extend(self, token_name, times, cex, dex):
+        self.slot(token_name).extend(times, cex, dex)
+
+    def snapshot(self, token_name):
+        buffer = self.slot(token_name, create=False)
+        return buffer.snapshot() if buffer is not None else empty_history()
+
+    def range(self, token_name, start=None, end=None):
+        buffer = self.slot(token_name, create=False)
+        return buffer.range(start, end) if buffer is not None else empty_history()
+
+    def symbols(self):
+        with self.lock:
+            return list(self.index)
+
+    def remove(self, token_name):
+        with self.lock:
+            slot = self.index.pop(token_name, None)
+            if slot is not None:
+                self.slots[slot] = None
+                self.free_slots.append(slot)
+
+    def clear(self):
+        with self.lock:
+            self.index.clear()
+            self.slots.clear()
+            self.free_slots.clear()
+
+    def __len__(self):
+        return len(self.index)
+
+    def memory_usage(self):
+        """Отчёт о памяти: число токенов и точек, занятые и выделенные байты"""
+        with self.lock:
+            buffers = [self.slots[slot] for slot in self.index.values()]
+        ticks = used = allocated = 0
+        for buffer in buffers:
+            buffer_used, buffer_allocated = buffer.nbytes()
+            ticks += len(buffer)
+            used += buffer_used
+            allocated += buffer_allocated
+        return {
+            'tokens': len(buffers),
+            'ticks': ticks,
+            'used_bytes': used,
+            'allocated_bytes': allocated
+        }
+
+
+def empty_history():
+    return {
+        'times': np.empty(0, dtype=np.float64),
+        'cex_prices': np.empty(0, dtype=np.float64),
+        'dex_prices': np.empty(0, dtype=np.float64)
+    }
@@ -0,0 +1,66 @@
+"""
+Профиль запуска приложения (--profile-startup).
+Время импортов верхнего уровня (включая отложенные, при первом использовании)
+и отметки этапов запуска от старта процесса: мониторинг запущен, окно
+построено, первая цена, первая строка таблицы спредов.
+"""
+
+import builtins
+import sys
+import threading
+import time
+
+started = time.perf_counter()
+enabled = False
+imports = []  # [(имя модуля, секунды, поток)]
+marks = {}  # {этап: секунды от старта}
+reported = False
+
+_original_import = builtins.__import__
+_local = threading.local()
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Меряем только первый импорт модуля и только верхний уровень вложенности
+    if level or name in sys.modules or getattr(_local, 'depth', 0):
+        return _original_import(name, globals, locals, fromlist, level)
+    _local.depth = 1
+    begin = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _local.depth = 0
+        imports.append((name, time.perf_counter() - begin, threading.current_thread().name))
+
+
+def enable():
+    """Включить сбор профиля; вызывать до остальных импортов"""
+    global enabled
+    enabled = True
+    builtins.__import__ = _timed_import
+
+
+def mark(stage):
+    """Отметить этап запуска (учитывается только первая отметка этапа)"""
+    if enabled and stage not in marks:
+        marks[stage] = time.perf_counter() - started
+
+
+def report(stream=None):
+    """Напечатать профиль запуска (один раз) и отключить замер импортов"""
+    global reported
+    if not enabled or reported:
+        return
+    reported = True
+    builtins.__import__ = _original_import
+    stream = stream or sys.stdout
+    lines = ["", "=== Startup profile ===", "Imports (first use, top level):"]
+    for name, seconds, thread in sorted(imports, key=lambda item: item[1], reverse=True):
+        if seconds >= 0.001:
+            where = '' if thread == 'MainThread' else f"  [{thread}]"
+            lines.append(f"  {seconds * 1000:8.1f} ms  {name}{where}")
+    lines.append("Stages (since start):")
+    for stage, seconds in sorted(marks.items(), key=lambda item: item[1]):
+        lines.append(f"  {seconds * 1000:8.1f} ms  {stage}")
+    stream.write('\n'.join(lines) + '\n')
+    stream.flush()
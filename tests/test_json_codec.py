@@ -0,0 +1,33 @@
+"""
+Все установленные декодеры json_codec разбирают и отвергают одни и те же кадры.
+Запуск из корня проекта: python -m pytest tests
+"""
+
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_codec import available_decoders, get_decoder
+
+VALID = (b'{"channel":"push.deal","data":[{"p":1.5,"t":1}]}', b' {"a":1}', b'{"a":1}\n ', '{"a":"я"}')
+INVALID = (b'{"a":1}garbage', b'{"a":1}{}', b'{', b'\xff', b'')
+
+
+class DecoderParityTest(unittest.TestCase):
+
+    def test_decoders_agree(self):
+        for name in available_decoders():
+            loads = get_decoder(name)[1]
+            with self.subTest(decoder=name):
+                for frame in VALID:
+                    self.assertEqual(loads(frame), json.loads(frame))
+                for frame in INVALID:
+                    with self.assertRaises(ValueError):
+                        loads(frame)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Немедленные алерты о высоком спреде по CEX тику (BackgroundMonitor.check_spread_immediately).
+Запуск из корня проекта: python -m pytest tests
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine.monitor import BackgroundMonitor
+
+TOKEN = {'name': 'TEST', 'address': '0x0000000000000000000000000000000000000001', 'chain': 'bsc'}
+
+
+class ImmediateAlertTest(unittest.TestCase):
+
+    def setUp(self):
+        self.monitor = BackgroundMonitor()
+        self.monitor.blacklisted_tokens = set()
+        self.monitor.tokens_data = [TOKEN]
+        self.monitor.spread_threshold = 5.0
+        self.monitor.price_data['TEST'] = {'dex': 1.10}
+        self.on_cex_price = self.monitor.make_cex_handler('TEST')
+
+    def run_in_core(self, func, *args):
+        """Обработчик тиков вызывается в цикле ядра - там же его и проверяем"""
+        done = threading.Event()
+
+        def call():
+            try:
+                func(*args)
+            finally:
+                done.set()
+
+        self.monitor.core.call_soon(call)
+        self.assertTrue(done.wait(5))
+
+    def alerts(self):
+        return [message for message in self.monitor.gui_queue.drain() if message['type'] == 'high_spread']
+
+    def test_cex_tick_over_threshold_sends_token_alert(self):
+        self.run_in_core(self.on_cex_price, 'push.deal', 1.0)
+        alerts = self.alerts()
+        self.assertEqual(len(alerts), 1)
+        self.assertIs(alerts[0]['token'], TOKEN)
+        self.assertAlmostEqual(alerts[0]['spread'], 10.0)
+        self.assertEqual(alerts[0]['cex_price'], 1.0)
+        self.assertEqual(alerts[0]['dex_price'], 1.10)
+
+    def test_same_spread_is_sent_once(self):
+        self.run_in_core(self.on_cex_price, 'push.deal', 1.0)
+        self.run_in_core(self.on_cex_price, 'push.deal', 0.9999)
+        self.assertEqual(len(self.alerts()), 1)
+        self.assertIn('TEST_10', self.monitor.sent_alerts)
+
+    def test_spread_under_threshold_sends_nothing(self):
+        self.run_in_core(self.on_cex_price, 'push.deal', 1.09)
+        self.assertEqual(self.alerts(), [])
+
+    def test_untracked_token_sends_nothing(self):
+        self.monitor.tokens_data = []
+        self.run_in_core(self.on_cex_price, 'push.deal', 1.0)
+        self.assertEqual(self.alerts(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
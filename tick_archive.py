@@ -0,0 +1,236 @@
+"""
+Архив тиков на диске.
+Для каждого токена и дня (UTC) - бинарный файл из записей фиксированного
+размера (time, cex, dex) float64, отсутствующая цена - NaN. Запись только
+в конец файла; сброс на диск и fsync пачками из фонового потока.
+Чтение через numpy.memmap без разбора файла.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from config import FILES_CONFIG
+
+logger = logging.getLogger(__name__)
+
+RECORD_DTYPE = np.dtype([('time', '<f8'), ('cex', '<f8'), ('dex', '<f8')])
+DAY_SECONDS = 24 * 60 * 60
+
+
+def day_key(timestamp):
+    """Имя дневного файла для момента времени (UTC)"""
+    return time.strftime('%Y%m%d', time.gmtime(timestamp))
+
+
+def history_rows(times, cex, dex):
+    """Свернуть события архива в точки истории, как BackgroundMonitor.update_history:
+    CEX тик даёт новую точку, DEX тик обновляет DEX цену последней точки"""
+    if len(times) == 0:
+        return times, cex, dex
+    has_cex = ~np.isnan(cex)
+    has_dex = ~np.isnan(dex)
+    # DEX цена на момент каждого события (перенос последней известной вперёд)
+    last = np.where(has_dex, np.arange(len(dex)), 0)
+    np.maximum.accumulate(last, out=last)
+    dex_filled = dex[last]
+    starts = np.flatnonzero(has_cex)
+    if not has_cex[0]:
+        # История начинается с точки без CEX цены
+        starts = np.concatenate(([0], starts))
+    # Точка получает DEX цену, действовавшую перед следующей точкой
+    ends = np.append(starts[1:], len(times)) - 1
+    return times[starts], cex[starts], dex_filled[ends]
+
+
+class TickArchive:
+    """Append-only архив тиков: {root}/{token}/{YYYYMMDD}.bin"""
+
+    def __init__(self, root=None, flush_interval=None, retention_days=None):
+        self.root = root or FILES_CONFIG['tick_archive_dir']
+        self.flush_interval = flush_interval or FILES_CONFIG['tick_archive_flush_interval']
+        self.retention_days = retention_days or FILES_CONFIG['tick_archive_retention_days']
+
+        self.lock = threading.Lock()
+        self.pending = {}  # {token_name: [(time, cex, dex)]}
+        self.writing = {}  # Пачка, которую сейчас пишет flush (ещё не на диске)
+        self.files = {}  # {token_name: (day, file)} - открытые файлы текущего дня
+        self.io_lock = threading.Lock()
+        self.running = False
+        self.wake = threading.Event()
+        self.thread = None
+
+    def token_dir(self, token_name):
+        return os.path.join(self.root, re.sub(r'[^\w.-]', '_', token_name))
+
+    def start(self):
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+            self.wake.clear()
+            self.thread = threading.Thread(target=self.flush_loop, name="tick-archive", daemon=True)
+            self.thread.start()
+
+    def append(self, token_name, timestamp, cex_price=np.nan, dex_price=np.nan):
+        """Добавить тик в очередь записи (без обращения к диску).
+        До start() и после close() тики не принимаются"""
+        with self.lock:
+            if not self.running:
+                return
+            self.pending.setdefault(token_name, []).append((timestamp, cex_price, dex_price))
+
+    def flush_loop(self):
+        self.cleanup()
+        while self.running:
+            self.wake.wait(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Tick archive flush error: {e}")
+
+    def _file_for(self, token_name, day):
+        """Файл текущего дня токена; при смене дня старый файл закрывается"""
+        entry = self.files.get(token_name)
+        if entry is not None:
+            if entry[0] == day:
+                return entry[1]
+            entry[1].close()
+        path = self.token_dir(token_name)
+        os.makedirs(path, exist_ok=True)
+        path = os.path.join(path, f"{day}.bin")
+        # Запись, оборванную сбоем, отрезаем до последней полной: дополнение
+        # нулями дало бы тик с временем 0 посреди отсортированного файла
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            size = 0
+        tail = size % RECORD_DTYPE.itemsize
+        if tail:
+            logger.warning(f"Truncating torn tick record in {path} ({tail} bytes)")
+            os.truncate(path, size - tail)
+        file = open(path, 'ab')
+        self.files[token_name] = (day, file)
+        return file
+
+    def flush(self):
+        """Записать накопленные тики и сделать один fsync на каждый изменённый файл"""
+        with self.io_lock:
+            with self.lock:
+                pending, self.pending = self.pending, {}
+                self.writing = pending
+            if not pending:
+                return
+            try:
+                self._write(pending)
+            finally:
+                with self.lock:
+                    self.writing = {}
+
+    def _write(self, pending):
+        """Дописать тики в дневные файлы; вызывается под io_lock"""
+        touched = set()
+        for token_name, ticks in pending.items():
+            records = np.array(ticks, dtype=RECORD_DTYPE)
+            days = [day_key(t) for t in (records['time'][0], records['time'][-1])]
+            if days[0] == days[1]:
+                groups = [(days[0], records)]
+            else:
+                keys = np.array([day_key(t) for t in records['time']])
+                groups = [(day, records[keys == day]) for day in dict.fromkeys(keys)]
+            for day, chunk in groups:
+                file = self._file_for(token_name, day)
+                file.write(chunk.tobytes())
+                touched.add(file)
+        for file in touched:
+            file.flush()
+            os.fsync(file.fileno())
+
+    def close(self):
+        """Остановить поток записи, дописать очередь и закрыть файлы"""
+        with self.lock:
+            running, self.running = self.running, False
+            thread = self.thread
+        if running:
+            self.wake.set()
+            if thread is not None:
+                thread.join(timeout=5)
+        self.flush()
+        with self.io_lock:
+            for _, file in self.files.values():
+                file.close()
+            self.files.clear()
+
+    def day_files(self, token_name, start=None, end=None):
+        """Дневные файлы токена, пересекающиеся с [start, end)"""
+        path = self.token_dir(token_name)
+        try:
+            names = sorted(n for n in os.listdir(path) if n.endswith('.bin'))
+        except FileNotFoundError:
+            return []
+        first = day_key(start) if start is not None else None
+        last = day_key(end) if end is not None else None
+        return [os.path.join(path, n) for n in names
+                if (first is None or n[:8] >= first) and (last is None or n[:8] <= last)]
+
+    def memory_ticks(self, token_name):
+        """Тики токена, ещё не записанные на диск (очередь и пишущаяся пачка)"""
+        with self.lock:
+            ticks = self.writing.get(token_name, []) + self.pending.get(token_name, [])
+        return np.array(ticks, dtype=RECORD_DTYPE)
+
+    def load(self, token_name, start=None, end=None):
+        """Тики токена за [start, end): NumPy массивы times/cex_prices/dex_prices.
+        Диск не сбрасывается: незаписанные тики берутся из памяти"""
+        # Память снимаем до чтения файлов: всё, что старше первого тика в памяти,
+        # уже на диске, а более новые записи файлов - дубликаты памяти
+        memory = self.memory_ticks(token_name)
+        disk_end = end
+        if len(memory):
+            times = memory['time']
+            lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+            hi = len(memory) if end is None else int(np.searchsorted(times, end, side='left'))
+            disk_end = times[0] if end is None else min(end, times[0])
+            memory = memory[lo:hi]
+        chunks = []
+        for path in self.day_files(token_name, start, disk_end):
+            count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+            if count == 0:
+                continue
+            records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(count,))
+            times = records['time']
+            lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+            hi = count if disk_end is None else int(np.searchsorted(times, disk_end, side='left'))
+            if hi > lo:
+                chunks.append(np.array(records[lo:hi]))
+            del records
+        if len(memory):
+            chunks.append(memory)
+        data = np.concatenate(chunks) if chunks else np.empty(0, dtype=RECORD_DTYPE)
+        return {
+            'times': data['time'],
+            'cex_prices': data['cex'],
+            'dex_prices': data['dex']
+        }
+
+    def cleanup(self):
+        """Удалить дневные файлы старше retention_days"""
+        oldest = day_key(time.time() - self.retention_days * DAY_SECONDS)
+        try:
+            token_dirs = os.listdir(self.root)
+        except FileNotFoundError:
+            return
+        for token_dir in token_dirs:
+            path = os.path.join(self.root, token_dir)
+            if not os.path.isdir(path):
+                continue
+            for name in os.listdir(path):
+                if name.endswith('.bin') and name[:8] < oldest:
+                    try:
+                        os.remove(os.path.join(path, name))
+                    except OSError as e:
+                        logger.warning(f"Could not remove old tick file {name}: {e}")